@@ -19,6 +19,7 @@ from fastapi.routing import APIRouter
 from prometheus_client import Counter, Histogram, generate_latest
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.deps.http import close_http_clients, open_http_clients
 from backend.routers import (
     admin,
     auth,
@@ -39,11 +40,13 @@ async def lifespan(app: FastAPI):
     """애플리케이션 기동/종료 시 필요한 훅.
 
     실제 운영에서는 DB 연결 확인, 마이그레이션 등을 수행합니다.
-    여기서는 TODO 로 남겨두고 로깅만 수행합니다.
+    임베딩/Ollama 호출용 공유 HTTP 클라이언트(커넥션 풀)를 여기서 열고 닫습니다.
     """
 
     logging.info("FastAPI 앱 시작")
+    open_http_clients()
     yield
+    await close_http_clients()
     logging.info("FastAPI 앱 종료")
 
 
@@ -0,0 +1,192 @@
+"""embedding-svc 호출 헬퍼.
+
+비전공자 팁: 벡터를 JSON 숫자 대신 원시 바이트(float32)로 받으면 전송량과 파싱 시간이 크게 줄어듭니다.
+바이너리 형식은 embedding-svc/embedding_svc/wire.py 와 동일하게 유지해야 합니다.
+
+문서 인덱싱처럼 텍스트가 많을 때는 embed_in_batches 가 개수·글자 수 상한으로 요청을 나누고,
+실패한 요청(연결 오류, 시간 초과, 429/5xx)만 무작위 지연(jitter)을 둔 지수 백오프로 다시 보냅니다.
+이미 받은 배치는 버리지 않으므로 한 요청이 실패해도 문서 전체를 처음부터 다시 임베딩하지 않습니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import struct
+from typing import Sequence
+
+import httpx
+import numpy as np
+
+from backend.deps.http import get_http_client
+from backend.deps.settings import settings
+
+OCTET_STREAM = "application/octet-stream"
+MAGIC = b"EMBV"
+HEADER = struct.Struct("<4sBBHII")
+DTYPE_CODES = {0: np.dtype("<f4"), 1: np.dtype("<f2")}
+# 다시 보내면 성공할 수 있는 응답 코드(과부하/일시 장애)
+RETRY_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+LOGGER = logging.getLogger(__name__)
+
+
+def accept_header(wire_format: str) -> str:
+    """설정된 전송 형식(json|float32|float16)에 맞는 Accept 헤더."""
+
+    if wire_format in {"float32", "float16"}:
+        return f"{OCTET_STREAM}; dtype={wire_format}, application/json;q=0.5"
+    return "application/json"
+
+
+def decode_vectors(payload: bytes) -> np.ndarray:
+    """바이너리 응답을 복사 없이 (rows, dim) 읽기 전용 NumPy 배열로 해석합니다."""
+
+    magic, _version, code, model_len, rows, dim = HEADER.unpack_from(payload)
+    if magic != MAGIC or code not in DTYPE_CODES:
+        raise ValueError("invalid embedding payload")
+    offset = HEADER.size + model_len
+    offset += -offset % 8
+    return np.frombuffer(payload, dtype=DTYPE_CODES[code], count=rows * dim, offset=offset).reshape(rows, dim)
+
+
+def parse_embedding_response(resp: httpx.Response) -> np.ndarray:
+    """Content-Type 에 따라 바이너리/JSON 응답을 모두 (rows, dim) 배열로 변환합니다."""
+
+    if resp.headers.get("content-type", "").startswith(OCTET_STREAM):
+        return decode_vectors(resp.content)
+    vectors = resp.json().get("vectors", [])
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+async def request_embeddings(texts: list[str], model: str = "gte-small", timeout: float = 60.0) -> np.ndarray:
+    """텍스트 목록을 임베딩하여 (len(texts), dim) 배열로 반환합니다."""
+
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    resp = await get_http_client("embedding").post(
+        "/embed",
+        json={"texts": texts, "model": model},
+        headers={"Accept": accept_header(settings.embedding_wire_format)},
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return parse_embedding_response(resp)
+
+
+def plan_batches(texts: Sequence[str], max_items: int, max_chars: int) -> list[slice]:
+    """입력 순서를 유지하며 개수(max_items)와 글자 수 합(max_chars) 상한을 지키는 구간으로 나눕니다.
+
+    한 텍스트가 max_chars 보다 길면 그 텍스트 하나만 담은 구간이 됩니다.
+    """
+
+    max_items = max(max_items, 1)
+    batches: list[slice] = []
+    start = chars = 0
+    for index, text in enumerate(texts):
+        if index > start and (index - start >= max_items or chars + len(text) > max_chars):
+            batches.append(slice(start, index))
+            start, chars = index, 0
+        chars += len(text)
+    if start < len(texts):
+        batches.append(slice(start, len(texts)))
+    return batches
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """full jitter 지수 백오프: 0 ~ min(cap, base × 2^attempt) 사이 무작위 초.
+
+    여러 워커가 같은 순간 실패해도 재시도가 한꺼번에 몰리지 않도록 흩어 줍니다.
+    """
+
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+async def embed_in_batches(
+    texts: Sequence[str],
+    model: str = "gte-small",
+    *,
+    max_items: int | None = None,
+    max_chars: int | None = None,
+    concurrency: int | None = None,
+    retries: int | None = None,
+    timeout: float | None = None,
+) -> np.ndarray:
+    """많은 텍스트를 상한이 있는 요청 여러 개로 나눠 최대 concurrency 개씩 동시에 임베딩합니다.
+
+    요청마다 재시도하므로 실패한 배치만 다시 보냅니다. 재시도할 수 없는 오류이거나 횟수를 넘기면
+    마지막 예외를 그대로 올립니다. 생략한 인자는 INDEX_EMBED_REQUEST_* 설정을 따릅니다.
+    """
+
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    batches = plan_batches(
+        texts,
+        max_items or settings.index_embed_request_items,
+        max_chars or settings.index_embed_request_chars,
+    )
+    retries = settings.index_embed_retries if retries is None else retries
+    timeout = timeout or settings.index_embed_timeout
+    limit = asyncio.Semaphore(max(concurrency or settings.index_embed_request_concurrency, 1))
+
+    async def send(span: slice) -> np.ndarray:
+        part = list(texts[span])
+        attempt = 0
+        while True:
+            try:
+                async with limit:
+                    vectors = await request_embeddings(part, model=model, timeout=timeout)
+                if len(vectors) != len(part):
+                    raise ValueError(f"embedding count mismatch: expected {len(part)}, got {len(vectors)}")
+                return vectors
+            except (httpx.HTTPError, ValueError) as exc:
+                if attempt >= retries or not _retryable(exc):
+                    raise
+                delay = backoff_delay(
+                    attempt, settings.index_embed_backoff_seconds, settings.index_embed_backoff_max_seconds
+                )
+                attempt += 1
+                LOGGER.warning(
+                    "임베딩 요청 재시도",
+                    extra={"attempt": attempt, "texts": len(part), "delay": round(delay, 2), "error": repr(exc)},
+                )
+                await asyncio.sleep(delay)
+
+    tasks = [asyncio.create_task(send(span)) for span in batches]
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+async def embed_one(text: str, model: str = "gte-small", timeout: float = 30.0) -> list[float]:
+    """질문 하나를 임베딩합니다. 결과가 비어 있으면 ValueError."""
+
+    vectors = await request_embeddings([text], model=model, timeout=timeout)
+    if not len(vectors):
+        raise ValueError("embedding failed")
+    return vectors[0].tolist()
+
+
+__all__ = [
+    "accept_header",
+    "backoff_delay",
+    "decode_vectors",
+    "embed_in_batches",
+    "embed_one",
+    "parse_embedding_response",
+    "plan_batches",
+    "request_embeddings",
+]
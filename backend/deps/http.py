@@ -0,0 +1,62 @@
+"""공유 HTTP 클라이언트(커넥션 풀).
+
+비전공자 팁: 요청마다 새 클라이언트를 만들면 매번 TCP 연결을 새로 맺어야 합니다.
+프로세스마다 오래 사는 클라이언트를 재사용하면 keep-alive 연결을 그대로 써서 지연이 줄어듭니다.
+API 서버는 FastAPI lifespan 에서, Celery 워커는 프로세스별 이벤트 루프(workers/runtime.py)에서 사용합니다.
+"""
+from __future__ import annotations
+
+import httpx
+
+from backend.deps.settings import settings
+
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        return False
+    return True
+
+
+def _base_urls() -> dict[str, str]:
+    return {"embedding": settings.embedding_svc, "ollama": settings.ollama_host}
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """이름별(embedding, ollama) 공유 클라이언트를 반환합니다. 없으면 만들어 둡니다."""
+
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=_base_urls()[name],
+            timeout=60.0,
+            http2=settings.http_client_http2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+        _clients[name] = client
+    return client
+
+
+def open_http_clients() -> None:
+    """기동 시 모든 공유 클라이언트를 미리 만듭니다."""
+
+    for name in _base_urls():
+        get_http_client(name)
+
+
+async def close_http_clients() -> None:
+    """종료 시 커넥션 풀을 정리합니다."""
+
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
+
+
+__all__ = ["close_http_clients", "get_http_client", "open_http_clients"]
@@ -4,6 +4,9 @@
 """
 from __future__ import annotations
 
+import codecs
+from typing import Iterator
+
 from minio import Minio
 
 from backend.deps.settings import settings
@@ -20,4 +23,25 @@ def get_minio() -> Minio:
     )
 
 
-__all__ = ["get_minio"]
+def iter_object_text(bucket: str, key: str, part_size: int = 1024 * 1024) -> Iterator[str]:
+    """오브젝트를 고정 크기 조각으로 읽어 UTF-8 문자열 조각을 순서대로 반환합니다.
+
+    조각 경계에서 잘린 멀티바이트 문자는 증분 디코더가 다음 조각과 이어 붙입니다.
+    """
+
+    response = get_minio().get_object(bucket, key)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for data in response.stream(part_size):
+            text = decoder.decode(data)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+    finally:
+        response.close()
+        response.release_conn()
+
+
+__all__ = ["get_minio", "iter_object_text"]
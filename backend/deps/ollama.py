@@ -4,23 +4,66 @@
 """
 from __future__ import annotations
 
+import json
+from typing import AsyncIterator
+
 import httpx
 
+from backend.deps.http import get_http_client
 from backend.deps.settings import settings
 
+DEFAULT_MODEL = "llama3"
+
+
+def model_context_window(model: str) -> int:
+    """모델 컨텍스트 창(토큰). LLM_CONTEXT_WINDOWS("모델=토큰,...")에 없으면 LLM_CONTEXT_WINDOW."""
+
+    for item in settings.llm_context_windows.split(","):
+        name, _, tokens = item.partition("=")
+        if name.strip() == model and tokens.strip().isdigit():
+            return int(tokens)
+    return settings.llm_context_window
+
+
+def _options(model: str) -> dict:
+    # Ollama 기본 num_ctx(2048)는 근거 예산보다 작을 수 있어, 예산 계산과 같은 창 크기를 명시합니다.
+    return {"num_ctx": model_context_window(model)}
 
-async def call_ollama(prompt: str, system: str = "", model: str = "llama3") -> str:
+
+async def call_ollama(prompt: str, system: str = "", model: str = DEFAULT_MODEL) -> str:
     """Ollama HTTP API를 호출하여 답변을 생성합니다.
 
-    운영 환경에서는 스트리밍, 타임아웃, 에러 처리 고도화가 필요합니다.
+    전체 답변을 한 번에 받습니다. 토큰 스트리밍은 `stream_ollama` 를 사용합니다.
     """
 
-    url = f"{settings.ollama_host}/api/generate"
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(url, json={"model": model, "prompt": prompt, "system": system})
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await get_http_client("ollama").post(
+        "/api/generate",
+        json={"model": model, "prompt": prompt, "system": system, "stream": False, "options": _options(model)},
+        timeout=60.0,
+    )
+    resp.raise_for_status()
+    data = resp.json()
     return data.get("response", "")
 
 
-__all__ = ["call_ollama"]
+async def stream_ollama(prompt: str, system: str = "", model: str = DEFAULT_MODEL) -> AsyncIterator[str]:
+    """Ollama 스트리밍 응답(NDJSON)을 토큰 조각 단위로 넘겨줍니다."""
+
+    async with get_http_client("ollama").stream(
+        "POST",
+        "/api/generate",
+        json={"model": model, "prompt": prompt, "system": system, "stream": True, "options": _options(model)},
+        timeout=httpx.Timeout(60.0, read=None),
+    ) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                break
+
+
+__all__ = ["DEFAULT_MODEL", "call_ollama", "model_context_window", "stream_ollama"]
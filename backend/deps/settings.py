@@ -22,11 +22,82 @@ class Settings(BaseModel):
     # 브라우저 업로드용 공개 엔드포인트 (예: http://localhost:9000). 미설정 시 MINIO_ENDPOINT를 사용.
     minio_public_endpoint: str | None = Field(alias="MINIO_PUBLIC_ENDPOINT", default=None)
     ollama_host: str = Field(alias="OLLAMA_HOST")
+    # LLM 컨텍스트 창(토큰)과 모델별 값("llama3=8192,qwen2=32768"), 답변용으로 남길 토큰 수
+    llm_context_window: int = Field(alias="LLM_CONTEXT_WINDOW", default=8192)
+    llm_context_windows: str = Field(alias="LLM_CONTEXT_WINDOWS", default="")
+    llm_answer_reserve_tokens: int = Field(alias="LLM_ANSWER_RESERVE_TOKENS", default=512)
     embedding_svc: str = Field(alias="EMBEDDING_SVC")
+    # embedding-svc 응답 형식: json | float32 | float16 (바이너리는 Accept 협상, 미지원 서버면 JSON으로 응답)
+    embedding_wire_format: str = Field(alias="EMBEDDING_WIRE_FORMAT", default="float32")
     jwt_secret: str = Field(alias="JWT_SECRET")
+    # 벡터 인덱스: 종류(hnsw|ivfflat), 거리(cosine|ip), HNSW 빌드 옵션, ivfflat 전역 lists
+    pgvector_index_type: str = Field(alias="PGVECTOR_INDEX_TYPE", default="hnsw")
+    pgvector_distance: str = Field(alias="PGVECTOR_DISTANCE", default="cosine")
+    pgvector_hnsw_m: int = Field(alias="PGVECTOR_HNSW_M", default=16)
+    pgvector_hnsw_ef_construction: int = Field(alias="PGVECTOR_HNSW_EF_CONSTRUCTION", default=64)
     pgvector_index_lists: int = Field(alias="PGVECTOR_INDEX_LISTS", default=100)
+    # 검색 정확도/지연 조절(0~1): hnsw.ef_search, ivfflat.probes 를 이 값으로 정함
+    search_recall: float = Field(alias="SEARCH_RECALL", default=0.5)
+    # 프로세스 내 NumPy 벡터 검색: 사용 여부, 메모리 예산(MB), 올릴 최대 벡터 수, 최신 확인 간격(초),
+    # 행렬 파일 공유 디렉터리(지정 시 uvicorn 워커들이 메모리 매핑으로 공유)
+    memory_index_enabled: bool = Field(alias="MEMORY_INDEX_ENABLED", default=False)
+    memory_index_budget_mb: int = Field(alias="MEMORY_INDEX_BUDGET_MB", default=512)
+    memory_index_max_rows: int = Field(alias="MEMORY_INDEX_MAX_ROWS", default=200_000)
+    memory_index_check_seconds: float = Field(alias="MEMORY_INDEX_CHECK_SECONDS", default=1.0)
+    memory_index_dir: str | None = Field(alias="MEMORY_INDEX_DIR", default=None)
+    # 이 수 이상 벡터를 가진 파이프라인에 전용 부분 벡터 인덱스를 생성
+    pipeline_index_min_rows: int = Field(alias="PIPELINE_INDEX_MIN_ROWS", default=10_000)
+    # 공유 HTTP 클라이언트 커넥션 풀(embedding-svc, Ollama 호출)
+    http_max_connections: int = Field(alias="HTTP_MAX_CONNECTIONS", default=100)
+    http_max_keepalive: int = Field(alias="HTTP_MAX_KEEPALIVE", default=20)
+    http_keepalive_expiry: float = Field(alias="HTTP_KEEPALIVE_EXPIRY", default=30.0)
+    http_client_http2: bool = Field(alias="HTTP_CLIENT_HTTP2", default=True)
     upload_max_size_mb: int = Field(alias="UPLOAD_MAX_SIZE_MB", default=200)
     token_ttl_minutes: int = Field(alias="TOKEN_TTL_MINUTES", default=60)
+    # 인덱싱 시 청크/임베딩 다중 행 INSERT 한 문장에 담을 최대 행 수
+    index_insert_batch: int = Field(alias="INDEX_INSERT_BATCH", default=1000)
+    # 스트리밍 인덱싱: 오브젝트를 읽는 조각 크기(바이트)와 임베딩/저장 배치 크기(청크 수)
+    index_read_part_bytes: int = Field(alias="INDEX_READ_PART_BYTES", default=1024 * 1024)
+    index_embed_batch: int = Field(alias="INDEX_EMBED_BATCH", default=256)
+    # 인덱싱 파이프라인: 동시에 임베딩 요청할 배치 수, 단계 사이 큐에 담아 둘 배치 수(backpressure)
+    index_embed_concurrency: int = Field(alias="INDEX_EMBED_CONCURRENCY", default=2)
+    index_queue_batches: int = Field(alias="INDEX_QUEUE_BATCHES", default=4)
+    # 인덱싱 임베딩 요청: 요청 하나의 최대 텍스트 수/글자 수, 동시 요청 수, 요청 제한 시간(초),
+    # 실패한 요청 재시도 횟수와 지수 백오프 시작/최대 지연(초, 무작위 jitter 적용)
+    index_embed_request_items: int = Field(alias="INDEX_EMBED_REQUEST_ITEMS", default=64)
+    index_embed_request_chars: int = Field(alias="INDEX_EMBED_REQUEST_CHARS", default=128_000)
+    index_embed_request_concurrency: int = Field(alias="INDEX_EMBED_REQUEST_CONCURRENCY", default=2)
+    index_embed_timeout: float = Field(alias="INDEX_EMBED_TIMEOUT", default=60.0)
+    index_embed_retries: int = Field(alias="INDEX_EMBED_RETRIES", default=4)
+    index_embed_backoff_seconds: float = Field(alias="INDEX_EMBED_BACKOFF_SECONDS", default=0.5)
+    index_embed_backoff_max_seconds: float = Field(alias="INDEX_EMBED_BACKOFF_MAX_SECONDS", default=15.0)
+    # 인덱싱 태스크 재시도 횟수와 백오프 시작/최대 지연(초), Redis 브로커 재배달 대기(초, 가장 긴 작업보다 길게)
+    index_task_max_retries: int = Field(alias="INDEX_TASK_MAX_RETRIES", default=3)
+    index_task_retry_backoff_seconds: float = Field(alias="INDEX_TASK_RETRY_BACKOFF_SECONDS", default=30.0)
+    index_task_retry_backoff_max_seconds: float = Field(alias="INDEX_TASK_RETRY_BACKOFF_MAX_SECONDS", default=600.0)
+    celery_visibility_timeout: int = Field(alias="CELERY_VISIBILITY_TIMEOUT", default=6 * 60 * 60)
+    # 파이프라인 재인덱싱: 동시에 인덱싱할 파일 수(줄 수), 워커 하나당 파일 태스크 속도 제한(Celery 형식, 예: 60/m)
+    reindex_concurrency: int = Field(alias="REINDEX_CONCURRENCY", default=4)
+    reindex_rate_limit: str | None = Field(alias="REINDEX_RATE_LIMIT", default="60/m")
+    # 진행이 이 시간(초) 동안 없는 running 재인덱싱은 멈춘 것으로 보고 다음 요청 때 failed 로 정리합니다.
+    # 파일 하나의 가장 긴 인덱싱(CELERY_VISIBILITY_TIMEOUT)보다 길어야 합니다.
+    reindex_stale_seconds: int = Field(alias="REINDEX_STALE_SECONDS", default=12 * 60 * 60)
+    # 병렬 전처리: 프로세스 풀 크기(미지정 시 CPU 수, 1 이면 사용 안 함), 풀을 쓰기 시작하는 문서 크기(바이트)
+    preprocess_workers: int | None = Field(alias="PREPROCESS_WORKERS", default=None)
+    preprocess_parallel_min_bytes: int = Field(alias="PREPROCESS_PARALLEL_MIN_BYTES", default=8 * 1024 * 1024)
+    # 청킹: tokens(토큰 수 + 문장/문단 경계) 또는 words(기존 800단어 창), 토큰 청크 크기/겹침,
+    # 토크나이저(tokenizer.json 경로 또는 허브 이름, 비우면 추정기; tokenizers 패키지 필요)
+    chunker: str = Field(alias="CHUNKER", default="tokens")
+    chunk_tokens: int = Field(alias="CHUNK_TOKENS", default=480)
+    chunk_overlap_tokens: int = Field(alias="CHUNK_OVERLAP_TOKENS", default=64)
+    chunk_tokenizer: str = Field(alias="CHUNK_TOKENIZER", default="")
+    # 청크 해시 기반 임베딩 캐시: 사용 여부, 미사용 보존 기간(일), 최대 항목 수(LRU)
+    embed_cache_enabled: bool = Field(alias="EMBED_CACHE_ENABLED", default=True)
+    embed_cache_ttl_days: int = Field(alias="EMBED_CACHE_TTL_DAYS", default=30)
+    embed_cache_max_rows: int = Field(alias="EMBED_CACHE_MAX_ROWS", default=1_000_000)
+    # 질의 임베딩 캐시: 프로세스 내 LRU 항목 수, Redis 계층 TTL(초, 0이면 Redis 미사용)
+    query_cache_size: int = Field(alias="QUERY_CACHE_SIZE", default=1024)
+    query_cache_redis_ttl: int = Field(alias="QUERY_CACHE_REDIS_TTL", default=86400)
 
     model_config = {"populate_by_name": True}
 
@@ -40,6 +40,8 @@ class UploadCommitRequest(BaseModel):
     bucket: str
     key: str
     pipeline_id: Optional[int] = None
+    # 같은 문서의 이전 버전 파일 id. 주면 바뀐 청크만 다시 임베딩합니다(증분 재인덱싱).
+    replaces_file_id: Optional[int] = None
 
 
 class UploadCommitResponse(BaseModel):
@@ -61,6 +63,17 @@ class PipelineResponse(BaseModel):
     created_at: dt.datetime
 
 
+class ReindexStatusResponse(BaseModel):
+    run_id: int
+    pipeline_id: int
+    status: Literal["running", "done", "failed"]
+    total: int | None = None
+    done: int = 0
+    error: str | None = None
+    created_at: dt.datetime
+    finished_at: dt.datetime | None = None
+
+
 class BlockCreateRequest(BaseModel):
     type_code: str
     name: str
@@ -78,6 +91,8 @@ class QueryRequest(BaseModel):
     threshold: float = 0.4
     dedup: bool = True
     with_sources: bool = True
+    # true 이면 답변 토큰을 Server-Sent Events(text/event-stream)로 스트리밍
+    stream: bool = False
 
 
 class QuerySource(BaseModel):
@@ -15,7 +15,7 @@ router = APIRouter(tags=["admin"])
 BLOCK_TYPE_SEED = [
     ("preprocess", "전처리", "preprocess", {"steps": ["pre_normalize", "pre_lang_detect", "pre_table_code_preserve", "pre_pii_mask", "pre_regex_filter"]}),
     ("embedding", "임베딩", "embedding", {"model": "gte-small"}),
-    ("search", "검색", "search", {"method": "search_knn"}),
+    ("search", "검색", "search", {"method": "search_knn", "methods": ["search_knn", "search_hybrid"]}),
     ("llm", "LLM", "generation", {"model": "llama3"}),
     ("guardrail", "가드레일", "safety", {"rules": ["gr_pii_guard", "gr_moderation", "gr_citation_check"]}),
     ("deploy", "배포", "delivery", {"types": ["deploy_link", "deploy_widget", "deploy_api"]}),
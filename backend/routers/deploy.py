@@ -4,16 +4,20 @@ from __future__ import annotations
 import datetime as dt
 import secrets
 
-import httpx
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from backend.deps.auth import Role, UserContext, get_current_user, require_role
 from backend.deps.db import get_session
+from backend.deps.embedding import embed_one
 from backend.deps.rate_limit import enforce_rate_limit
 from backend.deps.settings import settings
 from backend.models.schema import DeployRequest, DeployResponse, QueryRequest, QueryResponse
+from backend.services.answer_stream import SSE_HEADERS, SSE_MEDIA_TYPE, stream_answer
+from backend.services.context_pack import build_prompt
 from backend.services.guardrails import run_guardrails
+from backend.services.query_cache import query_embedding_cache
 from backend.services.search import search_similar_chunks
 from backend.deps.ollama import call_ollama
 
@@ -21,14 +25,10 @@ router = APIRouter(tags=["deploy"])
 
 
 async def _embed(text: str) -> list[float]:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(f"{settings.embedding_svc}/embed", json={"texts": [text]})
-        resp.raise_for_status()
-        data = resp.json()
-    vectors = data.get("vectors", [])
-    if not vectors:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="embedding failed")
-    return vectors[0]
+    try:
+        return await query_embedding_cache.get_or_embed(text, embed_one)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="embedding failed") from exc
 
 
 @router.post("/pipelines/{pipeline_id}/deploy", response_model=DeployResponse)
@@ -76,7 +76,7 @@ async def query_with_token(
     payload: QueryRequest,
     session=Depends(get_session),
 ):
-    """배포 토큰을 이용한 공개 질의."""
+    """배포 토큰을 이용한 공개 질의. stream=true 이면 Server-Sent Events 로 응답합니다."""
 
     await enforce_rate_limit(f"deploy:{token}", limit=30, window=60)
     deployment_row = await session.execute(
@@ -98,12 +98,40 @@ async def query_with_token(
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="token expired")
 
     vector = await _embed(payload.q)
-    sources = await search_similar_chunks(session, deployment.pipeline_id, vector, payload.top_k, payload.threshold)
-    context = "\n\n".join(f"[{s.chunk_id}] {s.text}" for s in sources)
+    sources = await search_similar_chunks(
+        session,
+        deployment.pipeline_id,
+        vector,
+        payload.top_k,
+        payload.threshold,
+        query_text=payload.q,
+        dedup=payload.dedup,
+    )
     system_prompt = "배포 모드: 근거에 없는 내용은 답하지 말 것"
-    user_prompt = f"질문: {payload.q}\n\n근거:\n{context}"
+    # 모델 컨텍스트 창 안에서 순위 높은 근거부터 채웁니다(넘치면 문장 단위로 자르거나 제외).
+    user_prompt, packed = build_prompt(payload.q, system_prompt, sources)
+    sources = packed.sources
+
+    if payload.stream:
+        async def _on_complete(response: QueryResponse) -> None:
+            # 스트리밍 응답은 요청 스코프가 끝난 뒤 완료되므로 별도 세션으로 기록합니다.
+            async with get_session() as log_session:
+                await _record_run(log_session, deployment.pipeline_id, payload, response)
+
+        return StreamingResponse(
+            stream_answer(user_prompt, system_prompt, sources, _on_complete, packed.warnings),
+            media_type=SSE_MEDIA_TYPE,
+            headers=SSE_HEADERS,
+        )
+
     answer = await call_ollama(user_prompt, system=system_prompt)
     masked, warnings = run_guardrails(answer, [s.text for s in sources])
+    response = QueryResponse(answer=masked, sources=list(sources), warnings=[*packed.warnings, *warnings])
+    await _record_run(session, deployment.pipeline_id, payload, response)
+    return response
+
+
+async def _record_run(session, pipeline_id: int, payload: QueryRequest, response: QueryResponse) -> None:
     await session.execute(
         sa.text(
             """
@@ -112,10 +140,9 @@ async def query_with_token(
             """
         ),
         {
-            "pipeline_id": deployment.pipeline_id,
+            "pipeline_id": pipeline_id,
             "input": payload.model_dump_json(),
-            "output": QueryResponse(answer=masked, sources=list(sources), warnings=warnings).model_dump_json(),
+            "output": response.model_dump_json(),
         },
     )
     await session.commit()
-    return QueryResponse(answer=masked, sources=list(sources), warnings=warnings)
@@ -5,15 +5,20 @@
 from __future__ import annotations
 
 import datetime as dt
+import logging
 
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from backend.deps.auth import Role, UserContext, get_current_user, require_role
 from backend.deps.db import get_session
-from backend.models.schema import PipelineCreateRequest, PipelineResponse
+from backend.deps.settings import settings
+from backend.models.schema import PipelineCreateRequest, PipelineResponse, ReindexStatusResponse
+from backend.services import reindex
+from backend.workers.tasks_reindex import enqueue_reindex_pipeline
 
 router = APIRouter(tags=["pipelines"])
+LOGGER = logging.getLogger(__name__)
 
 
 async def _log_audit(session, pipeline_id: int, user_id: str, action: str, detail: dict | None = None) -> None:
@@ -132,3 +137,89 @@ async def publish_pipeline(
     await _log_audit(session, pipeline_id, user.user_id, "pipeline_published", {"version": row_data["version"]})
     await session.commit()
     return PipelineResponse(**dict(row_data))
+
+
+async def _require_owned(session, pipeline_id: int, user: UserContext) -> None:
+    row = await session.execute(
+        sa.text("SELECT 1 FROM pipelines WHERE id = :pid AND owner_id = :owner"),
+        {"pid": pipeline_id, "owner": user.user_id},
+    )
+    if row.fetchone() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="pipeline not found")
+
+
+def _reindex_status(run: reindex.ReindexRun) -> ReindexStatusResponse:
+    return ReindexStatusResponse(
+        run_id=run.id,
+        pipeline_id=run.pipeline_id,
+        status=run.status,
+        total=run.total,
+        done=run.done,
+        error=run.error,
+        created_at=run.created_at,
+        finished_at=run.finished_at,
+    )
+
+
+@router.post("/{pipeline_id}/reindex", response_model=ReindexStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_reindex(
+    pipeline_id: int,
+    user: UserContext = Depends(require_role(Role.OWNER, Role.EDITOR)),
+    session=Depends(get_session),
+):
+    """파이프라인의 모든 파일 재인덱싱을 시작합니다. 끝날 때까지 검색은 기존 인덱스를 씁니다."""
+
+    await _require_owned(session, pipeline_id, user)
+    stale_id = await reindex.expire_stale_run(session, pipeline_id, settings.reindex_stale_seconds)
+    if stale_id is not None:
+        LOGGER.warning("멈춘 재인덱싱 실행 정리", extra={"pipeline_id": pipeline_id, "run_id": stale_id})
+    run_id = await reindex.create_run(session, pipeline_id)
+    if run_id is None:
+        await session.commit()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="reindex already running")
+    await _log_audit(session, pipeline_id, user.user_id, "pipeline_reindex", {"run_id": run_id})
+    await session.commit()
+    try:
+        enqueue_reindex_pipeline(pipeline_id, run_id)
+    except Exception as exc:
+        # 큐에 넣지 못한 실행이 running 으로 남아 다음 요청을 막지 않도록 바로 실패로 닫습니다.
+        LOGGER.exception("재인덱싱 큐잉 실패", extra={"pipeline_id": pipeline_id, "run_id": run_id})
+        await reindex.discard_run(session, run_id, "enqueue failed")
+        await session.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="reindex queue unavailable"
+        ) from exc
+    return _reindex_status(await reindex.get_run(session, run_id))
+
+
+@router.post("/{pipeline_id}/reindex/cancel", response_model=ReindexStatusResponse)
+async def cancel_reindex(
+    pipeline_id: int,
+    user: UserContext = Depends(require_role(Role.OWNER, Role.EDITOR)),
+    session=Depends(get_session),
+):
+    """진행 중인 재인덱싱을 취소합니다. 대기 문서를 지우고 기존 인덱스를 그대로 씁니다."""
+
+    await _require_owned(session, pipeline_id, user)
+    run_id = await reindex.running_run(session, pipeline_id)
+    if run_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="no running reindex")
+    await reindex.discard_run(session, run_id, "cancelled")
+    await _log_audit(session, pipeline_id, user.user_id, "pipeline_reindex_cancel", {"run_id": run_id})
+    await session.commit()
+    return _reindex_status(await reindex.get_run(session, run_id))
+
+
+@router.get("/{pipeline_id}/reindex", response_model=ReindexStatusResponse)
+async def get_reindex_status(
+    pipeline_id: int,
+    user: UserContext = Depends(get_current_user),
+    session=Depends(get_session),
+):
+    """가장 최근 재인덱싱 실행의 진행 상황(total/done/status)."""
+
+    await _require_owned(session, pipeline_id, user)
+    run = await reindex.latest_run(session, pipeline_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="no reindex run")
+    return _reindex_status(run)
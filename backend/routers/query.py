@@ -1,18 +1,19 @@
 """검색 및 생성 API."""
 from __future__ import annotations
 
-import hashlib
-
-import httpx
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from backend.deps.auth import UserContext, get_current_user
 from backend.deps.db import get_session
+from backend.deps.embedding import embed_one
 from backend.deps.rate_limit import enforce_rate_limit
-from backend.deps.settings import settings
 from backend.models.schema import QueryRequest, QueryResponse
+from backend.services.answer_stream import SSE_HEADERS, SSE_MEDIA_TYPE, stream_answer
+from backend.services.context_pack import build_prompt
 from backend.services.guardrails import run_guardrails
+from backend.services.query_cache import query_embedding_cache
 from backend.services.search import search_similar_chunks
 from backend.deps.ollama import call_ollama
 
@@ -20,14 +21,10 @@ router = APIRouter(tags=["query"])
 
 
 async def _embed_query(text: str) -> list[float]:
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(f"{settings.embedding_svc}/embed", json={"texts": [text]})
-        resp.raise_for_status()
-        data = resp.json()
-    vectors = data.get("vectors", [])
-    if not vectors:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="embedding failed")
-    return vectors[0]
+    try:
+        return await query_embedding_cache.get_or_embed(text, embed_one)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="embedding failed") from exc
 
 
 @router.post("/{pipeline_id}/query", response_model=QueryResponse)
@@ -40,6 +37,7 @@ async def query_pipeline(
     """파이프라인 질의.
 
     top-k, threshold, dedup 옵션이 그대로 반영됩니다.
+    stream=true 이면 답변 토큰을 Server-Sent Events 로 흘려보냅니다.
     """
 
     await enforce_rate_limit(f"pipeline-query:{pipeline_id}:{user.user_id}")
@@ -51,26 +49,42 @@ async def query_pipeline(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="pipeline not found")
 
     embedding = await _embed_query(payload.q)
-    sources = await search_similar_chunks(session, pipeline_id, embedding, payload.top_k, payload.threshold)
-
-    if payload.dedup:
-        deduped = []
-        seen = set()
-        for src in sources:
-            digest = hashlib.sha1(src.text.encode("utf-8")).hexdigest()
-            if digest in seen:
-                continue
-            seen.add(digest)
-            deduped.append(src)
-        sources = deduped
-
-    context = "\n\n".join(f"[{s.chunk_id}] {s.text}" for s in sources)
+    sources = await search_similar_chunks(
+        session,
+        pipeline_id,
+        embedding,
+        payload.top_k,
+        payload.threshold,
+        query_text=payload.q,
+        dedup=payload.dedup,
+    )
+
     system_prompt = "당신은 기업용 문서비서입니다. 주어진 근거만으로 답변하세요."
-    user_prompt = f"질문: {payload.q}\n\n근거:\n{context}"
+    # 모델 컨텍스트 창 안에서 순위 높은 근거부터 채웁니다(넘치면 문장 단위로 자르거나 제외).
+    user_prompt, packed = build_prompt(payload.q, system_prompt, sources)
+    sources = packed.sources
+
+    if payload.stream:
+        async def _on_complete(response: QueryResponse) -> None:
+            # 스트리밍 응답은 요청 스코프가 끝난 뒤 완료되므로 별도 세션으로 기록합니다.
+            async with get_session() as log_session:
+                await _record_run(log_session, pipeline_id, user.user_id, payload, response)
+
+        return StreamingResponse(
+            stream_answer(user_prompt, system_prompt, sources, _on_complete, packed.warnings),
+            media_type=SSE_MEDIA_TYPE,
+            headers=SSE_HEADERS,
+        )
+
     answer = await call_ollama(user_prompt, system=system_prompt)
 
     masked_answer, warnings = run_guardrails(answer, [s.text for s in sources])
+    response = QueryResponse(answer=masked_answer, sources=list(sources), warnings=[*packed.warnings, *warnings])
+    await _record_run(session, pipeline_id, user.user_id, payload, response)
+    return response
+
 
+async def _record_run(session, pipeline_id: int, user_id: str, payload: QueryRequest, response: QueryResponse) -> None:
     await session.execute(
         sa.text(
             """
@@ -80,11 +94,9 @@ async def query_pipeline(
         ),
         {
             "pipeline_id": pipeline_id,
-            "user_id": user.user_id,
+            "user_id": user_id,
             "input": payload.model_dump_json(),
-            "output": QueryResponse(answer=masked_answer, sources=list(sources), warnings=warnings).model_dump_json(),
+            "output": response.model_dump_json(),
         },
     )
     await session.commit()
-
-    return QueryResponse(answer=masked_answer, sources=list(sources), warnings=warnings)
@@ -9,7 +9,7 @@ import logging
 import uuid
 
 import sqlalchemy as sa
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from minio import PostPolicy
 
 from backend.deps.auth import UserContext, get_current_user
@@ -88,6 +88,13 @@ async def commit_upload(
     """업로드가 완료되었음을 선언하고 인덱싱을 큐잉."""
 
     await enforce_rate_limit(f"upload-commit:{user.user_id}")
+    if payload.replaces_file_id is not None:
+        owned = await session.execute(
+            sa.text("SELECT 1 FROM files WHERE id = :rid AND owner_id = :owner"),
+            {"rid": payload.replaces_file_id, "owner": user.user_id},
+        )
+        if owned.fetchone() is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="replaced file not found")
     now = dt.datetime.utcnow()
     insert_result = await session.execute(
         sa.text(
@@ -112,6 +119,9 @@ async def commit_upload(
     file_id = insert_result.scalar_one()
     await session.commit()
 
-    enqueue_index_file(file_id=file_id, pipeline_id=payload.pipeline_id)
-    LOGGER.info("인덱싱 큐잉", extra={"file_id": file_id, "pipeline_id": payload.pipeline_id})
+    enqueue_index_file(file_id=file_id, pipeline_id=payload.pipeline_id, replaces_file_id=payload.replaces_file_id)
+    LOGGER.info(
+        "인덱싱 큐잉",
+        extra={"file_id": file_id, "pipeline_id": payload.pipeline_id, "replaces_file_id": payload.replaces_file_id},
+    )
     return UploadCommitResponse(file_id=file_id, status="pending")
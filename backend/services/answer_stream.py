@@ -0,0 +1,65 @@
+"""답변 토큰 스트리밍(Server-Sent Events).
+
+비전공자 팁: 긴 답변을 끝까지 기다리지 않고 생성되는 대로 조금씩 보여주면
+첫 글자가 보이기까지의 시간이 크게 줄어듭니다. 개인정보 마스킹은 스트리밍 중에도 적용됩니다.
+
+이벤트 형식:
+    event: token  / data: {"text": "..."}                       (마스킹된 답변 조각)
+    event: done   / data: {"answer": ..., "sources": [...], "warnings": [...]}
+    event: error  / data: {"detail": "..."}
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Sequence
+
+from backend.deps.ollama import stream_ollama
+from backend.models.schema import QueryResponse, QuerySource
+from backend.services.guardrails import StreamingPiiMasker, run_guardrails
+
+LOGGER = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_answer(
+    prompt: str,
+    system: str,
+    sources: Sequence[QuerySource],
+    on_complete: Callable[[QueryResponse], Awaitable[None]],
+    extra_warnings: Sequence[str] = (),
+) -> AsyncIterator[str]:
+    """Ollama 토큰을 마스킹하며 전달하고, 끝나면 출처/경고가 담긴 done 이벤트를 보냅니다.
+
+    extra_warnings(예: 컨텍스트 예산 초과)는 가드레일 경고 앞에 붙습니다.
+    """
+
+    masker = StreamingPiiMasker()
+    parts: list[str] = []
+    try:
+        async for delta in stream_ollama(prompt, system=system):
+            parts.append(delta)
+            ready = masker.feed(delta)
+            if ready:
+                yield sse_event("token", {"text": ready})
+        tail = masker.flush()
+        if tail:
+            yield sse_event("token", {"text": tail})
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.exception("답변 스트리밍 실패")
+        yield sse_event("error", {"detail": "generation failed"})
+        return
+
+    masked, warnings = run_guardrails("".join(parts), [s.text for s in sources])
+    response = QueryResponse(answer=masked, sources=list(sources), warnings=[*extra_warnings, *warnings])
+    await on_complete(response)
+    yield sse_event("done", response.model_dump())
+
+
+__all__ = ["SSE_HEADERS", "SSE_MEDIA_TYPE", "sse_event", "stream_answer"]
@@ -1,10 +1,21 @@
 """청킹 서비스.
 
 비전공자 팁: 긴 문서를 잘게 나눠서 검색 정확도를 높이는 과정입니다.
+임베딩 모델은 단어가 아니라 토큰 수로 입력 길이를 재므로, 인덱싱은 토큰 수 기준으로
+문장/문단 경계에 맞춰 자르는 `OffsetChunker` 를 씁니다(단어 창 방식은 CHUNKER=words).
 """
 from __future__ import annotations
 
-from typing import Iterable, List
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, List, Protocol
+
+import numpy as np
+
+LOGGER = logging.getLogger(__name__)
 
 
 def sliding_window_chunks(text: str, chunk_size: int = 800, overlap: int = 120) -> List[str]:
@@ -26,6 +37,299 @@ def sliding_window_chunks(text: str, chunk_size: int = 800, overlap: int = 120)
     return chunks
 
 
+def iter_sliding_window_chunks(words: Iterable[str], chunk_size: int = 800, overlap: int = 120) -> Iterator[str]:
+    """단어 스트림을 받아 `sliding_window_chunks` 와 동일한 청크를 순차 생성합니다.
+
+    창 하나 분량(chunk_size 단어)만 메모리에 유지하므로 문서 크기와 무관하게
+    메모리 사용량이 일정합니다.
+    """
+
+    step = max(chunk_size - overlap, 1)
+    window: deque[str] = deque()
+    skip = 0  # 다음 창 시작 전에 버려야 할 단어 수(step > chunk_size 인 경우)
+    for word in words:
+        if skip:
+            skip -= 1
+            continue
+        window.append(word)
+        if len(window) == chunk_size:
+            yield " ".join(window)
+            drop = min(step, len(window))
+            for _ in range(drop):
+                window.popleft()
+            skip = step - drop
+    while window:
+        yield " ".join(list(window)[:chunk_size])
+        for _ in range(min(step, len(window))):
+            window.popleft()
+
+
+# ---------------------------------------------------------------------------
+# 오프셋 기반 토큰 청커
+#
+# 원문 문자열은 그대로 두고 청크를 (start, end) 문자 위치로만 계산합니다. 본문 문자열은
+# Chunk.text 를 읽는 순간(임베딩/저장 직전)에만 잘라 만들므로 창을 밀 때마다 단어를 다시
+# 이어 붙이는 복사가 없습니다. 크기는 단어 수 대신 모델 토큰 수로 재고, 끝은 문단 → 문장 → 줄
+# 경계 순으로 맞춥니다. 저장된 (start, end) 는 전처리된 문서 본문 안의 위치입니다.
+# ---------------------------------------------------------------------------
+
+# 추정 토크나이저가 영문/숫자 덩어리를 나누는 길이(글자). context_pack 추정치(3.5자)와 비슷하게 맞춥니다.
+_WORD_PIECE_CHARS = 4
+# 한글 자모/음절, 가나, CJK 한자 코드 포인트 범위: 대략 1글자 1토큰
+_WIDE_RANGES = ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7A3), (0x3040, 0x30FF), (0x4E00, 0x9FFF))
+_SPACE_CODEPOINTS = (
+    9, 10, 11, 12, 13, 28, 29, 30, 31, 32, 0x85, 0xA0, 0x1680, *range(0x2000, 0x200B), 0x2028, 0x2029, 0x202F,
+    0x205F, 0x3000,
+)
+# 문장 끝 부호와 그 바로 뒤에 붙을 수 있는 닫는 따옴표/괄호
+_SENTENCE_END_CHARS = ".!?。…"
+_CLOSER_CHARS = "\"')]”’"
+# 글자 종류 표(BMP 코드 포인트 → 종류). 배열 한 번 조회로 문서 전체 글자를 분류합니다.
+# 공백과 영문/숫자(_WORD)를 뺀 나머지 종류는 모두 한 글자 한 토큰입니다.
+_SPACE, _WORD, _WIDE, _PUNCT, _TERMINAL, _CLOSER = range(6)
+
+
+def _class_table() -> np.ndarray:
+    table = np.full(0x10000, _WORD, dtype=np.uint8)
+    for low, high in _WIDE_RANGES:
+        table[low : high + 1] = _WIDE
+    table[[code for code in range(33, 128) if not chr(code).isalnum()]] = _PUNCT
+    table[list(_SPACE_CODEPOINTS)] = _SPACE
+    table[[ord(char) for char in _SENTENCE_END_CHARS]] = _TERMINAL
+    table[[ord(char) for char in _CLOSER_CHARS]] = _CLOSER
+    return table
+
+
+_CLASS_TABLE = _class_table()
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def _char_classes(codes: np.ndarray) -> np.ndarray:
+    # BMP 밖 글자(이모지 등)는 표의 마지막 칸(_WORD)으로 봅니다.
+    return _CLASS_TABLE[np.minimum(codes, 0xFFFF)]
+
+
+def _boundaries(text: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """청크 끝 후보 위치(문단, 문장, 줄 순서, 각각 오름차순)를 한 번에 계산합니다.
+
+    정규식 대신 코드 포인트 배열 연산으로 찾습니다(50MB 문서에서 수 배 빠름).
+    문단/줄 끝은 줄바꿈 위치이고, 문장 끝은 뒤에 공백이 오는 문장 부호(닫는 따옴표 포함) 바로 뒤입니다.
+    """
+
+    codes = _codepoints(text)
+    classes = _char_classes(codes)
+    space = classes == _SPACE
+    lines = np.flatnonzero(codes == 10)
+    # 다음 줄바꿈까지 공백만 있으면(빈 줄) 문단 끝
+    if lines.size > 1:
+        filled = np.logical_or.reduceat(~space, lines)[:-1]
+        paragraphs = lines[:-1][~filled]
+    else:
+        paragraphs = lines[:0]
+    followed_by_space = np.append(space[1:], True)
+    terminal = classes == _TERMINAL
+    closer = classes == _CLOSER
+    closer[1:] &= terminal[:-1]
+    closer[:1] = False
+    sentences = np.flatnonzero((terminal | closer) & followed_by_space) + 1
+    return paragraphs.astype(np.int64), sentences.astype(np.int64), lines.astype(np.int64)
+
+
+class TokenCounter(Protocol):
+    """텍스트의 토큰 시작 위치(문자 오프셋, 오름차순)를 돌려주는 토크나이저."""
+
+    def token_starts(self, text: str) -> np.ndarray: ...
+
+
+class EstimatedTokenCounter:
+    """토크나이저 없이 토큰 경계를 추정합니다(NumPy 벡터 연산, 과대 추정 쪽).
+
+    한글/한자 1글자, 기호 1글자, 영문·숫자 덩어리 4글자마다 토큰 하나로 셉니다.
+    """
+
+    def token_starts(self, text: str) -> np.ndarray:
+        classes = _char_classes(_codepoints(text))
+        starts = classes > _WORD
+        word = classes == _WORD
+        # 영문/숫자 덩어리마다 시작 위치부터 4글자 간격으로 토큰 시작을 찍습니다(덩어리 수만큼만 계산).
+        edges = np.diff(word.view(np.int8), prepend=0, append=0)
+        run_starts = np.flatnonzero(edges == 1)
+        pieces = -(-(np.flatnonzero(edges == -1) - run_starts) // _WORD_PIECE_CHARS)
+        first_piece = np.repeat(np.cumsum(pieces) - pieces, pieces)
+        starts[np.repeat(run_starts, pieces) + (np.arange(first_piece.size) - first_piece) * _WORD_PIECE_CHARS] = True
+        return np.flatnonzero(starts).astype(np.int64)
+
+
+class HuggingFaceTokenCounter:
+    """`tokenizers` 패키지의 실제 토크나이저(tokenizer.json 경로 또는 허브 이름)."""
+
+    def __init__(self, name: str) -> None:
+        from tokenizers import Tokenizer  # pylint: disable=import-outside-toplevel
+
+        self._tokenizer = Tokenizer.from_file(name) if Path(name).is_file() else Tokenizer.from_pretrained(name)
+        self._tokenizer.no_truncation()
+
+    def token_starts(self, text: str) -> np.ndarray:
+        encoding = self._tokenizer.encode(text, add_special_tokens=False)
+        starts = np.fromiter((start for start, end in encoding.offsets if end > start), dtype=np.int64)
+        # 바이트 단위 토크나이저는 한 글자에 토큰 여러 개가 붙으므로 시작 위치를 한 번씩만 씁니다.
+        return np.unique(starts)
+
+
+@lru_cache(maxsize=4)
+def get_token_counter(name: str = "") -> TokenCounter:
+    """이름별 토크나이저를 한 번만 불러 재사용합니다. 이름이 없거나 불러올 수 없으면 추정기를 씁니다."""
+
+    if name:
+        try:
+            return HuggingFaceTokenCounter(name)
+        except ImportError:
+            LOGGER.warning("tokenizers 패키지가 없어 토큰 수 추정기를 사용합니다", extra={"tokenizer": name})
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("토크나이저를 불러오지 못해 토큰 수 추정기를 사용합니다", extra={"tokenizer": name})
+    return EstimatedTokenCounter()
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """문서 본문의 [start, end) 구간. 본문 문자열은 `text` 를 읽을 때 잘라 만듭니다."""
+
+    pos: int
+    start: int
+    end: int
+    source: str = field(repr=False, compare=False)
+    # source[0] 의 문서 내 위치(스트리밍 시 앞부분을 버린 버퍼를 가리킬 때)
+    base: int = field(default=0, repr=False, compare=False)
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start - self.base : self.end - self.base]
+
+
+def _last_within(boundaries: np.ndarray, low: int, high: int) -> int | None:
+    """low < b <= high 인 마지막 경계."""
+
+    idx = int(np.searchsorted(boundaries, high, side="right")) - 1
+    if idx >= 0 and boundaries[idx] > low:
+        return int(boundaries[idx])
+    return None
+
+
+def _first_within(boundaries: np.ndarray, low: int, high: int) -> int | None:
+    """low <= b < high 인 첫 경계."""
+
+    idx = int(np.searchsorted(boundaries, low, side="left"))
+    if idx < boundaries.size and boundaries[idx] < high:
+        return int(boundaries[idx])
+    return None
+
+
+def _rstrip_at(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+class OffsetChunker:
+    """토큰 수 기준, 문단/문장 경계에 맞춘 오프셋 청커.
+
+    청크는 최대 chunk_tokens 토큰이며, 끝은 창의 뒤쪽(min_fill 이후)에서 문단 → 문장 → 줄 경계 순으로
+    찾고 없으면 토큰 경계에서 자릅니다. 다음 청크는 최대 overlap_tokens 만큼 앞에서 시작하되,
+    문장 중간에서 시작하지 않도록 그 구간의 첫 문장 시작으로 당깁니다.
+    """
+
+    def __init__(
+        self,
+        chunk_tokens: int = 480,
+        overlap_tokens: int = 64,
+        counter: TokenCounter | None = None,
+        min_fill: float = 0.5,
+    ) -> None:
+        self.chunk_tokens = max(chunk_tokens, 1)
+        self.overlap_tokens = min(max(overlap_tokens, 0), self.chunk_tokens - 1)
+        self.counter = counter or EstimatedTokenCounter()
+        self.min_tokens = min(max(int(self.chunk_tokens * min_fill), 1), self.chunk_tokens)
+
+    def _plan(self, text: str, begin: int, final: bool) -> tuple[list[tuple[int, int]], int]:
+        """text[begin:] 을 (start, end) 구간으로 나눕니다. 끝까지 못 나눈 경우 다음 시작 위치도 돌려줍니다.
+
+        final 이 아니면 창 하나를 꽉 채울 토큰이 더 있을 때만 청크를 확정합니다(스트리밍 버퍼용).
+        """
+
+        starts = self.counter.token_starts(text)
+        n = starts.size
+        i = int(np.searchsorted(starts, begin))
+        if i >= n:
+            return [], len(text)
+        levels = _boundaries(text)
+        spans: list[tuple[int, int]] = []
+        while i < n:
+            j = i + self.chunk_tokens
+            start = int(starts[i])
+            if j >= n:
+                if not final:
+                    break
+                spans.append((start, _rstrip_at(text, start, len(text))))
+                return spans, len(text)
+            low, high = int(starts[i + self.min_tokens]) - 1, int(starts[j])
+            boundary = next((b for b in (_last_within(level, low, high) for level in levels) if b is not None), None)
+            end = _rstrip_at(text, start, high if boundary is None else boundary)
+            spans.append((start, end))
+            k = int(np.searchsorted(starts, end))
+            following = max(k - self.overlap_tokens, i + 1)
+            if following < k:
+                # 겹침 구간은 온전한 문장만 담습니다. 그 안에 문장 시작이 없으면 겹치지 않고
+                # 다음 문장부터 시작합니다(경계 없이 토큰에서 자른 경우에만 토큰 단위로 겹침).
+                overlap_start = int(starts[following])
+                snapped = [b for b in (_first_within(level, overlap_start, end) for level in levels) if b is not None]
+                if snapped:
+                    following = max(int(np.searchsorted(starts, min(snapped))), i + 1)
+                elif boundary is not None:
+                    following = k
+            i = following
+        return spans, int(starts[i]) if i < n else len(text)
+
+    def chunks(self, text: str) -> Iterator[Chunk]:
+        """문서 전체 문자열에서 청크 뷰를 만듭니다."""
+
+        spans, _ = self._plan(text, 0, final=True)
+        for pos, (start, end) in enumerate(spans):
+            yield Chunk(pos, start, end, text)
+
+    def iter_chunks(self, segments: Iterable[str]) -> Iterator[Chunk]:
+        """텍스트 구간 스트림에서 `chunks("".join(segments))` 와 같은 청크를 순차 생성합니다.
+
+        확정된 청크 앞부분은 버퍼에서 버리므로 메모리에는 청크 몇 개 분량만 남습니다.
+        다음 청크가 시작하는 단어 전체를 버퍼에 남겨 토큰 경계가 한 번에 처리한 것과 같게 합니다.
+        """
+
+        buffer = ""
+        base = 0  # buffer[0] 의 문서 내 위치
+        begin = 0  # 다음 청크 시작(buffer 기준)
+        pos = 0
+        # 버퍼가 이만큼 쌓일 때마다 나눠 봅니다. 창 하나가 안 차면 기준을 두 배로 늘려 재계산을 줄입니다.
+        plan_at = self.chunk_tokens * _WORD_PIECE_CHARS
+        for segment in segments:
+            buffer += segment
+            if len(buffer) < plan_at:
+                continue
+            spans, begin = self._plan(buffer, begin, final=False)
+            for start, end in spans:
+                yield Chunk(pos, base + start, base + end, buffer, base)
+                pos += 1
+            keep = begin
+            while keep > 0 and not buffer[keep - 1].isspace():
+                keep -= 1
+            buffer, base, begin = buffer[keep:], base + keep, begin - keep
+            plan_at = len(buffer) + self.chunk_tokens * _WORD_PIECE_CHARS if spans else len(buffer) * 2
+        spans, _ = self._plan(buffer, begin, final=True)
+        for start, end in spans:
+            yield Chunk(pos, base + start, base + end, buffer, base)
+            pos += 1
+
+
 def chunk_text(text: str, chunk_size: int = 800, overlap: int = 120) -> Iterable[tuple[int, str]]:
     """청킹 후 위치(index)와 함께 반환."""
 
@@ -33,4 +337,13 @@ def chunk_text(text: str, chunk_size: int = 800, overlap: int = 120) -> Iterable
         yield idx, chunk
 
 
-__all__ = ["chunk_text"]
+__all__ = [
+    "Chunk",
+    "EstimatedTokenCounter",
+    "HuggingFaceTokenCounter",
+    "OffsetChunker",
+    "TokenCounter",
+    "chunk_text",
+    "get_token_counter",
+    "iter_sliding_window_chunks",
+]
@@ -0,0 +1,143 @@
+"""LLM 프롬프트용 근거(컨텍스트) 토큰 예산 채우기.
+
+비전공자 팁: LLM은 한 번에 읽을 수 있는 토큰 수(컨텍스트 창)가 정해져 있습니다. 근거를 무작정
+붙이면 창을 넘어 Ollama가 앞부분을 조용히 잘라내거나, 긴 프롬프트를 읽느라 몇 초씩 걸립니다.
+여기서는 모델별 예산 안에서 순위가 높은 근거부터 채우고, 마지막 근거가 다 들어가지 않으면
+문장 단위로 잘라 넣습니다. 빠진/잘린 근거 수는 응답 warnings 와 메트릭으로 알려 줍니다.
+
+토큰 수는 실제 토크나이저 대신 빠른 추정치(한글·한자 1글자 ≈ 1토큰, 그 밖의 글자 ≈ 3.5자당 1토큰)로
+계산하며, 실제보다 약간 많게 잡아 창을 넘지 않도록 합니다. 같은 청크가 반복 질의되므로 결과를 캐시합니다.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Sequence
+
+from prometheus_client import Counter, Histogram
+
+from backend.deps.ollama import DEFAULT_MODEL, model_context_window
+from backend.deps.settings import settings
+from backend.models.schema import QuerySource
+
+CONTEXT_CHUNKS = Counter("llm_context_chunks_total", "프롬프트 근거 청크 처리 결과", ["result"])
+CONTEXT_TOKENS = Histogram(
+    "llm_context_tokens",
+    "프롬프트 근거 추정 토큰 수",
+    buckets=(256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+
+# 한글 자모/음절, 가나, CJK 한자: 대략 1글자 1토큰
+_WIDE = "\u1100-\u11ff\u3130-\u318f\uac00-\ud7a3\u3040-\u30ff\u4e00-\u9fff"
+_WIDE_RE = re.compile(f"[{_WIDE}]")
+_OTHER_RUN_RE = re.compile(f"[^\\s{_WIDE}]+")
+# 문장 끝(. ! ? 。 또는 줄바꿈) 뒤에서 나눕니다. "다." 로 끝나는 한국어 문장도 포함됩니다.
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+# 잘라 넣을 가치가 있는 최소 남은 예산
+MIN_TRIM_TOKENS = 32
+
+
+@lru_cache(maxsize=8192)
+def estimate_tokens(text: str) -> int:
+    """빠른 토큰 수 추정(과대 추정 쪽)."""
+
+    wide = len(_WIDE_RE.findall(text))
+    runs = _OTHER_RUN_RE.findall(text)
+    # 영문/숫자/기호 덩어리마다 최소 1토큰이 생기므로 글자 기반 추정과 덩어리 수 중 큰 값을 씁니다.
+    return wide + max(math.ceil(sum(map(len, runs)) / 3.5), len(runs))
+
+
+def format_source(source: QuerySource) -> str:
+    return f"[{source.chunk_id}] {source.text}"
+
+
+def _trim_to_budget(source: QuerySource, budget: int) -> QuerySource | None:
+    """앞에서부터 문장 단위로 예산에 맞게 자릅니다. 한 문장도 안 들어가면 None."""
+
+    kept: list[str] = []
+    for sentence in _SENTENCE_RE.split(source.text):
+        candidate = " ".join(kept + [sentence]).strip()
+        if estimate_tokens(format_source(source.model_copy(update={"text": candidate}))) > budget:
+            break
+        kept.append(sentence)
+    text = " ".join(kept).strip()
+    if not text:
+        return None
+    return source.model_copy(update={"text": text})
+
+
+@dataclass
+class PackedContext:
+    context: str
+    sources: list[QuerySource]
+    tokens: int
+    budget: int
+    dropped: int = 0
+    trimmed: int = 0
+    warnings: list[str] = field(default_factory=list)
+
+
+def context_budget(model: str, *prompt_parts: str) -> int:
+    """모델 컨텍스트 창에서 답변 몫과 질문/시스템 프롬프트를 뺀 근거 예산."""
+
+    window = model_context_window(model)
+    overhead = sum(estimate_tokens(part) for part in prompt_parts)
+    return max(window - settings.llm_answer_reserve_tokens - overhead, 0)
+
+
+def pack_context(sources: Sequence[QuerySource], budget: int) -> PackedContext:
+    """순위 순서대로 예산을 채웁니다. 넘치는 근거는 문장 경계에서 자르거나 뺍니다."""
+
+    packed: list[QuerySource] = []
+    used = 0
+    dropped = trimmed = 0
+    separator = estimate_tokens("\n\n") or 1
+    for source in sources:
+        cost = estimate_tokens(format_source(source)) + (separator if packed else 0)
+        if used + cost <= budget:
+            packed.append(source)
+            used += cost
+            continue
+        remaining = budget - used - (separator if packed else 0)
+        partial = _trim_to_budget(source, remaining) if remaining >= MIN_TRIM_TOKENS else None
+        if partial is None:
+            dropped += 1
+            continue
+        packed.append(partial)
+        used += estimate_tokens(format_source(partial)) + (separator if len(packed) > 1 else 0)
+        trimmed += 1
+
+    CONTEXT_CHUNKS.labels("packed").inc(len(packed) - trimmed)
+    CONTEXT_CHUNKS.labels("trimmed").inc(trimmed)
+    CONTEXT_CHUNKS.labels("dropped").inc(dropped)
+    CONTEXT_TOKENS.observe(used)
+
+    warnings = []
+    if dropped or trimmed:
+        warnings.append(
+            f"컨텍스트 예산({budget} 토큰) 초과: 근거 {len(packed)}개 사용(축약 {trimmed}개), {dropped}개 제외"
+        )
+    return PackedContext(
+        context="\n\n".join(format_source(source) for source in packed),
+        sources=packed,
+        tokens=used,
+        budget=budget,
+        dropped=dropped,
+        trimmed=trimmed,
+        warnings=warnings,
+    )
+
+
+def build_prompt(
+    question: str, system: str, sources: Sequence[QuerySource], model: str = DEFAULT_MODEL
+) -> tuple[str, PackedContext]:
+    """질문과 예산 안에 채운 근거로 사용자 프롬프트를 만듭니다."""
+
+    template = f"질문: {question}\n\n근거:\n"
+    packed = pack_context(sources, context_budget(model, system, template))
+    return template + packed.context, packed
+
+
+__all__ = ["PackedContext", "build_prompt", "context_budget", "estimate_tokens", "pack_context"]
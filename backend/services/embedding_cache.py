@@ -0,0 +1,147 @@
+"""청크 해시 기반 임베딩 캐시.
+
+비전공자 팁: 같은 문장은 언제 임베딩해도 같은 벡터가 나옵니다.
+(모델, 청크 해시)를 키로 벡터를 저장해 두면, 조금 고친 문서나 여러 파일에 반복되는
+상용구를 다시 임베딩하지 않아도 됩니다. 오래 쓰이지 않은 항목은 TTL/LRU 로 정리합니다.
+"""
+from __future__ import annotations
+
+from typing import Awaitable, Callable, Sequence
+
+import numpy as np
+import sqlalchemy as sa
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CACHE_HITS = Counter("embedding_cache_hits_total", "임베딩 캐시 적중 청크 수", ["model"])
+CACHE_MISSES = Counter("embedding_cache_misses_total", "임베딩 캐시 미스 청크 수", ["model"])
+
+EmbedFn = Callable[[list[str]], Awaitable[np.ndarray]]
+
+_LOOKUP_SQL = sa.text(
+    """
+    SELECT chunk_hash, dim, vec
+    FROM embedding_cache
+    WHERE model = :model AND chunk_hash = ANY(CAST(:hashes AS text[]))
+    """
+)
+
+# LRU 시각 갱신은 정확할 필요가 없으므로 다른 트랜잭션이 잡은 행은 기다리지 않고 건너뜁니다.
+_TOUCH_SQL = sa.text(
+    """
+    UPDATE embedding_cache e
+    SET last_used_at = NOW()
+    FROM (
+        SELECT model, chunk_hash FROM embedding_cache
+        WHERE model = :model AND chunk_hash = ANY(CAST(:hashes AS text[]))
+        ORDER BY chunk_hash
+        FOR UPDATE SKIP LOCKED
+    ) AS t
+    WHERE e.model = t.model AND e.chunk_hash = t.chunk_hash
+    """
+)
+
+_STORE_SQL = sa.text(
+    """
+    INSERT INTO embedding_cache (model, chunk_hash, dim, vec, last_used_at)
+    SELECT :model, t.chunk_hash, :dim, t.vec, NOW()
+    FROM unnest(CAST(:hashes AS text[]), CAST(:vecs AS bytea[])) AS t(chunk_hash, vec)
+    ON CONFLICT (model, chunk_hash) DO UPDATE SET last_used_at = EXCLUDED.last_used_at
+    """
+)
+
+_EVICT_TTL_SQL = sa.text(
+    "DELETE FROM embedding_cache WHERE last_used_at < NOW() - make_interval(days => :ttl_days)"
+)
+
+_EVICT_LRU_SQL = sa.text(
+    """
+    DELETE FROM embedding_cache
+    WHERE ctid IN (
+        SELECT ctid FROM embedding_cache
+        ORDER BY last_used_at ASC
+        LIMIT GREATEST((SELECT count(*) FROM embedding_cache) - :max_rows, 0)
+    )
+    """
+)
+
+
+async def lookup(session: AsyncSession, model: str, hashes: Sequence[str]) -> dict[str, np.ndarray]:
+    """캐시에 있는 벡터를 조회합니다(행을 잠그지 않는 SELECT)."""
+
+    if not hashes:
+        return {}
+    rows = await session.execute(_LOOKUP_SQL, {"model": model, "hashes": list(set(hashes))})
+    return {row.chunk_hash: np.frombuffer(row.vec, dtype="<f4", count=row.dim) for row in rows}
+
+
+async def touch(session: AsyncSession, model: str, hashes: Sequence[str]) -> None:
+    """적중한 항목의 사용 시각을 갱신합니다(LRU). 다른 트랜잭션이 잠근 행은 건너뜁니다."""
+
+    if hashes:
+        await session.execute(_TOUCH_SQL, {"model": model, "hashes": sorted(set(hashes))})
+
+
+async def store(session: AsyncSession, model: str, vectors: dict[str, np.ndarray]) -> None:
+    """새로 계산한 벡터를 float32 바이트로 저장합니다."""
+
+    if not vectors:
+        return
+    # 동시에 저장하는 배치들이 같은 순서로 행을 잠그도록 해시 순으로 넣습니다(교착 방지).
+    hashes = sorted(vectors)
+    await session.execute(
+        _STORE_SQL,
+        {
+            "model": model,
+            "dim": len(vectors[hashes[0]]),
+            "hashes": hashes,
+            "vecs": [np.asarray(vectors[h], dtype="<f4").tobytes() for h in hashes],
+        },
+    )
+
+
+async def embed_with_cache(
+    session: AsyncSession,
+    texts: Sequence[str],
+    hashes: Sequence[str],
+    model: str,
+    embed: EmbedFn,
+) -> np.ndarray:
+    """캐시 미스(중복 제거)만 embed 로 계산하고 입력 순서대로 (n, dim) 행렬을 반환합니다.
+
+    조회와 사용 시각 갱신은 embed 전에 커밋해, 임베딩 서비스를 기다리는 동안 캐시 행을 잠가 두지 않습니다.
+    새 벡터 저장은 호출자가 커밋합니다.
+    """
+
+    cached = await lookup(session, model, hashes)
+    await touch(session, model, list(cached))
+    await session.commit()
+    missing: dict[str, str] = {}
+    for text, digest in zip(texts, hashes):
+        if digest not in cached:
+            missing.setdefault(digest, text)
+    hits = sum(1 for digest in hashes if digest in cached)
+    CACHE_HITS.labels(model).inc(hits)
+    CACHE_MISSES.labels(model).inc(len(hashes) - hits)
+
+    if missing:
+        computed = await embed(list(missing.values()))
+        if len(computed) != len(missing):
+            raise RuntimeError(f"embedding count mismatch: expected {len(missing)}, got {len(computed)}")
+        fresh = dict(zip(missing, computed))
+        await store(session, model, fresh)
+        cached.update(fresh)
+    if not hashes:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack([np.asarray(cached[digest], dtype=np.float32) for digest in hashes])
+
+
+async def evict(session: AsyncSession, ttl_days: int, max_rows: int) -> int:
+    """TTL 이 지난 항목과 한도를 넘는 가장 오래된 항목을 삭제하고 삭제 건수를 반환합니다."""
+
+    expired = await session.execute(_EVICT_TTL_SQL, {"ttl_days": ttl_days})
+    overflow = await session.execute(_EVICT_LRU_SQL, {"max_rows": max_rows})
+    return (expired.rowcount or 0) + (overflow.rowcount or 0)
+
+
+__all__ = ["CACHE_HITS", "CACHE_MISSES", "embed_with_cache", "evict", "lookup", "store", "touch"]
@@ -6,26 +6,45 @@ from __future__ import annotations
 
 from typing import Iterable
 
-from backend.services import pii_rules, moderation_rules
+from backend.services.text_scanner import scanner
 
 
 def apply_pii_mask(text: str) -> str:
-    """응답 내 PII를 재차 마스킹."""
+    """응답 내 PII를 재차 마스킹(모든 PII 규칙을 한 번에 훑음)."""
 
-    masked = text
-    for pattern, replacement in pii_rules.PII_PATTERNS:
-        masked = pattern.sub(replacement, masked)
-    return masked
+    return scanner.mask(text)
+
+
+class StreamingPiiMasker:
+    """토큰 스트림에 PII 마스킹을 점진적으로 적용합니다.
+
+    PII 패턴은 공백을 넘지 않으므로 마지막 공백까지만 마스킹해 내보내고
+    나머지 꼬리는 다음 토큰과 이어 붙일 때까지 보류합니다.
+    내보낸 조각을 모두 이으면 전체 답변에 apply_pii_mask 를 적용한 결과와 같습니다.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+
+    def feed(self, delta: str) -> str:
+        self._pending += delta
+        cut = len(self._pending) - 1
+        while cut >= 0 and not self._pending[cut].isspace():
+            cut -= 1
+        if cut < 0:
+            return ""
+        ready, self._pending = self._pending[: cut + 1], self._pending[cut + 1 :]
+        return apply_pii_mask(ready)
+
+    def flush(self) -> str:
+        ready, self._pending = self._pending, ""
+        return apply_pii_mask(ready) if ready else ""
 
 
 def detect_moderation_flags(text: str) -> list[str]:
     """금칙 카테고리 감지."""
 
-    flags: list[str] = []
-    for category, regex in moderation_rules.CATEGORY_PATTERNS.items():
-        if regex.search(text):
-            flags.append(category)
-    return flags
+    return scanner.scan(text).flags
 
 
 def citation_check(answer: str, sources: Iterable[str]) -> list[str]:
@@ -41,14 +60,13 @@ def citation_check(answer: str, sources: Iterable[str]) -> list[str]:
 
 
 def run_guardrails(answer: str, sources: Iterable[str]) -> tuple[str, list[str]]:
-    """PII 마스킹과 금칙 경고를 순차 적용."""
+    """PII 마스킹과 금칙 경고를 적용합니다(답변을 한 번만 훑음)."""
 
-    masked = apply_pii_mask(answer)
-    warnings = citation_check(masked, sources)
-    moderation_flags = detect_moderation_flags(masked)
-    if moderation_flags:
-        warnings.append(f"금칙 카테고리 감지: {', '.join(moderation_flags)}")
-    return masked, warnings
+    scanned = scanner.scan(answer)
+    warnings = citation_check(scanned.text, sources)
+    if scanned.flags:
+        warnings.append(f"금칙 카테고리 감지: {', '.join(scanned.flags)}")
+    return scanned.text, warnings
 
 
-__all__ = ["run_guardrails"]
+__all__ = ["run_guardrails", "StreamingPiiMasker", "apply_pii_mask"]
@@ -0,0 +1,138 @@
+"""증분 재인덱싱: 바뀐 청크만 다시 임베딩합니다.
+
+비전공자 팁: 문서를 조금 고쳐 다시 올리면 파일 해시가 달라져 처음부터 전처리·임베딩을 다시 합니다.
+하지만 청크 대부분은 글자 하나 다르지 않습니다. 새 청크 해시를 기존 문서의 chunks.hash 와 비교해
+같은 청크는 기존 행(과 벡터)을 새 위치로 옮기기만 하고, 새로 생기거나 바뀐 청크만 임베딩하며,
+더 이상 쓰이지 않는 청크는 지웁니다. 이 모든 변경은 한 트랜잭션에서 커밋되므로 검색에는
+이전 문서 또는 새 문서 중 하나만 보입니다.
+
+    1) park: 기존 청크의 pos 를 음수(-pos-1)로 옮겨 새 위치와 겹치지 않게 합니다.
+    2) 새 청크마다 같은 해시의 기존 청크가 있으면 그 행의 pos 만 바꾸고, 없으면 임베딩 후 저장합니다.
+    3) 끝까지 음수 pos 로 남은 청크(고아)와 그 벡터를 지웁니다.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import sqlalchemy as sa
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+INCREMENTAL_CHUNKS = Counter(
+    "index_incremental_chunks_total", "증분 재인덱싱 청크 처리 결과(reused, embedded, deleted)", ["result"]
+)
+
+_PARK_SQL = sa.text(
+    """
+    UPDATE chunks c
+    SET pos = -c.pos - 1
+    WHERE c.document_id = :doc_id AND c.pos >= 0
+    RETURNING c.id, c.hash,
+              EXISTS (SELECT 1 FROM embeddings e WHERE e.chunk_id = c.id AND e.model = :model) AS embedded
+    """
+)
+
+_MOVE_SQL = sa.text(
+    """
+    UPDATE chunks c
+    SET pos = t.pos, start_offset = t.start_offset, end_offset = t.end_offset
+    FROM unnest(
+        CAST(:ids AS integer[]),
+        CAST(:positions AS integer[]),
+        CAST(:starts AS integer[]),
+        CAST(:ends AS integer[])
+    ) AS t(id, pos, start_offset, end_offset)
+    WHERE c.id = t.id
+    """
+)
+
+_DELETE_PARKED_EMBEDDINGS_SQL = sa.text(
+    "DELETE FROM embeddings WHERE chunk_id IN (SELECT id FROM chunks WHERE document_id = :doc_id AND pos < 0)"
+)
+_DELETE_PARKED_CHUNKS_SQL = sa.text("DELETE FROM chunks WHERE document_id = :doc_id AND pos < 0")
+
+
+@dataclass
+class ChunkMove:
+    """재사용할 기존 청크 행 하나의 새 위치."""
+
+    chunk_id: int
+    pos: int
+    start: int | None = None
+    end: int | None = None
+
+
+class ChunkReuse:
+    """기존 문서 청크를 해시별로 모아 두고, 새 청크에 같은 해시의 행을 하나씩 배정합니다."""
+
+    def __init__(self, reusable: dict[str, list[int]]) -> None:
+        self._reusable = reusable
+        self.reused = 0
+        self.embedded = 0
+
+    def take(self, digest: str) -> int | None:
+        """같은 해시의 재사용 가능한 청크 id. 없으면(새 청크/바뀐 청크) None."""
+
+        ids = self._reusable.get(digest)
+        if ids:
+            self.reused += 1
+            return ids.pop()
+        self.embedded += 1
+        return None
+
+
+async def park_chunks(session: AsyncSession, document_id: int, model: str) -> ChunkReuse:
+    """문서의 기존 청크를 음수 위치로 옮기고, model 벡터가 있는 청크를 재사용 후보로 반환합니다."""
+
+    reusable: dict[str, list[int]] = {}
+    rows = await session.execute(_PARK_SQL, {"doc_id": document_id, "model": model})
+    for row in rows:
+        # 벡터가 없는 청크(다른 모델로 인덱싱)는 재사용하지 않고 고아로 남겨 지웁니다.
+        if row.embedded:
+            reusable.setdefault(row.hash, []).append(row.id)
+    return ChunkReuse(reusable)
+
+
+async def move_chunks(session: AsyncSession, moves: Sequence[ChunkMove]) -> None:
+    """재사용하는 기존 청크 행을 새 위치/오프셋으로 옮깁니다(벡터는 그대로)."""
+
+    if not moves:
+        return
+    await session.execute(
+        _MOVE_SQL,
+        {
+            "ids": [move.chunk_id for move in moves],
+            "positions": [move.pos for move in moves],
+            "starts": [move.start for move in moves],
+            "ends": [move.end for move in moves],
+        },
+    )
+
+
+async def delete_parked(session: AsyncSession, document_id: int) -> int:
+    """끝까지 재사용되지 않은 청크와 벡터를 지우고 지운 청크 수를 반환합니다."""
+
+    await session.execute(_DELETE_PARKED_EMBEDDINGS_SQL, {"doc_id": document_id})
+    result = await session.execute(_DELETE_PARKED_CHUNKS_SQL, {"doc_id": document_id})
+    return result.rowcount or 0
+
+
+def record_counts(reuse: ChunkReuse, deleted: int) -> dict[str, int]:
+    """재사용/재계산/삭제 청크 수를 메트릭에 더하고 로그용 요약을 반환합니다."""
+
+    INCREMENTAL_CHUNKS.labels("reused").inc(reuse.reused)
+    INCREMENTAL_CHUNKS.labels("embedded").inc(reuse.embedded)
+    INCREMENTAL_CHUNKS.labels("deleted").inc(deleted)
+    return {"reused": reuse.reused, "embedded": reuse.embedded, "deleted": deleted}
+
+
+__all__ = [
+    "INCREMENTAL_CHUNKS",
+    "ChunkMove",
+    "ChunkReuse",
+    "delete_parked",
+    "move_chunks",
+    "park_chunks",
+    "record_counts",
+]
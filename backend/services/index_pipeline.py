@@ -0,0 +1,206 @@
+"""인덱싱 파이프라인: 준비(읽기·전처리·청킹) → 임베딩 → DB 저장을 동시에 흘려보냅니다.
+
+비전공자 팁: 단계를 차례로 돌리면 임베딩하는 동안 DB 가 놀고, 저장하는 동안 임베딩 서비스가 놉니다.
+청크 배치를 크기 제한이 있는 큐로 이어 붙이면 한 배치를 저장하는 동안 다음 배치를 임베딩하고,
+그 다음 배치를 읽어 둘 수 있습니다. 큐가 가득 차면 앞 단계가 기다리므로(backpressure)
+메모리에는 배치 몇 개만 남습니다.
+
+    준비(스레드 1개) ─큐→ 임베딩(동시 N개) ─큐→ 저장(1개, 배치 순서대로)
+
+저장은 한 트랜잭션(세션 하나)에서 순서대로 하고, 임베딩만 동시에 여러 배치를 요청합니다.
+단계별 소요 시간은 배치마다, 문서마다 메트릭(index_stage_seconds, index_document_stage_seconds)으로 남깁니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Iterable, Iterator, TypeVar
+
+from prometheus_client import Histogram
+
+T = TypeVar("T")
+
+STAGES = ("prepare", "embed", "store")
+STAGE_SECONDS = Histogram(
+    "index_stage_seconds",
+    "인덱싱 단계별 배치 하나 처리 시간",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DOCUMENT_STAGE_SECONDS = Histogram(
+    "index_document_stage_seconds",
+    "문서 하나가 단계별로 쓴 시간 합계(total 은 문서 전체 경과 시간)",
+    ["stage"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+_DONE = object()
+
+
+@dataclass
+class PipelineStats:
+    """문서 하나의 파이프라인 실행 결과. 단계 시간은 배치별 소요 시간의 합입니다."""
+
+    batches: int = 0
+    items: int = 0
+    seconds: dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    total: float = 0.0
+
+    def record(self, stage: str, elapsed: float) -> None:
+        self.seconds[stage] += elapsed
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+
+
+def iter_batches(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    batch: list[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _next_batch(batches: Iterator[list[T]], stop: threading.Event) -> list[T] | None:
+    # 멈추라는 신호를 받았으면 반복자를 더 진행하지 않습니다(스레드 안의 next 는 취소할 수 없음).
+    if stop.is_set():
+        return None
+    return next(batches, None)
+
+
+class IndexPipeline(Generic[T]):
+    """배치 스트림을 embed → store 로 흘려보내는 제한 큐 파이프라인.
+
+    batches 는 동기 반복자(MinIO 읽기/전처리)라 스레드에서 하나씩 꺼내고, embed 는 최대 concurrency 개
+    배치를 동시에 실행하며, store 는 배치 순서대로 하나씩 실행합니다. 한 단계가 실패하면 나머지 단계를
+    취소하고, 스레드에서 읽던 배치가 끝날 때까지 기다려 반복자를 닫은 뒤 예외를 그대로 올립니다.
+    그래서 태스크 재시도가 같은 파일을 다시 읽기 시작할 때 이전 읽기가 남아 있지 않습니다.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[T]], Awaitable[Any]],
+        store: Callable[[list[T], Any], Awaitable[None]],
+        concurrency: int = 2,
+        queue_batches: int = 4,
+    ) -> None:
+        self._embed = embed
+        self._store = store
+        self._concurrency = max(concurrency, 1)
+        self._queue_batches = max(queue_batches, 1)
+
+    async def run(self, batches: Iterator[list[T]]) -> PipelineStats:
+        stats = PipelineStats()
+        started = time.perf_counter()
+        to_embed: asyncio.Queue = asyncio.Queue(self._queue_batches)
+        to_store: asyncio.Queue = asyncio.Queue()
+        # 준비됐지만 아직 저장되지 않은 배치 수 상한. 저장 단계가 순서를 맞추려고 모아 두는 배치까지
+        # 이 안에 들어가므로 임베딩 하나가 늦어져도 메모리가 무한히 늘지 않습니다.
+        window = asyncio.Semaphore(self._queue_batches * 2 + self._concurrency)
+        stop = threading.Event()
+        reading: list[asyncio.Task] = []
+        tasks = [
+            asyncio.create_task(self._prepare(batches, to_embed, window, stats, stop, reading)),
+            *(asyncio.create_task(self._embed_worker(to_embed, to_store, stats)) for _ in range(self._concurrency)),
+            asyncio.create_task(self._store_worker(to_store, window, stats)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # 태스크를 취소해도 스레드의 next() 는 계속 돕니다. 읽던 배치가 끝난 뒤 반복자를 닫아
+            # 원본 읽기(MinIO 응답 등)를 정리합니다.
+            await asyncio.gather(*reading, return_exceptions=True)
+            close = getattr(batches, "close", None)
+            if close is not None:
+                close()
+            raise
+        stats.total = time.perf_counter() - started
+        for stage in STAGES:
+            DOCUMENT_STAGE_SECONDS.labels(stage).observe(stats.seconds[stage])
+        DOCUMENT_STAGE_SECONDS.labels("total").observe(stats.total)
+        return stats
+
+    async def _prepare(
+        self,
+        batches: Iterator[list[T]],
+        out: asyncio.Queue,
+        window: asyncio.Semaphore,
+        stats: PipelineStats,
+        stop: threading.Event,
+        reading: list[asyncio.Task],
+    ) -> None:
+        seq = 0
+        while True:
+            await window.acquire()
+            started = time.perf_counter()
+            # 읽기/전처리/청킹은 블로킹 작업이므로 이벤트 루프 밖(스레드)에서 다음 배치를 만듭니다.
+            # shield: 이 태스크가 취소돼도 읽기는 끝까지 기다릴 수 있게 run 에 넘겨 둡니다.
+            read = asyncio.ensure_future(asyncio.to_thread(_next_batch, batches, stop))
+            reading[:] = [read]
+            batch = await asyncio.shield(read)
+            if batch is None:
+                break
+            stats.record("prepare", time.perf_counter() - started)
+            await out.put((seq, batch))
+            seq += 1
+        for _ in range(self._concurrency):
+            await out.put(_DONE)
+
+    async def _embed_worker(self, source: asyncio.Queue, out: asyncio.Queue, stats: PipelineStats) -> None:
+        while True:
+            item = await source.get()
+            if item is _DONE:
+                await out.put(_DONE)
+                return
+            seq, batch = item
+            started = time.perf_counter()
+            result = await self._embed(batch)
+            stats.record("embed", time.perf_counter() - started)
+            await out.put((seq, batch, result))
+
+    async def _store_worker(self, source: asyncio.Queue, window: asyncio.Semaphore, stats: PipelineStats) -> None:
+        # 임베딩은 순서 없이 끝나므로 다음 차례 배치가 올 때까지 모아 둡니다.
+        waiting: dict[int, tuple[list[T], Any]] = {}
+        expected = 0
+        finished = 0
+        while finished < self._concurrency:
+            item = await source.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            seq, batch, result = item
+            waiting[seq] = (batch, result)
+            while expected in waiting:
+                batch, result = waiting.pop(expected)
+                started = time.perf_counter()
+                await self._store(batch, result)
+                stats.record("store", time.perf_counter() - started)
+                stats.batches += 1
+                stats.items += len(batch)
+                expected += 1
+                window.release()
+
+
+def summarize(stats: PipelineStats) -> dict[str, Any]:
+    """로그용 요약(단계별 초, 배치/항목 수)."""
+
+    summary: dict[str, Any] = {f"{stage}_seconds": round(stats.seconds[stage], 3) for stage in STAGES}
+    summary.update(batches=stats.batches, items=stats.items, total_seconds=round(stats.total, 3))
+    return summary
+
+
+__all__ = [
+    "DOCUMENT_STAGE_SECONDS",
+    "IndexPipeline",
+    "PipelineStats",
+    "STAGE_SECONDS",
+    "iter_batches",
+    "summarize",
+]
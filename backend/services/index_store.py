@@ -0,0 +1,146 @@
+"""청크/임베딩 일괄 저장 서비스.
+
+비전공자 팁: 한 줄씩 INSERT 하면 DB 왕복이 청크 수만큼 늘어납니다.
+여러 행을 배열로 묶어 한 번에 넣으면 큰 문서도 몇 번의 왕복으로 저장됩니다.
+(document_id, pos)·(chunk_id, model) 고유 키로 upsert 하므로 재시도한 배치를 다시 저장해도 중복이 생기지 않습니다.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+from dataclasses import dataclass
+from typing import Iterator, Sequence
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# 한국어 주석: asyncpg 파라미터 한도(32767)와 메모리를 고려한 한 문장당 최대 행 수
+DEFAULT_INSERT_BATCH = 1000
+
+_INSERT_CHUNKS_SQL = sa.text(
+    """
+    INSERT INTO chunks (document_id, pos, text, hash, start_offset, end_offset, created_at)
+    SELECT :doc_id, t.pos, t.text, t.hash, t.start_offset, t.end_offset, :created_at
+    FROM unnest(
+        CAST(:positions AS integer[]),
+        CAST(:texts AS text[]),
+        CAST(:hashes AS text[]),
+        CAST(:starts AS integer[]),
+        CAST(:ends AS integer[])
+    ) AS t(pos, text, hash, start_offset, end_offset)
+    ON CONFLICT (document_id, pos) DO UPDATE
+    SET text = EXCLUDED.text, hash = EXCLUDED.hash,
+        start_offset = EXCLUDED.start_offset, end_offset = EXCLUDED.end_offset
+    RETURNING id, pos
+    """
+)
+
+_INSERT_EMBEDDINGS_SQL = sa.text(
+    """
+    INSERT INTO embeddings (chunk_id, pipeline_id, model, dim, vec, created_at)
+    SELECT t.chunk_id, :pipeline_id, :model, :dim, CAST(t.vec AS vector), :created_at
+    FROM unnest(CAST(:chunk_ids AS integer[]), CAST(:vecs AS text[])) AS t(chunk_id, vec)
+    ON CONFLICT (chunk_id, model) DO UPDATE
+    SET pipeline_id = EXCLUDED.pipeline_id, dim = EXCLUDED.dim, vec = EXCLUDED.vec
+    """
+)
+
+
+@dataclass
+class ChunkRecord:
+    """저장할 청크 한 건(위치, 본문, 벡터, 본문 해시, 전처리 본문 안의 [start, end) 오프셋)."""
+
+    pos: int
+    text: str
+    vector: Sequence[float]
+    hash: str = ""
+    start: int | None = None
+    end: int | None = None
+
+    def __post_init__(self) -> None:
+        if not self.hash:
+            self.hash = chunk_hash(self.text)
+
+
+def chunk_hash(text: str) -> str:
+    """청크 본문의 SHA1 해시(chunks.hash 컬럼 값)."""
+
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def vector_literal(vector: Sequence[float]) -> str:
+    """pgvector 텍스트 표현('[0.1,0.2,...]')으로 변환."""
+
+    return "[" + ",".join(repr(float(v)) for v in vector) + "]"
+
+
+def parse_vector_literals(texts: Sequence[str], dim: int = 0) -> np.ndarray:
+    """vector_literal 의 역변환: pgvector 텍스트 여러 개를 한 번에 (n, dim) float32 행렬로 바꿉니다."""
+
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+    flat = np.fromstring(",".join(text[1:-1] for text in texts), dtype=np.float32, sep=",")
+    return flat.reshape(len(texts), -1)
+
+
+def _batched(records: Sequence[ChunkRecord], size: int) -> Iterator[Sequence[ChunkRecord]]:
+    for start in range(0, len(records), size):
+        yield records[start : start + size]
+
+
+async def insert_chunks_with_embeddings(
+    session: AsyncSession,
+    document_id: int,
+    records: Sequence[ChunkRecord],
+    model: str,
+    pipeline_id: int | None = None,
+    created_at: dt.datetime | None = None,
+    batch_size: int = DEFAULT_INSERT_BATCH,
+) -> int:
+    """청크와 임베딩을 다중 행 INSERT(upsert)로 저장하고 저장한 건수를 반환합니다.
+
+    청크 INSERT 의 RETURNING (id, pos) 로 새 id 를 위치에 매핑한 뒤
+    같은 배치의 벡터를 embeddings 에 한 번에 넣습니다. pipeline_id 는 검색 필터용으로
+    embeddings 에 함께 기록합니다. 같은 문서·위치의 청크가 이미 있으면 본문과 벡터를 덮어씁니다.
+    커밋은 호출자가 담당합니다.
+    """
+
+    now = created_at or dt.datetime.utcnow()
+    stored = 0
+    for batch in _batched(records, max(batch_size, 1)):
+        result = await session.execute(
+            _INSERT_CHUNKS_SQL,
+            {
+                "doc_id": document_id,
+                "positions": [rec.pos for rec in batch],
+                "texts": [rec.text for rec in batch],
+                "hashes": [rec.hash for rec in batch],
+                "starts": [rec.start for rec in batch],
+                "ends": [rec.end for rec in batch],
+                "created_at": now,
+            },
+        )
+        id_by_pos = {row.pos: row.id for row in result}
+        await session.execute(
+            _INSERT_EMBEDDINGS_SQL,
+            {
+                "chunk_ids": [id_by_pos[rec.pos] for rec in batch],
+                "pipeline_id": pipeline_id,
+                "vecs": [vector_literal(rec.vector) for rec in batch],
+                "model": model,
+                "dim": len(batch[0].vector),
+                "created_at": now,
+            },
+        )
+        stored += len(batch)
+    return stored
+
+
+__all__ = [
+    "ChunkRecord",
+    "chunk_hash",
+    "insert_chunks_with_embeddings",
+    "parse_vector_literals",
+    "vector_literal",
+]
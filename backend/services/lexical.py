@@ -0,0 +1,102 @@
+"""키워드(전문 검색) 검색.
+
+비전공자 팁: 제품 코드(KX-1042), 오류 번호(E4031), 사람 이름처럼 "글자 그대로" 맞아야 하는 말은
+임베딩(의미 벡터)으로는 잘 안 잡힙니다. Postgres 전문 검색(tsvector)으로 단어를 직접 찾아
+벡터 검색 결과와 합치면(하이브리드) 이런 질문도 놓치지 않습니다.
+
+한국어는 "환불은", "환불을"처럼 조사가 붙어 저장되므로, 질문 단어에서 조사를 떼고
+접두어 검색(환불:*)으로 찾습니다. DB 쪽은 형태소 분석 없이 공백/기호로만 나누는
+korean 텍스트 검색 설정(simple 복사본, infra/initdb 참고)을 씁니다.
+"""
+from __future__ import annotations
+
+import re
+from typing import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.schema import QuerySource
+
+TS_CONFIG = "korean"
+
+_TERM_RE = re.compile(r"[0-9A-Za-z가-힣][0-9A-Za-z가-힣_\-.]*")
+_HANGUL_RE = re.compile(r"[가-힣]+$")
+# 긴 조사부터 비교합니다("에서" 를 "서" 보다 먼저).
+_PARTICLES = sorted(
+    ["은", "는", "이", "가", "을", "를", "에", "의", "로", "와", "과", "도", "만",
+     "으로", "에서", "에게", "한테", "까지", "부터", "보다", "처럼", "이나", "에서는", "으로는"],
+    key=len,
+    reverse=True,
+)
+
+
+def _strip_particle(term: str) -> str:
+    if not _HANGUL_RE.search(term):
+        return term
+    for particle in _PARTICLES:
+        # 남는 말이 한 글자면 "차이" → "차" 처럼 뜻이 바뀌므로 떼지 않습니다.
+        if term.endswith(particle) and len(term) - len(particle) >= 2:
+            return term[: -len(particle)]
+    return term
+
+
+def query_terms(text: str) -> list[str]:
+    """질문에서 검색어를 뽑습니다(소문자, 조사 제거, 중복 제거, 순서 유지)."""
+
+    terms: list[str] = []
+    for raw in _TERM_RE.findall(text.lower()):
+        term = _strip_particle(raw.strip("-."))
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_tsquery(text: str) -> str | None:
+    """to_tsquery 입력 문자열: 단어마다 접두어 검색, OR 결합. 검색어가 없으면 None."""
+
+    terms = query_terms(text)
+    if not terms:
+        return None
+    return " | ".join(f"'{term}':*" for term in terms)
+
+
+async def lexical_search(
+    session: AsyncSession,
+    pipeline_id: int,
+    query_text: str,
+    limit: int,
+    dedup: bool = True,
+) -> Sequence[QuerySource]:
+    """파이프라인 청크를 전문 검색 순위(ts_rank_cd)로 반환합니다. score 는 순위 점수입니다.
+
+    dedup 이면 같은 내용(chunks.hash)의 청크는 순위가 가장 높은 하나만 남깁니다.
+    """
+
+    tsquery = build_tsquery(query_text)
+    if tsquery is None:
+        return []
+    pid = int(pipeline_id)
+    rows = await session.execute(
+        sa.text(
+            f"""
+            SELECT chunk_id, text, score
+            FROM (
+                SELECT c.id AS chunk_id, c.text, ts_rank_cd(c.tsv, q) AS score,
+                       row_number() OVER (PARTITION BY c.hash ORDER BY ts_rank_cd(c.tsv, q) DESC, c.id) AS dup_rank
+                FROM chunks c
+                JOIN embeddings e ON e.chunk_id = c.id,
+                     to_tsquery('{TS_CONFIG}', :tsquery) AS q
+                WHERE e.pipeline_id = {pid} AND c.tsv @@ q
+            ) AS ranked
+            {"WHERE dup_rank = 1" if dedup else ""}
+            ORDER BY score DESC, chunk_id
+            LIMIT :limit
+            """
+        ),
+        {"tsquery": tsquery, "limit": limit},
+    )
+    return [QuerySource(chunk_id=row.chunk_id, text=row.text, score=float(row.score)) for row in rows]
+
+
+__all__ = ["build_tsquery", "lexical_search", "query_terms"]
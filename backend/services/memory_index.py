@@ -0,0 +1,381 @@
+"""자주 질의되는 파이프라인용 프로세스 내 벡터 검색(NumPy).
+
+비전공자 팁: 배포된 파이프라인은 질의가 몰리지만 벡터 수는 수만 개 정도입니다. 이 정도면
+벡터를 메모리의 연속된 float32 행렬로 올려두고 행렬-벡터 곱 한 번으로 전수(정확) 검색하는 편이
+DB 왕복보다 빠릅니다. 메모리 예산을 넘으면 가장 오래 안 쓴 파이프라인부터 내립니다(LRU).
+
+- 처음 질의(콜드 미스)는 pgvector 로 답하고, 그동안 백그라운드에서 행렬을 올립니다.
+- 인덱싱 태스크가 새 청크를 저장하면 Redis 세대(generation) 값을 올립니다. 검색 시 세대가 바뀌었으면
+  새 행만 이어 붙이고, 행 수가 맞지 않으면(삭제/재인덱싱) 통째로 다시 올립니다.
+- MEMORY_INDEX_DIR 를 지정하면 행렬을 파일로 저장해 같은 서버의 uvicorn 워커들이 메모리 매핑으로 공유합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import sqlalchemy as sa
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.deps.db import get_session
+from backend.deps.redis import get_redis
+from backend.deps.settings import settings
+from backend.models.schema import QuerySource
+from backend.services.index_store import parse_vector_literals
+from backend.services.vector_index import index_spec_from_settings
+
+LOGGER = logging.getLogger(__name__)
+
+MEMORY_LOOKUPS = Counter("memory_index_lookups_total", "메모리 벡터 검색 조회 결과", ["result"])
+
+
+def generation_key(pipeline_id: int) -> str:
+    return f"vecmem:gen:{int(pipeline_id)}"
+
+
+async def notify_pipeline_changed(pipeline_id: int) -> None:
+    """파이프라인 벡터가 바뀌었음을 알립니다(커밋 뒤 호출). 각 워커는 다음 검색에서 갱신합니다."""
+
+    try:
+        await get_redis().incr(generation_key(pipeline_id))
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.warning("메모리 인덱스 세대 갱신 실패", exc_info=True, extra={"pipeline_id": pipeline_id})
+
+
+@dataclass
+class PipelineMatrix:
+    """한 파이프라인의 벡터 행렬과 청크 id (행 순서 동일)."""
+
+    chunk_ids: np.ndarray
+    matrix: np.ndarray
+    max_embedding_id: int
+    generation: int
+    checked_at: float = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.chunk_ids.nbytes + self.matrix.nbytes)
+
+    def top_k(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """점수 상위 k개의 (청크 id, 점수)를 점수 내림차순으로 돌려줍니다."""
+
+        scores = self.matrix @ query
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        if k < scores.shape[0]:
+            # 전체 정렬(O(n log n)) 대신 상위 k개만 고른 뒤 그 k개만 정렬합니다.
+            picked = np.argpartition(-scores, k - 1)[:k]
+        else:
+            picked = np.arange(scores.shape[0])
+        order = picked[np.argsort(-scores[picked], kind="stable")]
+        return self.chunk_ids[order], scores[order]
+
+
+class MemoryVectorIndex:
+    """파이프라인별 행렬을 메모리 예산 안에서 LRU 로 관리합니다."""
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        max_rows: int,
+        check_seconds: float = 1.0,
+        directory: str | None = None,
+        normalize: bool = True,
+    ) -> None:
+        self.budget_bytes = max(budget_bytes, 0)
+        self.max_rows = max_rows
+        self.check_seconds = check_seconds
+        self.directory = Path(directory) if directory else None
+        self.normalize = normalize
+        self._entries: OrderedDict[int, PipelineMatrix] = OrderedDict()
+        # 행 수가 max_rows/예산을 넘는 파이프라인: 세대 → 그 세대 동안은 pgvector 만 사용
+        self._too_large: dict[int, int] = {}
+        self._loading: dict[int, asyncio.Task] = {}
+        self._used = 0
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used
+
+    # ------------------------------------------------------------------ 캐시 관리
+    def _put(self, pipeline_id: int, entry: PipelineMatrix) -> None:
+        self.invalidate(pipeline_id)
+        if entry.nbytes > self.budget_bytes:
+            self._too_large[pipeline_id] = entry.generation
+            return
+        self._entries[pipeline_id] = entry
+        self._used += entry.nbytes
+        while self._used > self.budget_bytes and self._entries:
+            evicted_id, evicted = self._entries.popitem(last=False)
+            self._used -= evicted.nbytes
+            LOGGER.info("메모리 인덱스 제외(LRU)", extra={"pipeline_id": evicted_id, "bytes": evicted.nbytes})
+
+    def invalidate(self, pipeline_id: int) -> None:
+        entry = self._entries.pop(pipeline_id, None)
+        if entry is not None:
+            self._used -= entry.nbytes
+
+    def append(self, pipeline_id: int, chunk_ids: np.ndarray, vectors: np.ndarray, max_embedding_id: int) -> None:
+        """이미 올라온 파이프라인 행렬 뒤에 새 행을 붙입니다(없으면 무시)."""
+
+        entry = self._entries.get(pipeline_id)
+        if entry is None or not len(chunk_ids):
+            return
+        vectors = self._prepare(vectors)
+        updated = PipelineMatrix(
+            chunk_ids=np.concatenate([entry.chunk_ids, chunk_ids.astype(np.int64)]),
+            matrix=np.ascontiguousarray(np.concatenate([entry.matrix, vectors])),
+            max_embedding_id=max(entry.max_embedding_id, max_embedding_id),
+            generation=entry.generation,
+        )
+        self._put(pipeline_id, updated)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.normalize and vectors.size:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    # ------------------------------------------------------------------ DB/파일 적재
+    async def _generation(self, pipeline_id: int) -> int:
+        raw = await get_redis().get(generation_key(pipeline_id))
+        return int(raw or 0)
+
+    async def _fetch(self, session: AsyncSession, pipeline_id: int, after_id: int = 0):
+        result = await session.execute(
+            sa.text(
+                """
+                SELECT e.id, e.chunk_id, e.vec::text AS vec
+                FROM embeddings e
+                WHERE e.pipeline_id = :pid AND e.id > :after
+                ORDER BY e.id
+                """
+            ),
+            {"pid": pipeline_id, "after": after_id},
+        )
+        rows = result.fetchall()
+        ids = np.fromiter((row.chunk_id for row in rows), dtype=np.int64, count=len(rows))
+        max_id = max((row.id for row in rows), default=after_id)
+        return ids, self._prepare(parse_vector_literals([row.vec for row in rows])), max_id
+
+    def _file_paths(self, pipeline_id: int, generation: int) -> tuple[Path, Path]:
+        assert self.directory is not None
+        stem = self.directory / f"p{pipeline_id}-g{generation}"
+        return stem.with_suffix(".vec.npy"), stem.with_suffix(".ids.npy")
+
+    def _load_file(self, pipeline_id: int, generation: int) -> PipelineMatrix | None:
+        if self.directory is None:
+            return None
+        vec_path, ids_path = self._file_paths(pipeline_id, generation)
+        if not (vec_path.exists() and ids_path.exists()):
+            return None
+        # ids 파일 마지막 값은 max_embedding_id 입니다(저장 시 덧붙임).
+        ids = np.load(ids_path)
+        matrix = np.load(vec_path, mmap_mode="r")
+        return PipelineMatrix(chunk_ids=ids[:-1], matrix=matrix, max_embedding_id=int(ids[-1]), generation=generation)
+
+    def _save_file(self, pipeline_id: int, entry: PipelineMatrix) -> PipelineMatrix:
+        """행렬을 파일로 저장하고 메모리 매핑한 항목을 돌려줍니다. 이전 세대 파일은 지웁니다."""
+
+        if self.directory is None:
+            return entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        vec_path, ids_path = self._file_paths(pipeline_id, entry.generation)
+        for path, array in (
+            (vec_path, entry.matrix),
+            (ids_path, np.append(entry.chunk_ids, entry.max_embedding_id)),
+        ):
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp, "wb") as handle:
+                np.save(handle, array)
+            os.replace(tmp, path)
+        # 다른 워커가 매핑 중인 예전 파일도 지워도 됩니다(열린 매핑은 닫힐 때까지 유지).
+        for old in self.directory.glob(f"p{pipeline_id}-g*.npy"):
+            if old not in (vec_path, ids_path):
+                old.unlink(missing_ok=True)
+        return self._load_file(pipeline_id, entry.generation) or entry
+
+    async def load(self, session: AsyncSession, pipeline_id: int) -> PipelineMatrix | None:
+        """파이프라인 행렬을 (파일 또는 DB에서) 올립니다. 너무 크면 None."""
+
+        generation = await self._generation(pipeline_id)
+        entry = self._load_file(pipeline_id, generation)
+        if entry is None:
+            count = (
+                await session.execute(
+                    sa.text("SELECT count(*) FROM embeddings WHERE pipeline_id = :pid"), {"pid": pipeline_id}
+                )
+            ).scalar_one()
+            if count > self.max_rows:
+                self._too_large[pipeline_id] = generation
+                return None
+            ids, matrix, max_id = await self._fetch(session, pipeline_id)
+            entry = self._save_file(
+                pipeline_id,
+                PipelineMatrix(chunk_ids=ids, matrix=matrix, max_embedding_id=max_id, generation=generation),
+            )
+        entry.checked_at = time.monotonic()
+        self._put(pipeline_id, entry)
+        LOGGER.info("메모리 인덱스 적재", extra={"pipeline_id": pipeline_id, "rows": len(entry.chunk_ids)})
+        return entry
+
+    async def refresh(self, session: AsyncSession, pipeline_id: int) -> None:
+        """세대가 바뀐 파이프라인을 갱신합니다: 새 행만 덧붙이고, 행 수가 다르면 다시 적재."""
+
+        entry = self._entries.get(pipeline_id)
+        if entry is None:
+            await self.load(session, pipeline_id)
+            return
+        generation = await self._generation(pipeline_id)
+        ids, vectors, max_id = await self._fetch(session, pipeline_id, after_id=entry.max_embedding_id)
+        count = (
+            await session.execute(sa.text("SELECT count(*) FROM embeddings WHERE pipeline_id = :pid"), {"pid": pipeline_id})
+        ).scalar_one()
+        if len(entry.chunk_ids) + len(ids) != count or count > self.max_rows:
+            # 삭제/재인덱싱 또는 늦게 커밋된 작은 id 행이 있으면 이어 붙이기로는 맞출 수 없습니다.
+            self.invalidate(pipeline_id)
+            await self.load(session, pipeline_id)
+            return
+        self.append(pipeline_id, ids, vectors, max_id)
+        updated = self._entries.get(pipeline_id)
+        if updated is not None:
+            updated.generation = generation
+            updated.checked_at = time.monotonic()
+            if self.directory is not None:
+                self._entries[pipeline_id] = self._save_file(pipeline_id, updated)
+
+    def _schedule(self, pipeline_id: int, stale: bool) -> None:
+        if pipeline_id in self._loading:
+            return
+
+        async def _run() -> None:
+            try:
+                async with get_session() as session:
+                    if stale:
+                        await self.refresh(session, pipeline_id)
+                    else:
+                        await self.load(session, pipeline_id)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.warning("메모리 인덱스 적재 실패", exc_info=True, extra={"pipeline_id": pipeline_id})
+            finally:
+                self._loading.pop(pipeline_id, None)
+
+        self._loading[pipeline_id] = asyncio.get_running_loop().create_task(_run())
+
+    async def _fresh_entry(self, pipeline_id: int) -> PipelineMatrix | None:
+        entry = self._entries.get(pipeline_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry.checked_at < self.check_seconds:
+            return entry
+        try:
+            generation = await self._generation(pipeline_id)
+        except Exception:  # pylint: disable=broad-except
+            # 최신 여부를 알 수 없으면 pgvector 로 답합니다(오래된 결과 방지).
+            LOGGER.warning("메모리 인덱스 세대 조회 실패", exc_info=True)
+            return None
+        if generation != entry.generation:
+            return None
+        entry.checked_at = now
+        return entry
+
+    async def _still_too_large(self, pipeline_id: int) -> bool:
+        if pipeline_id not in self._too_large:
+            return False
+        try:
+            generation = await self._generation(pipeline_id)
+        except Exception:  # pylint: disable=broad-except
+            return True
+        if generation == self._too_large[pipeline_id]:
+            return True
+        # 벡터가 바뀌었으면(삭제 등으로 줄었을 수 있음) 다시 적재를 시도합니다.
+        del self._too_large[pipeline_id]
+        return False
+
+    # ------------------------------------------------------------------ 검색
+    async def search(
+        self,
+        session: AsyncSession,
+        pipeline_id: int,
+        embedding: Sequence[float],
+        top_k: int,
+        threshold: float,
+        dedup: bool = False,
+        fetch_k: int | None = None,
+    ) -> list[QuerySource] | None:
+        """메모리에서 검색합니다. 아직 없거나 갱신 중이면 None(호출자가 pgvector 사용).
+
+        dedup 이면 fetch_k 개 후보 중 같은 내용(chunks.hash)은 점수가 가장 높은 하나만 남깁니다.
+        """
+
+        pid = int(pipeline_id)
+        if await self._still_too_large(pid):
+            MEMORY_LOOKUPS.labels("too_large").inc()
+            return None
+        entry = await self._fresh_entry(pid)
+        if entry is None:
+            stale = pid in self._entries
+            MEMORY_LOOKUPS.labels("stale" if stale else "miss").inc()
+            self._schedule(pid, stale=stale)
+            return None
+        self._entries.move_to_end(pid)
+        MEMORY_LOOKUPS.labels("hit").inc()
+
+        query = self._prepare(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        chunk_ids, scores = entry.top_k(query, max(fetch_k or top_k, top_k) if dedup else top_k)
+        keep = scores >= threshold
+        chunk_ids, scores = chunk_ids[keep], scores[keep]
+        if not len(chunk_ids):
+            return []
+        # 후보는 점수 내림차순이므로 array_position 이 작은 것이 같은 hash 중 최고점입니다.
+        distinct = "DISTINCT ON (hash)" if dedup else ""
+        result = await session.execute(
+            sa.text(
+                f"""
+                SELECT {distinct} id, text
+                FROM chunks
+                WHERE id = ANY(CAST(:ids AS integer[]))
+                ORDER BY {"hash, " if dedup else ""}array_position(CAST(:ids AS integer[]), id)
+                """
+            ),
+            {"ids": chunk_ids.tolist()},
+        )
+        texts = {row.id: row.text for row in result}
+        sources = [
+            QuerySource(chunk_id=int(cid), text=texts[int(cid)], score=float(score))
+            for cid, score in zip(chunk_ids, scores)
+            if int(cid) in texts
+        ]
+        return sources[:top_k]
+
+
+memory_index: MemoryVectorIndex | None = (
+    MemoryVectorIndex(
+        budget_bytes=settings.memory_index_budget_mb * 1024 * 1024,
+        max_rows=settings.memory_index_max_rows,
+        check_seconds=settings.memory_index_check_seconds,
+        directory=settings.memory_index_dir,
+        normalize=index_spec_from_settings().metric == "cosine",
+    )
+    if settings.memory_index_enabled
+    else None
+)
+
+__all__ = [
+    "MemoryVectorIndex",
+    "PipelineMatrix",
+    "generation_key",
+    "memory_index",
+    "notify_pipeline_changed",
+]
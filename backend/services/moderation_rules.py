@@ -1,17 +1,24 @@
-"""금칙 카테고리 정규식.
+"""금칙 카테고리 키워드.
 
 비전공자 팁: 욕설/증오/자해 등의 키워드를 탐지합니다.
+키워드는 단어 단위로, 대소문자 구분 없이 찾습니다.
 """
 from __future__ import annotations
 
 import re
 
+CATEGORY_TERMS = {
+    "욕설": ("욕설", "damn", "hell"),
+    "증오": ("hate", "증오"),
+    "성인": ("adult", "19금"),
+    "자해": ("self-harm", "자해"),
+    "불법": ("illegal", "불법"),
+}
+
+# 카테고리별 정규식(개별 검사용). 가드레일은 text_scanner 의 단일 패스 스캐너를 씁니다.
 CATEGORY_PATTERNS = {
-    "욕설": re.compile(r"\b(욕설|damn|hell)\b", re.IGNORECASE),
-    "증오": re.compile(r"\b(hate|증오)\b", re.IGNORECASE),
-    "성인": re.compile(r"\b(adult|19금)\b", re.IGNORECASE),
-    "자해": re.compile(r"\b(self-harm|자해)\b", re.IGNORECASE),
-    "불법": re.compile(r"\b(illegal|불법)\b", re.IGNORECASE),
+    category: re.compile(r"\b(" + "|".join(map(re.escape, terms)) + r")\b", re.IGNORECASE)
+    for category, terms in CATEGORY_TERMS.items()
 }
 
-__all__ = ["CATEGORY_PATTERNS"]
+__all__ = ["CATEGORY_PATTERNS", "CATEGORY_TERMS"]
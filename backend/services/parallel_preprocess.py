@@ -0,0 +1,140 @@
+"""여러 CPU 코어로 나눠 하는 문서 전처리.
+
+비전공자 팁: 정규화/PII 마스킹은 정규식 작업이라 파이썬 스레드로는 동시에 돌지 않습니다(GIL).
+큰 문서는 안전한 경계(`preprocess.safe_cut`: 공백, PII 한가운데가 아닌 곳)에서 구간으로 나눠
+프로세스 풀에 보내고, 돌아온 결과를 원래 순서대로 이어 붙입니다. 작은 문서는 프로세스 간
+복사 비용이 더 크므로 지금처럼 한 프로세스 안에서 처리합니다(PREPROCESS_PARALLEL_MIN_BYTES).
+
+풀은 워커 프로세스마다 하나를 만들어 재사용하고, 프로세스가 끝날 때 닫습니다(workers/lifecycle.py).
+Celery prefork 자식은 데몬 프로세스라 자식 프로세스를 만들 수 없으므로, 인덱싱 태스크는 index 큐로 보내고
+그 큐의 워커를 `-P solo` 로 띄웁니다(docker-compose.yml, infra/k8s/worker-deploy.yml). 그래도 데몬
+프로세스에서 불리면 경고를 한 번 남기고 한 프로세스로 처리합니다.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator
+
+from backend.deps.settings import settings
+from backend.services.preprocess import (
+    PreprocessResult,
+    StreamingPreprocessor,
+    detect_language,
+    iter_raw_segments,
+    preprocess,
+    process_segment,
+    regex_filter,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# preprocess_parallel 이 문서를 나누는 구간 크기(글자)
+SEGMENT_CHARS = 1024 * 1024
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_daemon_warned = False
+
+
+def _worker_count() -> int:
+    return settings.preprocess_workers or os.cpu_count() or 1
+
+
+def get_preprocess_pool() -> Executor | None:
+    """현재 프로세스의 전처리 프로세스 풀. 비활성(워커 1개 이하)이거나 만들 수 없으면 None."""
+
+    global _pool, _pool_pid, _daemon_warned  # pylint: disable=global-statement
+    workers = _worker_count()
+    if workers <= 1:
+        return None
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    if multiprocessing.current_process().daemon:
+        if not _daemon_warned:
+            LOGGER.warning(
+                "데몬 프로세스(Celery prefork 자식)에서는 전처리 프로세스 풀을 만들 수 없어 한 프로세스로 처리합니다. "
+                "인덱싱 워커는 -P solo -Q index 로 실행하세요"
+            )
+            _daemon_warned = True
+        return None
+    # 이벤트 루프/DB 커넥션을 가진 프로세스를 fork 하지 않도록 spawn 으로 띄웁니다.
+    _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_preprocess_pool() -> None:
+    global _pool  # pylint: disable=global-statement
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+
+
+class ParallelPreprocessor(StreamingPreprocessor):
+    """`StreamingPreprocessor.text` 와 같은 구간 스트림을 만들되, 구간 전처리를 풀에서 실행합니다.
+
+    결과 순서를 지키면서 최대 max_pending 개 구간을 미리 보내 두므로 메모리에는 구간 몇 개만 남습니다.
+    """
+
+    def __init__(self, executor: Executor, max_pending: int | None = None) -> None:
+        super().__init__()
+        self._executor = executor
+        self._max_pending = max_pending or _worker_count() * 2
+
+    def text(self, parts: Iterable[str]) -> Iterator[str]:
+        pending: deque[Future[tuple[str, bool]]] = deque()
+        for raw in iter_raw_segments(parts):
+            pending.append(self._executor.submit(process_segment, raw))
+            if len(pending) >= self._max_pending:
+                yield from self._accept(*pending.popleft().result())
+        while pending:
+            yield from self._accept(*pending.popleft().result())
+
+
+def streaming_preprocessor(size_bytes: int | None) -> StreamingPreprocessor:
+    """문서 크기가 기준 이상이고 풀을 쓸 수 있으면 병렬 전처리기, 아니면 한 프로세스 전처리기."""
+
+    if size_bytes is not None and size_bytes >= settings.preprocess_parallel_min_bytes:
+        pool = get_preprocess_pool()
+        if pool is not None:
+            return ParallelPreprocessor(pool)
+    return StreamingPreprocessor()
+
+
+def preprocess_parallel(
+    text: str,
+    custom_patterns: Iterable[str] | None = None,
+    executor: Executor | None = None,
+) -> PreprocessResult:
+    """`preprocess` 와 같은 결과를 구간별 병렬 처리로 만듭니다. 기준보다 작은 문서는 그대로 `preprocess`.
+
+    사용자 정의 패턴은 구간 경계를 넘을 수 있으므로 이어 붙인 뒤 한 번에 적용합니다.
+    """
+
+    # 이미 메모리에 있는 문자열이므로 바이트 대신 글자 수로 기준과 비교합니다.
+    if len(text) < settings.preprocess_parallel_min_bytes:
+        return preprocess(text, custom_patterns)
+    pool = executor or get_preprocess_pool()
+    if pool is None:
+        return preprocess(text, custom_patterns)
+    parts = (text[start : start + SEGMENT_CHARS] for start in range(0, len(text), SEGMENT_CHARS))
+    results = list(pool.map(partial(process_segment, layout=False), iter_raw_segments(parts)))
+    stitched = "".join(processed for processed, _ in results).strip()
+    if custom_patterns:
+        filtered = regex_filter(stitched, custom_patterns)
+        return PreprocessResult(text=filtered, language=detect_language(filtered))
+    return PreprocessResult(text=stitched, language="ko" if any(korean for _, korean in results) else "en")
+
+
+__all__ = [
+    "ParallelPreprocessor",
+    "get_preprocess_pool",
+    "preprocess_parallel",
+    "shutdown_preprocess_pool",
+    "streaming_preprocessor",
+]
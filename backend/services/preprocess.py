@@ -6,11 +6,13 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from backend.services import pii_rules
+from backend.services.text_scanner import scanner
 
 WHITESPACE_RE = re.compile(r"[\u00A0\s]+")
+# 구간 경계를 가로지르는 PII 를 찾아볼 범위(글자). PII 한 건은 이보다 짧다고 봅니다.
+SEAM_WINDOW = 512
 
 
 @dataclass
@@ -26,6 +28,21 @@ def normalize_text(text: str) -> str:
     return cleaned.strip()
 
 
+def _layout_space(match: re.Match[str]) -> str:
+    newlines = match.group().count("\n")
+    return "\n\n" if newlines >= 2 else "\n" if newlines else " "
+
+
+def normalize_layout(text: str) -> str:
+    """`normalize_text` 와 같되 문단(빈 줄)과 줄바꿈은 남깁니다(문장/문단 경계 청킹용).
+
+    공백 덩어리 하나를 그 안의 줄바꿈 수에 따라 빈 줄/줄바꿈/공백 하나로 바꾸므로,
+    공백 덩어리를 자르지 않는 한 구간별로 적용해도 전체에 적용한 것과 같습니다.
+    """
+
+    return WHITESPACE_RE.sub(_layout_space, text)
+
+
 def detect_language(text: str) -> str:
     """간단한 언어 감지.
 
@@ -44,12 +61,9 @@ def preserve_tables_and_code(text: str) -> str:
 
 
 def mask_pii(text: str) -> str:
-    """PII(개인식별정보)를 정규식으로 치환합니다."""
+    """PII(개인식별정보)를 정규식으로 치환합니다(모든 규칙을 한 번에 훑음)."""
 
-    masked = text
-    for pattern, replacement in pii_rules.PII_PATTERNS:
-        masked = re.sub(pattern, replacement, masked)
-    return masked
+    return scanner.mask(text)
 
 
 def regex_filter(text: str, patterns: Iterable[str]) -> str:
@@ -61,6 +75,146 @@ def regex_filter(text: str, patterns: Iterable[str]) -> str:
     return filtered
 
 
+def iter_word_segments(parts: Iterable[str]) -> Iterator[str]:
+    """조각난 텍스트 스트림을 '완전한 단어'로만 이루어진 정규화 구간으로 묶어 반환합니다.
+
+    조각 끝에 걸친 미완성 단어는 다음 조각 앞에 이어 붙입니다(tail carry).
+    """
+
+    tail = ""
+    for part in parts:
+        text = tail + part
+        if not text:
+            continue
+        if text[-1].isspace():
+            head, tail = text, ""
+        else:
+            pieces = text.rsplit(maxsplit=1)
+            head, tail = (pieces[0], pieces[1]) if len(pieces) == 2 else ("", pieces[0] if pieces else "")
+        segment = normalize_text(head)
+        if segment:
+            yield segment
+    segment = normalize_text(tail)
+    if segment:
+        yield segment
+
+
+def _whitespace_run_start(text: str, end: int) -> int:
+    """text[:end] 의 마지막 공백 덩어리 시작 위치(그 뒤 미완성 단어는 건너뜀). 공백이 없으면 0."""
+
+    cut = end
+    while cut > 0 and not text[cut - 1].isspace():
+        cut -= 1
+    while cut > 0 and text[cut - 1].isspace():
+        cut -= 1
+    return cut
+
+
+def safe_cut(text: str) -> int:
+    """text 를 앞뒤로 나눠 따로 전처리해도 되는 가장 뒤쪽 위치.
+
+    공백 덩어리 시작에서 자르되, 그 자리를 가로지르는 PII 매치가 있으면(공백을 포함하는 규칙)
+    매치 앞 공백으로 물러납니다. 그래서 구간마다 마스킹해도 전체를 한 번에 마스킹한 것과 같습니다.
+    뒤에 올 글자가 매치를 완성할 수 있으므로 끝에서 SEAM_WINDOW 글자 안쪽에서는 자르지 않습니다.
+    """
+
+    cut = _whitespace_run_start(text, max(len(text) - SEAM_WINDOW, 0))
+    while cut > 0:
+        start = scanner.pii_crossing(text, cut, SEAM_WINDOW)
+        if start is None:
+            break
+        cut = _whitespace_run_start(text, start)
+    return cut
+
+
+def iter_raw_segments(parts: Iterable[str]) -> Iterator[str]:
+    """조각난 텍스트 스트림을 `safe_cut` 위치에서 나눈 원문 구간으로 묶어 반환합니다(정규화 전).
+
+    마지막 구간을 뺀 모든 구간은 공백이 아닌 글자로 끝나고, 공백 덩어리는 한 구간 안에만 있습니다.
+    """
+
+    tail = ""
+    for part in parts:
+        text = tail + part
+        cut = safe_cut(text)
+        head, tail = text[:cut], text[cut:]
+        if head:
+            yield head
+    if tail:
+        yield tail
+
+
+def process_segment(segment: str, layout: bool = True) -> tuple[str, bool]:
+    """원문 구간 하나를 전처리합니다(정규화 → 코드 치환 → PII 마스킹). (결과, 한국어 포함 여부).
+
+    layout 이면 줄바꿈/문단을 남기고(`normalize_layout`), 아니면 공백 하나로 폅니다.
+    앞뒤 공백은 자르지 않으므로 이어 붙인 뒤 호출자가 문서 양 끝만 정리합니다.
+    프로세스 풀에서 실행할 수 있도록 모듈 수준 함수로 둡니다.
+    """
+
+    normalized = normalize_layout(segment) if layout else WHITESPACE_RE.sub(" ", segment)
+    processed = mask_pii(preserve_tables_and_code(normalized))
+    return processed, detect_language(processed) == "ko"
+
+
+def iter_text_segments(parts: Iterable[str]) -> Iterator[str]:
+    """조각난 텍스트 스트림을 `normalize_layout` 을 적용한 구간으로 묶어 반환합니다.
+
+    구간을 이어 붙이면 `normalize_layout(전체).strip()` 과 같습니다.
+    """
+
+    first = True
+    for raw in iter_raw_segments(parts):
+        segment = normalize_layout(raw).rstrip()
+        if first:
+            segment = segment.lstrip()
+        if segment:
+            first = False
+            yield segment
+
+
+class StreamingPreprocessor:
+    """`preprocess` 와 같은 결과를 단어 단위 스트림으로 만들어내는 전처리기.
+
+    코드 블록 치환과 PII 패턴은 구간 경계(`safe_cut`)를 넘지 않으므로 구간마다
+    적용해도 전체 문서에 한 번에 적용한 것과 결과가 같습니다.
+    언어는 스트림을 끝까지 소비한 뒤 `language` 로 확인합니다.
+    """
+
+    def __init__(self) -> None:
+        self.language = "en"
+        self._started = False
+
+    def words(self, parts: Iterable[str]) -> Iterator[str]:
+        for segment in iter_word_segments(parts):
+            yield from self._process(segment).split()
+
+    def text(self, parts: Iterable[str]) -> Iterator[str]:
+        """줄바꿈/문단을 유지한 전처리 구간 스트림(`OffsetChunker.iter_chunks` 입력)."""
+
+        for raw in iter_raw_segments(parts):
+            yield from self._accept(*process_segment(raw))
+
+    def _accept(self, processed: str, korean: bool) -> Iterator[str]:
+        """처리된 구간의 문서 앞 공백/끝 공백을 정리하고 언어를 갱신합니다."""
+
+        if korean:
+            self.language = "ko"
+        # 마지막이 아닌 구간은 공백이 아닌 글자로 끝나므로 rstrip 은 문서 끝에서만 효과가 있습니다.
+        processed = processed.rstrip()
+        if not self._started:
+            processed = processed.lstrip()
+        if processed:
+            self._started = True
+            yield processed
+
+    def _process(self, segment: str) -> str:
+        processed = mask_pii(preserve_tables_and_code(segment))
+        if self.language != "ko" and detect_language(processed) == "ko":
+            self.language = "ko"
+        return processed
+
+
 def preprocess(text: str, custom_patterns: Iterable[str] | None = None) -> PreprocessResult:
     """전처리 전체 파이프라인."""
 
@@ -72,4 +226,14 @@ def preprocess(text: str, custom_patterns: Iterable[str] | None = None) -> Prepr
     return PreprocessResult(text=filtered, language=language)
 
 
-__all__ = ["preprocess", "PreprocessResult"]
+__all__ = [
+    "preprocess",
+    "PreprocessResult",
+    "StreamingPreprocessor",
+    "iter_raw_segments",
+    "iter_text_segments",
+    "iter_word_segments",
+    "normalize_layout",
+    "process_segment",
+    "safe_cut",
+]
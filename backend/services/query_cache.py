@@ -0,0 +1,128 @@
+"""질의 임베딩 캐시.
+
+비전공자 팁: 위젯에서는 같은 FAQ 질문이 반복해서 들어옵니다.
+질문 벡터를 프로세스 메모리(LRU)와 Redis(TTL)에 보관하면 임베딩 서비스 왕복 없이 바로 검색할 수 있습니다.
+같은 질문이 동시에 여러 번 들어오면 임베딩은 한 번만 요청하고 결과를 나눠 씁니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import numpy as np
+from prometheus_client import Counter
+
+from backend.deps.redis import get_redis
+from backend.deps.settings import settings
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = Counter("query_embedding_cache_total", "질의 임베딩 캐시 조회 결과", ["result"])
+
+_SPACES_RE = re.compile(r"\s+")
+
+EmbedFn = Callable[[str], Awaitable[list[float]]]
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키와 임베딩 입력에 쓰는 정규화(NFKC, 공백 정리)."""
+
+    return _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class QueryEmbeddingCache:
+    """프로세스 내 LRU + 선택적 Redis 계층 + 동시 요청 합치기(single-flight)."""
+
+    def __init__(self, max_entries: int = 1024, redis_ttl: int = 0) -> None:
+        self.max_entries = max(max_entries, 0)
+        self.redis_ttl = max(redis_ttl, 0)
+        self._local: OrderedDict[str, list[float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def key(model: str, normalized: str) -> str:
+        return f"qemb:{model}:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        if not self.max_entries:
+            return
+        self._local[key] = vector
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _redis_get(self, key: str) -> list[float] | None:
+        if not self.redis_ttl:
+            return None
+        try:
+            raw = await get_redis().get(key)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.warning("질의 캐시 Redis 조회 실패", exc_info=True)
+            return None
+        if not raw:
+            return None
+        return np.frombuffer(base64.b64decode(raw), dtype="<f4").tolist()
+
+    async def _redis_set(self, key: str, vector: list[float]) -> None:
+        if not self.redis_ttl:
+            return
+        payload = base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+        try:
+            await get_redis().set(key, payload, ex=self.redis_ttl)
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.warning("질의 캐시 Redis 저장 실패", exc_info=True)
+
+    async def get_or_embed(self, text: str, embed: EmbedFn, model: str = "gte-small") -> list[float]:
+        """캐시된 질의 벡터를 돌려주고, 없으면 embed(정규화된 질문)로 계산해 채웁니다."""
+
+        normalized = normalize_query(text)
+        key = self.key(model, normalized)
+        vector = self._local.get(key)
+        if vector is not None:
+            self._local.move_to_end(key)
+            CACHE_LOOKUPS.labels("local_hit").inc()
+            return vector
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            CACHE_LOOKUPS.labels("coalesced").inc()
+        else:
+            # 임베딩은 캐시가 소유한 태스크에서 돌립니다. 처음 요청한 쪽이 취소돼도(클라이언트 연결 끊김 등)
+            # 같은 질문을 기다리는 다른 요청은 결과를 받고, 끝난 결과는 캐시에 남습니다.
+            inflight = asyncio.get_running_loop().create_task(self._fill(key, normalized, embed))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda task: self._settle(key, task))
+        # shield: 기다리던 요청 하나가 취소돼도 공유 태스크는 취소하지 않습니다.
+        return await asyncio.shield(inflight)
+
+    async def _fill(self, key: str, normalized: str, embed: EmbedFn) -> list[float]:
+        vector = await self._redis_get(key)
+        if vector is not None:
+            CACHE_LOOKUPS.labels("redis_hit").inc()
+        else:
+            CACHE_LOOKUPS.labels("miss").inc()
+            vector = await embed(normalized)
+            await self._redis_set(key, vector)
+        self._remember(key, vector)
+        return vector
+
+    def _settle(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 대기자가 모두 떠났으면 "never retrieved" 경고가 나지 않도록 예외를 소비합니다.
+        if not task.cancelled():
+            task.exception()
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=settings.query_cache_size,
+    redis_ttl=settings.query_cache_redis_ttl,
+)
+
+__all__ = ["QueryEmbeddingCache", "normalize_query", "query_embedding_cache"]
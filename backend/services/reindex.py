@@ -0,0 +1,293 @@
+"""파이프라인 전체 재인덱싱 실행 상태와 한 번에 바꾸기(switch-over).
+
+비전공자 팁: 임베딩 모델이나 청크 크기를 바꾸면 파이프라인의 모든 파일을 다시 인덱싱해야 합니다.
+파일마다 바로 기존 청크를 지우고 새로 넣으면, 작업 도중 질의는 절반은 옛 벡터·절반은 새 벡터인
+검색 결과를 보게 됩니다. 그래서 새 문서는 "대기" 상태(documents.meta.reindex_run, embeddings.pipeline_id
+NULL)로 만들어 검색에 보이지 않게 두고, 모든 파일이 성공하면 한 트랜잭션에서 새 벡터를 파이프라인에
+붙이고 옛 문서를 지웁니다. 하나라도 실패하면 대기 문서만 지우고 기존 인덱스를 그대로 씁니다.
+
+진행 상황은 reindex_runs 테이블(total, done, status)에 남으며 GET /pipelines/{id}/reindex 로 조회합니다.
+큐에 넣지 못했거나 콜백이 끝내 오지 않아 running 으로 남은 실행은 취소(POST /pipelines/{id}/reindex/cancel)
+하거나, 진행(updated_at)이 REINDEX_STALE_SECONDS 동안 없으면 다음 재인덱싱 요청 때 failed 로 정리됩니다.
+"""
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass
+from typing import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_RUN_COLUMNS = "id, pipeline_id, status, total, done, error, created_at, finished_at, dispatched_at"
+
+# 파이프라인마다 진행 중인 실행은 하나뿐입니다(uq_reindex_runs_running 부분 고유 인덱스).
+_CREATE_RUN_SQL = sa.text(
+    f"""
+    INSERT INTO reindex_runs (pipeline_id, status)
+    VALUES (:pid, '{RUNNING}')
+    ON CONFLICT (pipeline_id) WHERE status = '{RUNNING}' DO NOTHING
+    RETURNING id
+    """
+)
+
+# 인덱싱을 마친 현재(대기 중이 아닌) 문서의 파일들
+_PIPELINE_FILES_SQL = sa.text(
+    """
+    SELECT DISTINCT file_id
+    FROM documents
+    WHERE meta ->> 'pipeline_id' = CAST(:pid AS text) AND meta ->> 'reindex_run' IS NULL
+      AND indexed_at IS NOT NULL AND file_id IS NOT NULL
+    ORDER BY file_id
+    """
+)
+
+_STAGED_DOCS = "SELECT id FROM documents WHERE meta ->> 'reindex_run' = CAST(:run AS text)"
+# 이번 실행이 새로 만든 파일의 옛 문서만 바꿉니다(실행 중 새로 올라온 파일의 문서는 그대로 둡니다).
+_REPLACED_DOCS = """
+    SELECT d.id FROM documents d
+    WHERE d.meta ->> 'pipeline_id' = CAST(:pid AS text) AND d.meta ->> 'reindex_run' IS NULL
+      AND d.file_id IN (SELECT s.file_id FROM documents s WHERE s.meta ->> 'reindex_run' = CAST(:run AS text))
+"""
+
+
+def _delete_documents_sql(documents: str) -> list[sa.TextClause]:
+    return [
+        sa.text(
+            f"DELETE FROM embeddings WHERE chunk_id IN (SELECT id FROM chunks WHERE document_id IN ({documents}))"
+        ),
+        sa.text(f"DELETE FROM chunks WHERE document_id IN ({documents})"),
+        sa.text(f"DELETE FROM documents WHERE id IN ({documents})"),
+    ]
+
+
+@dataclass
+class ReindexRun:
+    id: int
+    pipeline_id: int
+    status: str
+    total: int | None
+    done: int
+    error: str | None
+    created_at: dt.datetime
+    finished_at: dt.datetime | None
+    dispatched_at: dt.datetime | None = None
+
+
+def split_lanes(file_ids: Sequence[int], lanes: int) -> list[list[int]]:
+    """파일을 최대 lanes 개의 줄로 고르게 나눕니다. 줄마다 차례로 실행하므로 동시 실행 수가 lanes 로 묶입니다."""
+
+    count = max(min(lanes, len(file_ids)), 1)
+    split = [list(file_ids[start::count]) for start in range(count)]
+    return [lane for lane in split if lane]
+
+
+async def create_run(session: AsyncSession, pipeline_id: int) -> int | None:
+    """새 실행을 만들고 id 를 반환합니다. 이미 진행 중인 실행이 있으면 None."""
+
+    return (await session.execute(_CREATE_RUN_SQL, {"pid": pipeline_id})).scalar_one_or_none()
+
+
+async def claim_dispatch(session: AsyncSession, run_id: int) -> bool:
+    """실행의 파일 태스크를 보낼 권한을 한 번만 얻습니다. 이미 보냈거나 진행 중이 아니면 False.
+
+    acks_late 로 reindex_pipeline 이 다시 배달돼도 같은 실행에 chord 를 두 번 보내지 않게 합니다.
+    """
+
+    claimed = await session.execute(
+        sa.text(
+            f"""
+            UPDATE reindex_runs SET dispatched_at = NOW(), updated_at = NOW()
+            WHERE id = :run AND status = '{RUNNING}' AND dispatched_at IS NULL
+            RETURNING id
+            """
+        ),
+        {"run": run_id},
+    )
+    return claimed.scalar_one_or_none() is not None
+
+
+async def pipeline_file_ids(session: AsyncSession, pipeline_id: int) -> list[int]:
+    rows = await session.execute(_PIPELINE_FILES_SQL, {"pid": str(pipeline_id)})
+    return [row.file_id for row in rows]
+
+
+async def set_total(session: AsyncSession, run_id: int, total: int) -> None:
+    await session.execute(
+        sa.text("UPDATE reindex_runs SET total = :total, updated_at = NOW() WHERE id = :run"),
+        {"total": total, "run": run_id},
+    )
+
+
+async def get_run(session: AsyncSession, run_id: int) -> ReindexRun | None:
+    row = (
+        await session.execute(sa.text(f"SELECT {_RUN_COLUMNS} FROM reindex_runs WHERE id = :run"), {"run": run_id})
+    ).fetchone()
+    return ReindexRun(**row._mapping) if row else None
+
+
+async def latest_run(session: AsyncSession, pipeline_id: int) -> ReindexRun | None:
+    row = (
+        await session.execute(
+            sa.text(f"SELECT {_RUN_COLUMNS} FROM reindex_runs WHERE pipeline_id = :pid ORDER BY id DESC LIMIT 1"),
+            {"pid": pipeline_id},
+        )
+    ).fetchone()
+    return ReindexRun(**row._mapping) if row else None
+
+
+async def file_staged(session: AsyncSession, run_id: int, file_id: int) -> bool:
+    """이 실행에서 파일의 대기 문서를 이미 끝냈는지(중복 배달된 태스크 건너뛰기용)."""
+
+    row = await session.execute(
+        sa.text(
+            """
+            SELECT 1 FROM documents
+            WHERE file_id = :fid AND meta ->> 'reindex_run' = CAST(:run AS text) AND indexed_at IS NOT NULL
+            LIMIT 1
+            """
+        ),
+        {"fid": file_id, "run": str(run_id)},
+    )
+    return row.fetchone() is not None
+
+
+async def record_file_done(session: AsyncSession, run_id: int) -> None:
+    """파일 하나 완료. 대기 문서 완료와 같은 트랜잭션에서 호출하므로 재시도해도 두 번 세지 않습니다."""
+
+    await session.execute(
+        sa.text("UPDATE reindex_runs SET done = done + 1, updated_at = NOW() WHERE id = :run"), {"run": run_id}
+    )
+
+
+async def switch_over(session: AsyncSession, run_id: int) -> int | None:
+    """대기 문서를 파이프라인에 붙이고 옛 문서를 지운 뒤 실행을 done 으로 표시합니다. 커밋은 호출자가 합니다.
+
+    진행 중인 실행이 아니면(이미 끝났거나 실패) 아무것도 하지 않고 None, 아니면 pipeline_id 를 반환합니다.
+    대기 문서를 마친 파일 수가 실행의 total 과 다르면 바꾸지 않고 실행을 버립니다(discard_run). 일부 파일만
+    새 모델로 바뀐 인덱스가 되지 않게 하려는 것입니다.
+    """
+
+    run = (
+        await session.execute(
+            sa.text(f"SELECT pipeline_id, total FROM reindex_runs WHERE id = :run AND status = '{RUNNING}' FOR UPDATE"),
+            {"run": run_id},
+        )
+    ).fetchone()
+    if run is None:
+        return None
+    staged = (
+        await session.execute(
+            sa.text(
+                """
+                SELECT count(DISTINCT file_id) FROM documents
+                WHERE meta ->> 'reindex_run' = CAST(:run AS text) AND indexed_at IS NOT NULL
+                """
+            ),
+            {"run": str(run_id)},
+        )
+    ).scalar_one()
+    if staged != (run.total or 0):
+        await discard_run(session, run_id, f"incomplete: staged {staged} of {run.total or 0} files")
+        return None
+    pipeline_id = run.pipeline_id
+    params = {"run": str(run_id), "pid": str(pipeline_id)}
+    await session.execute(
+        sa.text(
+            f"""
+            UPDATE embeddings e
+            SET pipeline_id = :pipeline_id
+            FROM chunks c
+            WHERE e.chunk_id = c.id AND c.document_id IN ({_STAGED_DOCS})
+            """
+        ),
+        {**params, "pipeline_id": pipeline_id},
+    )
+    for statement in _delete_documents_sql(_REPLACED_DOCS):
+        await session.execute(statement, params)
+    await session.execute(
+        sa.text(f"UPDATE documents SET meta = meta - 'reindex_run' WHERE id IN ({_STAGED_DOCS})"), params
+    )
+    await session.execute(
+        sa.text(f"UPDATE reindex_runs SET status = '{DONE}', finished_at = NOW() WHERE id = :run"), {"run": run_id}
+    )
+    return pipeline_id
+
+
+async def running_run(session: AsyncSession, pipeline_id: int) -> int | None:
+    """파이프라인의 진행 중인 실행 id. 없으면 None."""
+
+    return (
+        await session.execute(
+            sa.text(f"SELECT id FROM reindex_runs WHERE pipeline_id = :pid AND status = '{RUNNING}'"),
+            {"pid": pipeline_id},
+        )
+    ).scalar_one_or_none()
+
+
+async def expire_stale_run(session: AsyncSession, pipeline_id: int, stale_seconds: int) -> int | None:
+    """진행이 stale_seconds 동안 없는 running 실행을 failed 로 정리하고 그 id 를 반환합니다(없으면 None).
+
+    큐잉이 실패했거나 chord 콜백이 오지 않아 남은 실행이 새 재인덱싱을 영원히 막지 않게 합니다.
+    """
+
+    run_id = (
+        await session.execute(
+            sa.text(
+                f"""
+                SELECT id FROM reindex_runs
+                WHERE pipeline_id = :pid AND status = '{RUNNING}'
+                  AND updated_at < NOW() - make_interval(secs => :stale)
+                FOR UPDATE SKIP LOCKED
+                """
+            ),
+            {"pid": pipeline_id, "stale": float(stale_seconds)},
+        )
+    ).scalar_one_or_none()
+    if run_id is not None:
+        await discard_run(session, run_id, "stale: no progress")
+    return run_id
+
+
+async def discard_run(session: AsyncSession, run_id: int, error: str) -> None:
+    """실패한 실행의 대기 문서를 지우고 failed 로 표시합니다. 기존 인덱스는 건드리지 않습니다.
+
+    이미 끝난 실행에 다시 불러도 됩니다(늦게 끝난 파일 태스크가 남긴 대기 문서만 지움).
+    """
+
+    for statement in _delete_documents_sql(_STAGED_DOCS):
+        await session.execute(statement, {"run": str(run_id)})
+    await session.execute(
+        sa.text(
+            f"""
+            UPDATE reindex_runs SET status = '{FAILED}', error = :error, finished_at = NOW(), updated_at = NOW()
+            WHERE id = :run AND status = '{RUNNING}'
+            """
+        ),
+        {"run": run_id, "error": error},
+    )
+
+
+__all__ = [
+    "DONE",
+    "FAILED",
+    "RUNNING",
+    "ReindexRun",
+    "claim_dispatch",
+    "create_run",
+    "discard_run",
+    "expire_stale_run",
+    "file_staged",
+    "get_run",
+    "latest_run",
+    "pipeline_file_ids",
+    "record_file_done",
+    "running_run",
+    "set_total",
+    "split_lanes",
+    "switch_over",
+]
@@ -0,0 +1,61 @@
+"""검색 결과 재정렬: MMR(Maximal Marginal Relevance).
+
+비전공자 팁: 슬라이딩 윈도 청크는 이웃끼리 120단어씩 겹치므로, 유사도 순으로만 고르면
+거의 같은 내용이 3~4개씩 뽑힙니다. MMR은 "질문과 비슷하면서 이미 고른 것과는 다른" 청크를
+하나씩 고릅니다. 같은 정보를 더 적은 청크로 담으면 LLM 프롬프트가 짧아져 답변도 빨라집니다.
+
+    MMR 점수 = λ × (질문과의 유사도) − (1 − λ) × (이미 고른 청크와의 최대 유사도)
+
+λ=1 이면 기존 유사도 순서와 같고(거의 같은 청크만 빠짐), 작을수록 다양성을 더 중시합니다.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+# 이미 고른 청크와 이 값 이상 비슷한 후보는 사실상 같은 내용이라 고르지 않습니다(컨텍스트 축소).
+DEFAULT_DUP_CUTOFF = 0.95
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def mmr_select(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_: float,
+    dup_cutoff: float = DEFAULT_DUP_CUTOFF,
+) -> list[int]:
+    """후보 행렬(n, dim)에서 MMR 순서로 최대 k개의 행 번호를 고릅니다.
+
+    후보 간 유사도 행렬을 한 번 계산하고, 단계마다 "고른 것과의 최대 유사도" 배열을 갱신하므로
+    반복은 k번, 각 반복은 길이 n 의 벡터 연산 한 번입니다.
+    """
+
+    n = candidates.shape[0]
+    if n == 0 or k <= 0:
+        return []
+    cand = _normalize(np.asarray(candidates, dtype=np.float32))
+    relevance = cand @ _normalize(np.asarray(query, dtype=np.float32))
+    pairwise = cand @ cand.T
+
+    selected: list[int] = []
+    max_sim = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    for _ in range(min(k, n)):
+        redundancy = np.where(np.isfinite(max_sim), max_sim, 0.0)
+        scores = lambda_ * relevance - (1.0 - lambda_) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            break
+        selected.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, pairwise[best])
+        available &= max_sim < dup_cutoff
+    return selected
+
+
+__all__ = ["DEFAULT_DUP_CUTOFF", "mmr_select"]
@@ -1,52 +1,268 @@
-"""벡터 검색 서비스.
+"""벡터/하이브리드 검색 서비스.
 
 비전공자 팁: pgvector는 벡터 거리 계산을 데이터베이스에서 빠르게 수행합니다.
+검색 블록 설정의 method 가 search_hybrid 이면 키워드 검색(lexical)도 함께 돌려
+두 순위를 RRF(Reciprocal Rank Fusion)로 합칩니다. 점수 척도가 달라도 "몇 등인지"만 보므로 안전하게 섞입니다.
+mmr_lambda 를 설정하면 후보를 더 가져와 MMR(rerank.py)로 서로 다른 내용의 청크를 고릅니다.
 """
 from __future__ import annotations
 
-from typing import Sequence
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, replace
+from typing import Any, Sequence
 
+import numpy as np
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.deps.db import get_session
+from backend.deps.settings import settings
 from backend.models.schema import QuerySource
+from backend.services.index_store import parse_vector_literals, vector_literal
+from backend.services.lexical import lexical_search
+from backend.services.memory_index import memory_index
+from backend.services.rerank import DEFAULT_DUP_CUTOFF, mmr_select
+from backend.services.vector_index import index_spec_from_settings, tuning_statements
 
+LOGGER = logging.getLogger(__name__)
 
-async def search_similar_chunks(
+SEARCH_METHODS = ("search_knn", "search_hybrid")
+DEFAULT_RRF_K = 60
+# 하이브리드: 각 검색에서 top_k 의 몇 배만큼 후보를 가져와 합칠지
+DEFAULT_CANDIDATE_FACTOR = 4
+# 중복 제거 시 top_k 의 몇 배만큼 후보를 가져올지(같은 내용이 이보다 많이 겹치면 결과가 top_k 보다 적을 수 있음)
+DEDUP_OVERFETCH = 4
+
+
+@dataclass(frozen=True)
+class SearchConfig:
+    """파이프라인 search 블록 설정(blocks.config)."""
+
+    method: str = "search_knn"
+    rrf_k: int = DEFAULT_RRF_K
+    candidate_factor: int = DEFAULT_CANDIDATE_FACTOR
+    # MMR 재정렬 λ(0~1). None 이면 재정렬하지 않습니다.
+    mmr_lambda: float | None = None
+    mmr_dup_cutoff: float = DEFAULT_DUP_CUTOFF
+
+    @classmethod
+    def from_block(cls, config: dict[str, Any] | None) -> "SearchConfig":
+        config = config or {}
+        method = config.get("method", cls.method)
+        if method not in SEARCH_METHODS:
+            LOGGER.warning("알 수 없는 검색 방식, search_knn 사용", extra={"method": method})
+            method = cls.method
+        mmr_lambda = config.get("mmr_lambda")
+        return cls(
+            method=method,
+            rrf_k=int(config.get("rrf_k", DEFAULT_RRF_K)),
+            candidate_factor=max(int(config.get("candidate_factor", DEFAULT_CANDIDATE_FACTOR)), 1),
+            mmr_lambda=None if mmr_lambda is None else min(max(float(mmr_lambda), 0.0), 1.0),
+            mmr_dup_cutoff=float(config.get("mmr_dup_cutoff", DEFAULT_DUP_CUTOFF)),
+        )
+
+
+async def load_search_config(session: AsyncSession, pipeline_id: int) -> SearchConfig:
+    """파이프라인의 첫 search 블록 설정을 읽습니다. 블록이 없으면 기본값(search_knn)."""
+
+    result = await session.execute(
+        sa.text(
+            """
+            SELECT config FROM blocks
+            WHERE pipeline_id = :pid AND type_code = 'search'
+            ORDER BY order_no
+            LIMIT 1
+            """
+        ),
+        {"pid": pipeline_id},
+    )
+    row = result.fetchone()
+    config = row.config if row is not None else None
+    if isinstance(config, str):
+        config = json.loads(config)
+    return SearchConfig.from_block(config)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[QuerySource]], k: int = DEFAULT_RRF_K) -> list[QuerySource]:
+    """여러 순위 목록을 RRF 점수(Σ 1/(k + 순위))로 합칩니다. 반환 score 는 RRF 점수입니다."""
+
+    fused: dict[int, float] = {}
+    first_seen: dict[int, QuerySource] = {}
+    for ranking in rankings:
+        for rank, source in enumerate(ranking, start=1):
+            fused[source.chunk_id] = fused.get(source.chunk_id, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(source.chunk_id, source)
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        QuerySource(chunk_id=chunk_id, text=first_seen[chunk_id].text, score=score) for chunk_id, score in ordered
+    ]
+
+
+async def vector_search(
     session: AsyncSession,
     pipeline_id: int,
     embedding: list[float],
     top_k: int,
     threshold: float,
+    recall: float | None = None,
+    dedup: bool = True,
 ) -> Sequence[QuerySource]:
-    """pgvector 코사인 유사도 기반 검색."""
+    """pgvector 유사도 기반 검색.
+
+    pipeline_id 는 embeddings 의 정수 컬럼으로 필터링합니다. 값을 SQL 리터럴로 넣어야
+    prepared statement 에서도 플래너가 파이프라인 전용 부분 인덱스(vector_index)를 고를 수 있습니다.
+    거리 연산자는 인덱스 opclass 와 같은 VectorIndexSpec 에서 만들어 항상 인덱스를 탈 수 있습니다.
+    recall(0~1, 기본 SEARCH_RECALL)이 클수록 정확하고 느립니다.
+    MEMORY_INDEX_ENABLED 이면 메모리에 올라온 파이프라인은 NumPy 전수 검색으로 답합니다.
+
+    임계값과 중복 제거도 SQL 한 번에 처리합니다. 안쪽 질의는 인덱스 순서(거리순)로 후보를
+    top_k × DEDUP_OVERFETCH 개 가져오고, 바깥에서 같은 chunks.hash 중 가장 가까운 것만 남긴 뒤
+    임계값을 넘는 top_k 개를 돌려줍니다. 재업로드로 같은 청크가 여러 번 저장돼 있어도 서로 다른 결과가 채워집니다.
+    """
+
+    fetch = top_k * DEDUP_OVERFETCH if dedup else top_k
+    if memory_index is not None:
+        hit = await memory_index.search(session, pipeline_id, embedding, top_k, threshold, dedup=dedup, fetch_k=fetch)
+        if hit is not None:
+            return hit
 
+    spec = index_spec_from_settings()
+    pid = int(pipeline_id)
+    param = "CAST(:embedding AS vector)"
+    # SET LOCAL 은 현재 트랜잭션에만 적용되어 같은 커넥션의 다른 질의에 영향을 주지 않습니다.
+    for statement in tuning_statements(spec, settings.search_recall if recall is None else recall, fetch):
+        await session.execute(sa.text(statement))
+    # ORDER BY 거리 + LIMIT 만 있는 안쪽 질의여야 ANN 인덱스를 탑니다(DISTINCT ON 을 바로 쓰면 hash 정렬이 필요).
     query = sa.text(
-        """
-        SELECT c.id as chunk_id, c.text, 1 - (e.vec <#> :embedding) AS score
-        FROM embeddings e
-        JOIN chunks c ON c.id = e.chunk_id
-        JOIN documents d ON d.id = c.document_id
-        WHERE (:pipeline_id::text IS NULL) OR (d.meta ->> 'pipeline_id') = :pipeline_id::text
-        ORDER BY e.vec <#> :embedding
+        f"""
+        SELECT chunk_id, text, score
+        FROM (
+            SELECT candidates.*,
+                   row_number() OVER (PARTITION BY hash ORDER BY distance, chunk_id) AS dup_rank
+            FROM (
+                SELECT c.id AS chunk_id, c.text, c.hash,
+                       {spec.distance("e.vec", param)} AS distance,
+                       {spec.score("e.vec", param)} AS score
+                FROM embeddings e
+                JOIN chunks c ON c.id = e.chunk_id
+                WHERE e.pipeline_id = {pid}
+                ORDER BY {spec.distance("e.vec", param)}
+                LIMIT :fetch
+            ) AS candidates
+        ) AS ranked
+        WHERE score >= :threshold{" AND dup_rank = 1" if dedup else ""}
+        ORDER BY distance, chunk_id
         LIMIT :top_k
         """
     )
     rows = await session.execute(
         query,
         {
-            "embedding": embedding,
-            "pipeline_id": str(pipeline_id),
+            "embedding": vector_literal(embedding),
+            "fetch": fetch,
+            "threshold": threshold,
             "top_k": top_k,
         },
     )
-    sources = []
-    for row in rows:
-        score = row.score
-        if score is None or score < threshold:
-            continue
-        sources.append(QuerySource(chunk_id=row.chunk_id, text=row.text, score=float(score)))
-    return sources
+    return [QuerySource(chunk_id=row.chunk_id, text=row.text, score=float(row.score)) for row in rows]
+
+
+async def _lexical_leg(pipeline_id: int, query_text: str, limit: int, dedup: bool) -> Sequence[QuerySource]:
+    # 한 세션(커넥션)에서는 질의를 동시에 실행할 수 없어 별도 세션을 씁니다.
+    async with get_session() as session:
+        return await lexical_search(session, pipeline_id, query_text, limit, dedup=dedup)
+
+
+async def _candidate_vectors(session: AsyncSession, pipeline_id: int, chunk_ids: list[int]) -> dict[int, str]:
+    result = await session.execute(
+        sa.text(
+            f"""
+            SELECT chunk_id, vec::text AS vec
+            FROM embeddings
+            WHERE pipeline_id = {int(pipeline_id)} AND chunk_id = ANY(CAST(:ids AS integer[]))
+            """
+        ),
+        {"ids": chunk_ids},
+    )
+    return {row.chunk_id: row.vec for row in result}
+
+
+async def mmr_rerank(
+    session: AsyncSession,
+    pipeline_id: int,
+    embedding: list[float],
+    candidates: Sequence[QuerySource],
+    top_k: int,
+    lambda_: float,
+    dup_cutoff: float = DEFAULT_DUP_CUTOFF,
+) -> list[QuerySource]:
+    """후보 청크 벡터를 한 번에 가져와 MMR 로 최대 top_k 개를 고릅니다(후보 순서/점수는 유지)."""
+
+    if not candidates:
+        return []
+    vectors = await _candidate_vectors(session, pipeline_id, [source.chunk_id for source in candidates])
+    usable = [source for source in candidates if source.chunk_id in vectors]
+    matrix = parse_vector_literals([vectors[source.chunk_id] for source in usable])
+    picked = mmr_select(np.asarray(embedding, dtype=np.float32), matrix, top_k, lambda_, dup_cutoff)
+    return [usable[i] for i in picked]
+
+
+async def search_similar_chunks(
+    session: AsyncSession,
+    pipeline_id: int,
+    embedding: list[float],
+    top_k: int,
+    threshold: float,
+    recall: float | None = None,
+    query_text: str | None = None,
+    method: str | None = None,
+    dedup: bool = True,
+) -> Sequence[QuerySource]:
+    """파이프라인 검색 진입점.
+
+    method(기본: search 블록 설정)가 search_hybrid 이고 query_text 가 있으면 벡터 검색과 키워드 검색을
+    동시에 실행해 RRF 로 합칩니다. threshold 는 벡터 후보에만 적용하고(키워드로 정확히 맞은 청크는 유지),
+    하이브리드 결과의 score 는 RRF 점수입니다. dedup 이면 같은 내용(chunks.hash)의 청크는 하나만 돌려줍니다.
+    search 블록에 mmr_lambda 가 있으면 top_k × candidate_factor 개 후보에서 MMR 로 top_k 개 이하를 고릅니다.
+    """
+
+    config = await load_search_config(session, pipeline_id)
+    if method is not None:
+        config = replace(config, method=SearchConfig.from_block({"method": method}).method)
+    wanted = top_k * config.candidate_factor if config.mmr_lambda is not None else top_k
+
+    if config.method != "search_hybrid" or not query_text:
+        results = list(await vector_search(session, pipeline_id, embedding, wanted, threshold, recall, dedup))
+    else:
+        limit = top_k * config.candidate_factor
+        vector_hits, lexical_hits = await asyncio.gather(
+            vector_search(session, pipeline_id, embedding, limit, threshold, recall, dedup),
+            _lexical_leg(pipeline_id, query_text, limit, dedup),
+        )
+        results = reciprocal_rank_fusion([vector_hits, lexical_hits], k=config.rrf_k)
+        if dedup:
+            # 두 검색이 같은 내용의 서로 다른 청크를 하나씩 골랐을 수 있어 본문으로 한 번 더 거릅니다.
+            distinct: dict[str, QuerySource] = {}
+            for source in results:
+                distinct.setdefault(source.text, source)
+            results = list(distinct.values())
+        results = results[:wanted]
+
+    if config.mmr_lambda is None:
+        return results
+    return await mmr_rerank(
+        session, pipeline_id, embedding, results, top_k, config.mmr_lambda, config.mmr_dup_cutoff
+    )
 
 
-__all__ = ["search_similar_chunks"]
+__all__ = [
+    "SEARCH_METHODS",
+    "SearchConfig",
+    "load_search_config",
+    "mmr_rerank",
+    "reciprocal_rank_fusion",
+    "search_similar_chunks",
+    "vector_search",
+]
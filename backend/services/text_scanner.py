@@ -0,0 +1,108 @@
+"""PII 마스킹 + 금칙어 탐지를 한 번에 하는 텍스트 스캐너.
+
+비전공자 팁: 규칙마다 글 전체를 다시 훑으면(PII 3번 + 금칙 5번) 긴 문서일수록 같은 글을 여러 번 읽고,
+치환할 때마다 글 전체를 새로 복사합니다. 여기서는 모든 규칙을 이름 붙은 묶음 하나의 정규식
+(a|b|c…)으로 합쳐 글을 한 번만 훑으면서, 찾은 것이 PII 면 가리고 금칙어면 카테고리만 기록합니다.
+금칙어는 카테고리별 정규식 대신 전체 키워드를 하나의 단어 묶음으로 찾고, 찾은 단어로 카테고리를 고릅니다.
+규칙 자체는 pii_rules / moderation_rules 에 그대로 둡니다.
+
+같은 위치에서 여러 규칙이 맞으면 앞 규칙(PII → 금칙어 순서)이 이깁니다. 그래서 PII 로 가려질
+부분 안의 금칙어는 예전처럼(마스킹 후 탐지) 잡히지 않습니다.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Mapping, Sequence
+
+from backend.services import moderation_rules, pii_rules
+
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+_KEYWORD_GROUP = "k"
+
+
+def _scoped(pattern: re.Pattern[str]) -> str:
+    """규칙별 플래그(IGNORECASE 등)를 그 규칙에만 적용되는 인라인 그룹으로 바꿉니다."""
+
+    flags = "".join(letter for flag, letter in _INLINE_FLAGS if pattern.flags & flag)
+    return f"(?{flags}:{pattern.pattern})" if flags else f"(?:{pattern.pattern})"
+
+
+@dataclass
+class ScanResult:
+    text: str
+    flags: list[str] = field(default_factory=list)
+    # 가린 PII 수(대체 문자열별)
+    masked: dict[str, int] = field(default_factory=dict)
+
+
+class TextScanner:
+    """PII 규칙(패턴, 대체 문자열)과 금칙 키워드(카테고리 → 단어들)를 합친 단일 패스 스캐너."""
+
+    def __init__(
+        self,
+        pii_patterns: Sequence[tuple[re.Pattern[str], str]],
+        category_terms: Mapping[str, Sequence[str]],
+    ) -> None:
+        self._replacements = [replacement for _, replacement in pii_patterns]
+        self._categories = list(category_terms)
+        # 소문자 키워드 → 카테고리 번호(같은 단어가 여러 카테고리에 있으면 앞 카테고리)
+        self._term_category: dict[str, int] = {}
+        for index, terms in enumerate(category_terms.values()):
+            for term in terms:
+                self._term_category.setdefault(term.lower(), index)
+        pii = [f"(?P<p{i}>{_scoped(pattern)})" for i, (pattern, _) in enumerate(pii_patterns)]
+        branches = list(pii)
+        if self._term_category:
+            # 긴 단어부터 두어 "self-harm" 이 "self" 같은 짧은 단어보다 먼저 맞게 합니다.
+            words = "|".join(map(re.escape, sorted(self._term_category, key=len, reverse=True)))
+            branches.append(f"(?P<{_KEYWORD_GROUP}>\\b(?i:{words})\\b)")
+        self._all = re.compile("|".join(branches)) if branches else None
+        # 마스킹만 필요한 경로(문서 전처리, 스트리밍 답변)는 금칙어 묶음을 뺀 정규식을 씁니다.
+        self._pii = re.compile("|".join(pii)) if pii else None
+
+    def scan(self, text: str) -> ScanResult:
+        """PII 를 가린 본문과 감지된 금칙 카테고리(카테고리 정의 순서)를 함께 돌려줍니다."""
+
+        if self._all is None:
+            return ScanResult(text)
+        found: set[int] = set()
+        masked: dict[str, int] = {}
+
+        def _replace(match: re.Match[str]) -> str:
+            if match.lastgroup == _KEYWORD_GROUP:
+                found.add(self._term_category[match.group().lower()])
+                return match.group()
+            replacement = self._replacements[int(match.lastgroup[1:])]
+            masked[replacement] = masked.get(replacement, 0) + 1
+            return replacement
+
+        result = self._all.sub(_replace, text)
+        return ScanResult(result, [self._categories[i] for i in sorted(found)], masked)
+
+    def mask(self, text: str) -> str:
+        """PII 만 가립니다(금칙어 탐지 없음)."""
+
+        if self._pii is None:
+            return text
+        return self._pii.sub(lambda match: self._replacements[int(match.lastgroup[1:])], text)
+
+    def pii_crossing(self, text: str, position: int, window: int) -> int | None:
+        """text[position] 앞뒤 window 글자 안에서 position 을 가로지르는 PII 매치의 시작 위치(없으면 None).
+
+        문서를 구간으로 나눠 따로 마스킹할 때, 자르려는 자리가 PII 한가운데가 아닌지 확인합니다.
+        """
+
+        if self._pii is None:
+            return None
+        for match in self._pii.finditer(text, max(position - window, 0), min(position + window, len(text))):
+            if match.start() >= position:
+                break
+            if match.end() > position:
+                return match.start()
+        return None
+
+
+scanner = TextScanner(pii_rules.PII_PATTERNS, moderation_rules.CATEGORY_TERMS)
+
+__all__ = ["ScanResult", "TextScanner", "scanner"]
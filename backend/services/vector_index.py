@@ -0,0 +1,260 @@
+"""벡터(ANN) 인덱스 관리.
+
+비전공자 팁: 벡터 인덱스는 "비슷한 벡터 찾기"를 전수 비교 없이 빠르게 해 주는 목차입니다.
+인덱스를 만들 때 고른 거리 종류(opclass)와 검색 SQL의 거리 연산자가 다르면 Postgres는
+인덱스를 쓰지 못하고 전체를 훑습니다. 그래서 인덱스 DDL과 검색 연산자를 모두 이 모듈의
+VectorIndexSpec 한 곳에서 만들어 항상 짝이 맞도록 합니다.
+
+- HNSW: 그래프 기반. m/ef_construction 이 클수록 정확하지만 빌드가 느립니다. 빈 테이블에도 바로 만들 수 있습니다.
+- ivfflat: 군집 기반. lists 개 군집으로 나누므로 데이터가 쌓인 뒤 만들어야 품질이 좋습니다.
+
+검색 시에는 recall(0~1) 값 하나로 hnsw.ef_search / ivfflat.probes 를 정해 정확도와 지연을 조절합니다.
+벡터가 충분히 많은 파이프라인에는 그 파이프라인 행만 담은 부분 인덱스(partial index)를 따로 만들어
+검색이 해당 파이프라인 벡터만 보도록 합니다.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+
+from backend.deps.db import engine
+from backend.deps.settings import settings
+
+LOGGER = logging.getLogger(__name__)
+
+# 한국어 주석: 이 수 이상 벡터를 가진 파이프라인에만 전용 ANN 부분 인덱스를 만듭니다.
+DEFAULT_MIN_ROWS = 10_000
+GLOBAL_INDEX_NAME = "idx_embeddings_vec"
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+# 거리 종류 → (opclass, 거리 연산자, 거리→유사도 점수 SQL 템플릿)
+METRICS = {
+    "cosine": ("vector_cosine_ops", "<=>", "1 - ({distance})"),
+    "ip": ("vector_ip_ops", "<#>", "-({distance})"),
+}
+# pgvector 허용 범위
+MAX_EF_SEARCH = 1000
+
+
+@dataclass(frozen=True)
+class VectorIndexSpec:
+    """인덱스 종류/거리/빌드 파라미터. 검색 연산자도 여기서 만듭니다."""
+
+    method: str = "hnsw"
+    metric: str = "cosine"
+    m: int = 16
+    ef_construction: int = 64
+    lists: int = 100
+
+    def __post_init__(self) -> None:
+        if self.method not in INDEX_METHODS:
+            raise ValueError(f"지원하지 않는 벡터 인덱스 종류: {self.method}")
+        if self.metric not in METRICS:
+            raise ValueError(f"지원하지 않는 벡터 거리: {self.metric}")
+
+    @property
+    def opclass(self) -> str:
+        return METRICS[self.metric][0]
+
+    @property
+    def operator(self) -> str:
+        return METRICS[self.metric][1]
+
+    def distance(self, column: str, query: str) -> str:
+        return f"{column} {self.operator} {query}"
+
+    def score(self, column: str, query: str) -> str:
+        """거리 SQL을 '클수록 비슷함' 점수로 바꿉니다(임계값 비교용)."""
+
+        return METRICS[self.metric][2].format(distance=self.distance(column, query))
+
+    def reloptions(self, rows: int | None = None) -> dict[str, int]:
+        """WITH (...) 빌드 옵션. ivfflat 부분 인덱스는 행 수로 lists 를 정합니다."""
+
+        if self.method == "hnsw":
+            return {"m": self.m, "ef_construction": self.ef_construction}
+        return {"lists": ivfflat_lists(rows) if rows is not None else self.lists}
+
+    def ddl(self, name: str, *, where: str | None = None, rows: int | None = None, concurrently: bool = True) -> str:
+        options = ", ".join(f"{key} = {int(value)}" for key, value in self.reloptions(rows).items())
+        sql = (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} ON embeddings "
+            f"USING {self.method} (vec {self.opclass}) WITH ({options})"
+        )
+        if where:
+            sql += f" WHERE {where}"
+        return sql
+
+
+def index_spec_from_settings() -> VectorIndexSpec:
+    return VectorIndexSpec(
+        method=settings.pgvector_index_type,
+        metric=settings.pgvector_distance,
+        m=settings.pgvector_hnsw_m,
+        ef_construction=settings.pgvector_hnsw_ef_construction,
+        lists=settings.pgvector_index_lists,
+    )
+
+
+def pipeline_index_name(pipeline_id: int) -> str:
+    return f"idx_embeddings_vec_p{int(pipeline_id)}"
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector 권장값(행 수/1000, 최소 10)에 따른 ivfflat lists."""
+
+    return max(rows // 1000, 10)
+
+
+def ef_search_for(recall: float, top_k: int) -> int:
+    """recall 0 → 10, 0.5 → 100, 1 → 1000 (로그 스케일). top_k 보다 작으면 결과가 모자라므로 top_k 이상."""
+
+    recall = min(max(recall, 0.0), 1.0)
+    return min(max(round(10 * 100**recall), top_k), MAX_EF_SEARCH)
+
+
+def probes_for(recall: float, lists: int) -> int:
+    """recall 0 → 1, 0.5 → √lists(pgvector 권장값), 1 → lists(전수 검색과 동일)."""
+
+    recall = min(max(recall, 0.0), 1.0)
+    return max(1, min(round(lists**recall), lists))
+
+
+def tuning_statements(spec: VectorIndexSpec, recall: float, top_k: int) -> list[str]:
+    """현재 트랜잭션에만 적용되는 SET LOCAL 문.
+
+    파이프라인 부분 인덱스의 lists 는 행 수마다 다르므로 probes 는 가장 큰 기준(전역 lists)으로 계산합니다.
+    두 값을 모두 지정해 인덱스 종류를 바꾸는 도중에도 어느 쪽 인덱스든 같은 recall 로 동작합니다.
+    """
+
+    return [
+        f"SET LOCAL hnsw.ef_search = {ef_search_for(recall, top_k)}",
+        f"SET LOCAL ivfflat.probes = {probes_for(recall, spec.lists)}",
+    ]
+
+
+async def index_matches(conn, name: str, spec: VectorIndexSpec, rows: int | None = None) -> bool:
+    """이미 있는 인덱스가 spec(종류/opclass/빌드 옵션)과 같고 유효(valid)한지 확인합니다."""
+
+    result = await conn.execute(
+        sa.text(
+            """
+            SELECT am.amname, opc.opcname, c.reloptions, i.indisvalid
+            FROM pg_class c
+            JOIN pg_index i ON i.indexrelid = c.oid
+            JOIN pg_am am ON am.oid = c.relam
+            JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+            WHERE c.oid = to_regclass(:name)
+            """
+        ),
+        {"name": name},
+    )
+    row = result.fetchone()
+    if row is None:
+        return False
+    expected = {f"{key}={value}" for key, value in spec.reloptions(rows).items()}
+    return (
+        row.amname == spec.method
+        and row.opcname == spec.opclass
+        and set(row.reloptions or ()) == expected
+        and bool(row.indisvalid)
+    )
+
+
+async def rebuild_index(
+    conn, name: str, spec: VectorIndexSpec, *, where: str | None = None, rows: int | None = None
+) -> None:
+    """서비스 중단 없이 인덱스를 다시 만듭니다.
+
+    새 인덱스를 CONCURRENTLY 로 만든 뒤 기존 것을 CONCURRENTLY 로 지우고 이름을 바꿉니다.
+    빌드 중에도 기존 인덱스로 검색이 계속됩니다. conn 은 AUTOCOMMIT 연결이어야 합니다.
+    """
+
+    staging = f"{name}_rebuild"
+    # 이전에 실패한 CONCURRENTLY 빌드는 INVALID 인덱스를 남기므로 먼저 정리합니다.
+    await conn.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {staging}"))
+    await conn.execute(sa.text(spec.ddl(staging, where=where, rows=rows)))
+    await conn.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    await conn.execute(sa.text(f"ALTER INDEX {staging} RENAME TO {name}"))
+
+
+async def ensure_pipeline_index(
+    pipeline_id: int, min_rows: int = DEFAULT_MIN_ROWS, spec: VectorIndexSpec | None = None
+) -> bool:
+    """벡터가 충분한 파이프라인에 부분 인덱스를 CONCURRENTLY 생성합니다. 새로 만들었으면 True.
+
+    CREATE INDEX CONCURRENTLY 는 트랜잭션 밖에서만 실행되므로 AUTOCOMMIT 연결을 사용합니다.
+    """
+
+    spec = spec or index_spec_from_settings()
+    pid = int(pipeline_id)
+    name = pipeline_index_name(pid)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        exists = await conn.execute(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+        if exists.scalar_one():
+            return False
+        rows = (
+            await conn.execute(sa.text("SELECT count(*) FROM embeddings WHERE pipeline_id = :pid"), {"pid": pid})
+        ).scalar_one()
+        if rows < min_rows:
+            return False
+        LOGGER.info("파이프라인 벡터 인덱스 생성", extra={"pipeline_id": pid, "rows": rows})
+        # 식별자/WITH 값은 바인딩할 수 없어 정수로 검증한 값만 SQL에 넣습니다.
+        await conn.execute(sa.text(spec.ddl(name, where=f"pipeline_id = {pid}", rows=rows)))
+    return True
+
+
+async def rebuild_vector_indexes(spec: VectorIndexSpec | None = None, force: bool = False) -> list[str]:
+    """전역 인덱스와 파이프라인 부분 인덱스 중 spec 과 다른 것을 다시 만듭니다. 다시 만든 이름 목록을 반환."""
+
+    spec = spec or index_spec_from_settings()
+    rebuilt: list[str] = []
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if force or not await index_matches(conn, GLOBAL_INDEX_NAME, spec):
+            LOGGER.info("전역 벡터 인덱스 재생성", extra={"method": spec.method, "metric": spec.metric})
+            await rebuild_index(conn, GLOBAL_INDEX_NAME, spec)
+            rebuilt.append(GLOBAL_INDEX_NAME)
+
+        result = await conn.execute(
+            sa.text(
+                """
+                SELECT pipeline_id, count(*) AS rows
+                FROM embeddings
+                WHERE pipeline_id IS NOT NULL
+                GROUP BY pipeline_id
+                """
+            )
+        )
+        for pipeline_id, rows in result.fetchall():
+            name = pipeline_index_name(pipeline_id)
+            exists = (
+                await conn.execute(sa.text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+            ).scalar_one()
+            if not exists:
+                continue
+            if force or not await index_matches(conn, name, spec, rows=rows):
+                LOGGER.info("파이프라인 벡터 인덱스 재생성", extra={"pipeline_id": pipeline_id, "rows": rows})
+                await rebuild_index(conn, name, spec, where=f"pipeline_id = {int(pipeline_id)}", rows=rows)
+                rebuilt.append(name)
+    return rebuilt
+
+
+__all__ = [
+    "GLOBAL_INDEX_NAME",
+    "VectorIndexSpec",
+    "ef_search_for",
+    "ensure_pipeline_index",
+    "index_matches",
+    "index_spec_from_settings",
+    "ivfflat_lists",
+    "pipeline_index_name",
+    "probes_for",
+    "rebuild_index",
+    "rebuild_vector_indexes",
+    "tuning_statements",
+]
@@ -8,10 +8,19 @@ from celery import Celery
 
 from backend.deps.settings import settings
 
+INDEX_QUEUE = "index"
+
 celery_app = Celery(
     "ai_block_pipeline",
     broker=settings.redis_url,
     backend=settings.redis_url,
+    include=[
+        "backend.workers.tasks_index",
+        "backend.workers.tasks_reindex",
+        "backend.workers.tasks_maintenance",
+        "backend.workers.metrics",
+        "backend.workers.lifecycle",
+    ],
 )
 
 celery_app.conf.update(
@@ -20,6 +29,23 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     task_always_eager=False,
+    # 작업이 끝난 뒤에 메시지를 확인(ack)하므로 워커가 죽으면 다른 워커가 다시 받아 체크포인트부터 이어 갑니다.
+    # 긴 인덱싱 작업을 미리 여러 개 가져가 묶어 두지 않도록 하나씩만 가져옵니다.
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    # Redis 브로커는 이 시간(초) 안에 ack 되지 않은 메시지를 다시 배달하므로 가장 긴 작업보다 길어야 합니다.
+    broker_transport_options={"visibility_timeout": settings.celery_visibility_timeout},
+    # 인덱싱 태스크는 전용 index 큐로 보냅니다. 이 큐의 워커는 -P solo 로 띄워 태스크가 메인(비데몬) 프로세스에서
+    # 돌므로 전처리 프로세스 풀을 만들 수 있습니다. prefork 자식은 데몬이라 자식 프로세스를 만들 수 없습니다.
+    task_routes={
+        "index_file": {"queue": INDEX_QUEUE},
+        "reindex_file": {"queue": INDEX_QUEUE},
+    },
+    # celery beat(-B)가 주기적으로 실행할 정리 작업
+    beat_schedule={
+        "evict-embedding-cache": {"task": "evict_embedding_cache", "schedule": 6 * 60 * 60},
+    },
 )
 
 
@@ -28,4 +54,4 @@ def ping(self):  # pragma: no cover - 단순 헬스체크
     return "pong"
 
 
-__all__ = ["celery_app", "ping"]
+__all__ = ["INDEX_QUEUE", "celery_app", "ping"]
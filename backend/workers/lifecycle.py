@@ -0,0 +1,22 @@
+"""Celery 워커 프로세스 수명주기 훅.
+
+비전공자 팁: 워커 프로세스가 끝날 때 공유 HTTP 커넥션 풀과 이벤트 루프, 전처리 프로세스 풀을 정리합니다.
+prefork 자식은 worker_process_shutdown, 태스크를 메인 프로세스에서 돌리는 -P solo 워커(index 큐)는
+worker_shutdown 에서 정리합니다.
+"""
+from __future__ import annotations
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from backend.services.parallel_preprocess import shutdown_preprocess_pool
+from backend.workers.runtime import shutdown_runtime
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_worker_runtime(**_kwargs) -> None:
+    shutdown_runtime()
+    shutdown_preprocess_pool()
+
+
+__all__ = ["close_worker_runtime"]
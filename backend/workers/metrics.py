@@ -0,0 +1,33 @@
+"""Celery 워커 Prometheus 메트릭 노출.
+
+비전공자 팁: 워커는 HTTP 서버가 없으므로 별도 포트(WORKER_METRICS_PORT)로 메트릭을 내보냅니다.
+prefork 자식 프로세스의 값을 합치려면 PROMETHEUS_MULTIPROC_DIR 을 지정합니다.
+"""
+from __future__ import annotations
+
+import os
+
+from celery.signals import worker_init, worker_process_shutdown
+from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+
+@worker_init.connect
+def start_metrics_server(**_kwargs) -> None:
+    port = os.getenv("WORKER_METRICS_PORT")
+    if not port:
+        return
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(int(port), registry=registry)
+    else:
+        start_http_server(int(port))
+
+
+@worker_process_shutdown.connect
+def mark_process_dead(pid=None, **_kwargs) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+__all__ = ["start_metrics_server"]
@@ -0,0 +1,47 @@
+"""워커 프로세스별 이벤트 루프.
+
+비전공자 팁: 태스크마다 asyncio.run 을 쓰면 매번 새 이벤트 루프가 생겨, 루프에 묶인
+HTTP/DB 커넥션 풀을 다음 태스크에서 재사용할 수 없습니다.
+프로세스마다 루프 하나를 계속 쓰면 keep-alive 연결과 DB 풀이 태스크 사이에 유지됩니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Awaitable, TypeVar
+
+from backend.deps.http import close_http_clients
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _loop_pid  # pylint: disable=global-statement
+    # prefork 로 복제된 자식 프로세스는 부모 루프를 쓰지 않고 새로 만듭니다.
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _loop_pid = os.getpid()
+    return _loop
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """현재 워커 프로세스의 이벤트 루프에서 코루틴을 실행합니다."""
+
+    return _get_loop().run_until_complete(coro)
+
+
+def shutdown_runtime() -> None:
+    """프로세스 종료 시 공유 클라이언트와 루프를 닫습니다."""
+
+    global _loop  # pylint: disable=global-statement
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        return
+    _loop.run_until_complete(close_http_clients())
+    _loop.close()
+    _loop = None
+
+
+__all__ = ["run_async", "shutdown_runtime"]
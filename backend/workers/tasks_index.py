@@ -4,154 +4,523 @@
 """
 from __future__ import annotations
 
-import asyncio
 import datetime as dt
-import hashlib
 import json
 import logging
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Iterator
 
-import httpx
+import numpy as np
 import sqlalchemy as sa
 
-from backend.deps.db import get_session
-from backend.deps.minio import get_minio
+from backend.deps.db import engine, get_session
+from backend.deps.embedding import backoff_delay, embed_in_batches
+from backend.deps.minio import iter_object_text
 from backend.deps.settings import settings
-from backend.services.chunking import chunk_text
-from backend.services.preprocess import preprocess
+from backend.services.chunking import OffsetChunker, get_token_counter, iter_sliding_window_chunks
+from backend.services.embedding_cache import embed_with_cache
+from backend.services.incremental_index import ChunkMove, delete_parked, move_chunks, park_chunks, record_counts
+from backend.services.index_pipeline import IndexPipeline, iter_batches, summarize
+from backend.services.index_store import ChunkRecord, chunk_hash, insert_chunks_with_embeddings
+from backend.services.memory_index import notify_pipeline_changed
+from backend.services.parallel_preprocess import streaming_preprocessor
+from backend.services.preprocess import StreamingPreprocessor
+from backend.services.reindex import record_file_done
+from backend.services.vector_index import ensure_pipeline_index
 from backend.workers.celery_app import celery_app
+from backend.workers.runtime import run_async
 
 LOGGER = logging.getLogger(__name__)
 
+# 한국어 주석: CHUNKER=words 일 때의 청크 크기/겹침(단어 수, chunking.sliding_window_chunks 기본값과 동일)
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 120
+EMBED_MODEL = "gte-small"
+# (위치, 본문, 전처리 본문 안의 시작/끝 오프셋 — 단어 창 청커는 None)
+IndexChunk = tuple[int, str, int | None, int | None]
+# 파일 인덱싱 선점용 advisory lock 의 첫 번째 키(두 번째 키는 file_id)
+_CLAIM_LOCK_SPACE = 1
+_TRY_CLAIM_SQL = sa.text("SELECT pg_try_advisory_lock(:space, :fid)")
+_RELEASE_CLAIM_SQL = sa.text("SELECT pg_advisory_unlock(:space, :fid)")
 
-async def _call_embedding_service(texts: list[str], model: str = "gte-small") -> list[list[float]]:
-    """embedding-svc에 배치 요청."""
 
-    if not texts:
-        return []
-    url = f"{settings.embedding_svc}/embed"
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(url, json={"texts": texts, "model": model})
-        resp.raise_for_status()
-        data = resp.json()
-    return data.get("vectors", [])
+class FileBusy(RuntimeError):
+    """다른 워커가 같은 파일을 인덱싱하고 있습니다."""
 
 
-async def _index_file(file_id: int, pipeline_id: int | None = None) -> None:
+@asynccontextmanager
+async def _claim_file(file_id: int) -> AsyncIterator[None]:
+    """인덱싱하는 동안 파일을 선점합니다. 이미 다른 워커가 잡고 있으면 FileBusy.
+
+    acks_late 로 아직 실행 중인 태스크가 다시 배달되면 두 워커가 같은 문서를 이어 쓰게 되므로,
+    세션 수준 advisory lock 을 전용 연결에 잡아 인덱싱이 끝날 때까지 유지합니다.
+    워커가 죽으면 연결이 끊기면서 잠금도 풀립니다.
+    """
+
+    params = {"space": _CLAIM_LOCK_SPACE, "fid": file_id}
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not (await conn.execute(_TRY_CLAIM_SQL, params)).scalar():
+            raise FileBusy(f"file {file_id} is being indexed by another worker")
+        try:
+            yield
+        finally:
+            try:
+                await conn.execute(_RELEASE_CLAIM_SQL, params)
+            except Exception:  # pylint: disable=broad-except
+                # 잠금을 든 채 풀에 돌아가지 않도록 연결을 버립니다(끊기면 잠금도 풀림).
+                await conn.invalidate()
+
+
+async def _call_embedding_service(texts: list[str], model: str = EMBED_MODEL) -> np.ndarray:
+    """embedding-svc에 크기 제한 배치로 나눠 요청(실패한 배치만 재시도). (len(texts), dim) 배열을 반환합니다."""
+
+    return await embed_in_batches(texts, model=model)
+
+
+async def _index_file(
+    file_id: int,
+    pipeline_id: int | None = None,
+    replaces_file_id: int | None = None,
+    reindex_run: int | None = None,
+) -> None:
+    """파일 하나를 인덱싱합니다.
+
+    reindex_run 이면 파이프라인 재인덱싱의 대기 문서로 만듭니다. 벡터를 pipeline_id 없이 저장해 검색에
+    보이지 않다가, 모든 파일이 끝나면 backend/services/reindex.py 가 한 번에 이전 문서와 바꿉니다.
+    """
+
     async with get_session() as session:
         file_row = await session.execute(
-            sa.text("SELECT id, bucket, object_key, owner_id FROM files WHERE id = :fid"),
+            sa.text("SELECT id, bucket, object_key, owner_id, size_bytes FROM files WHERE id = :fid"),
             {"fid": file_id},
         )
         file_info = file_row.fetchone()
         if not file_info:
             LOGGER.error("파일 정보를 찾을 수 없음", extra={"file_id": file_id})
             return
+        # acks_late 로 마지막 커밋 뒤·ack 전에 다시 배달된 태스크는 끝낸 문서를 다시 만들지 않습니다.
+        # (증분 재인덱싱도 이전 문서의 file_id 를 이 파일로 바꾸므로 여기서 걸러집니다.)
+        finished_id = await _find_indexed_document(session, file_id, pipeline_id, reindex_run)
+        if finished_id is not None:
+            LOGGER.info("이미 인덱싱을 마친 파일, 건너뜀", extra={"file_id": file_id, "document_id": finished_id})
+            if reindex_run is None:
+                # 같은 파일을 다시 커밋하면(commit_upload 의 ON CONFLICT) 상태가 pending 으로 돌아가므로 되돌립니다.
+                await session.execute(sa.text("UPDATE files SET status = 'ready' WHERE id = :fid"), {"fid": file_id})
+                await session.commit()
+            return
+
+    # 한국어 주석: 문서를 조각 단위로 읽어 전처리→청킹→임베딩→저장을 흘려보내므로
+    # 파일 크기와 무관하게 메모리에는 창 하나와 큐에 든 배치 몇 개만 유지됩니다.
+    # 큰 문서는 전처리(정규화/PII 마스킹)를 프로세스 풀에 나눠 맡깁니다.
+    preprocessor = streaming_preprocessor(file_info.size_bytes)
+    parts = iter_object_text(file_info.bucket, file_info.object_key, part_size=settings.index_read_part_bytes)
+    chunks = _iter_chunks(preprocessor, parts)
+
+    if replaces_file_id is not None and reindex_run is None:
+        # 고친 문서를 다시 올린 경우: 이전 버전 문서의 청크를 해시로 비교해 바뀐 청크만 임베딩합니다.
+        async with get_session() as session:
+            previous_id = await _find_indexed_document(session, replaces_file_id, pipeline_id)
+        if previous_id is not None:
+            await _reindex_incremental(file_id, previous_id, pipeline_id, preprocessor, chunks)
+            return
+        LOGGER.info("이전 버전 문서가 없어 전체 인덱싱", extra={"file_id": file_id, "replaces_file_id": replaces_file_id})
+
+    now = dt.datetime.utcnow()
+    async with get_session() as session:
+        document_id, resume_pos = await _open_document(session, file_id, pipeline_id, now, reindex_run)
+        await session.commit()
+        if resume_pos:
+            LOGGER.info("중단된 인덱싱 이어서 진행", extra={"file_id": file_id, "document_id": document_id, "pos": resume_pos})
+        visible_pipeline_id = None if reindex_run is not None else pipeline_id
+
+        async def store(batch: list[IndexChunk], embedded: tuple[list[str], np.ndarray]) -> None:
+            await _store_batch(session, file_id, document_id, visible_pipeline_id, batch, embedded, now)
+            # 배치마다 체크포인트를 커밋하므로 태스크가 중간에 죽어도 여기까지는 다시 임베딩하지 않습니다.
+            await session.execute(
+                sa.text("UPDATE documents SET indexed_pos = :pos WHERE id = :doc_id"),
+                {"pos": batch[-1][0] + 1, "doc_id": document_id},
+            )
+            await session.commit()
+
+        # 다음 배치를 임베딩하는 동안 앞 배치를 저장합니다(저장은 이 세션에서 순서대로).
+        pipeline = IndexPipeline(
+            embed=_embed_batch,
+            store=store,
+            concurrency=settings.index_embed_concurrency,
+            queue_batches=settings.index_queue_batches,
+        )
+        # 청킹은 결정적이므로 같은 설정이면 체크포인트 앞의 청크는 읽기만 하고 건너뜁니다.
+        pending = (chunk for chunk in chunks if chunk[0] >= resume_pos)
+        stats = await pipeline.run(iter_batches(pending, settings.index_embed_batch))
+        LOGGER.info(
+            "인덱싱 단계 시간",
+            extra={"file_id": file_id, "document_id": document_id, "resumed_from": resume_pos, **summarize(stats)},
+        )
+
+        # 언어는 스트림을 모두 읽은 뒤에 확정되므로 마지막에 기록합니다.
+        await session.execute(
+            sa.text(
+                """
+                UPDATE documents
+                SET lang = :lang, meta = meta || jsonb_build_object('language', CAST(:lang AS text)),
+                    indexed_at = NOW()
+                WHERE id = :doc_id
+                """
+            ),
+            {"lang": preprocessor.language, "doc_id": document_id},
+        )
+        await session.execute(
+            sa.text("UPDATE files SET status = 'ready' WHERE id = :fid"),
+            {"fid": file_id},
+        )
+        if reindex_run is not None:
+            await record_file_done(session, reindex_run)
+        await session.commit()
+
+
+async def _index_claimed(
+    file_id: int,
+    pipeline_id: int | None = None,
+    replaces_file_id: int | None = None,
+    reindex_run: int | None = None,
+) -> None:
+    async with _claim_file(file_id):
+        await _index_file(file_id, pipeline_id, replaces_file_id, reindex_run)
+
+
+async def _after_index(pipeline_id: int | None) -> None:
+    """인덱싱이 커밋된 뒤의 후속 작업. 실패해도 문서는 이미 저장됐으므로 인덱싱을 다시 하지 않습니다."""
+
+    if pipeline_id is not None:
+        if settings.memory_index_enabled:
+            # API 워커의 메모리 검색 행렬이 새 청크를 이어 붙이도록(지운 청크가 있으면 다시 적재) 알립니다.
+            await notify_pipeline_changed(pipeline_id)
+        # 벡터가 충분히 쌓인 파이프라인에는 전용 부분 인덱스를 만듭니다(이미 있으면 건너뜀).
+        await ensure_pipeline_index(pipeline_id, min_rows=settings.pipeline_index_min_rows)
 
-    minio_client = get_minio()
-    response = minio_client.get_object(file_info.bucket, file_info.object_key)
-    try:
-        payload = response.read().decode("utf-8")
-    finally:
-        response.close()
-        response.release_conn()
 
-    preprocessed = preprocess(payload)
-    chunks = list(chunk_text(preprocessed.text))
-    chunk_texts = [text for _, text in chunks]
-    vectors = await _call_embedding_service(chunk_texts)
+async def _find_indexed_document(
+    session, file_id: int, pipeline_id: int | None, reindex_run: int | None = None
+) -> int | None:
+    """파일·파이프라인(·재인덱싱 실행)의 인덱싱을 마친 가장 최근 문서 id."""
 
+    row = await session.execute(
+        sa.text(
+            """
+            SELECT id FROM documents
+            WHERE file_id = :fid AND indexed_at IS NOT NULL
+              AND (meta ->> 'pipeline_id') IS NOT DISTINCT FROM CAST(:pid AS text)
+              AND (meta ->> 'reindex_run') IS NOT DISTINCT FROM CAST(:run AS text)
+            ORDER BY id DESC
+            LIMIT 1
+            """
+        ),
+        {
+            "fid": file_id,
+            "pid": None if pipeline_id is None else str(pipeline_id),
+            "run": None if reindex_run is None else str(reindex_run),
+        },
+    )
+    found = row.fetchone()
+    return found.id if found else None
+
+
+async def _reindex_incremental(
+    file_id: int,
+    document_id: int,
+    pipeline_id: int | None,
+    preprocessor: StreamingPreprocessor,
+    chunks: Iterable[IndexChunk],
+) -> None:
+    """이전 버전 문서(document_id)를 새 파일 내용으로 바꿉니다. 같은 해시의 청크는 행과 벡터를 재사용합니다.
+
+    전체가 한 트랜잭션이므로 실패하면 이전 버전이 그대로 남고, 재시도하면 처음부터 다시 비교합니다.
+    """
+
+    now = dt.datetime.utcnow()
     async with get_session() as session:
-        now = dt.datetime.utcnow()
-        doc_meta: dict[str, Any] = {"language": preprocessed.language}
-        if pipeline_id is not None:
-            doc_meta["pipeline_id"] = pipeline_id
-        document_row = await session.execute(
+        reuse = await park_chunks(session, document_id, EMBED_MODEL)
+
+        async def embed(batch: list[IndexChunk]):
+            # 같은 해시의 기존 청크가 있으면 그 행을 옮기고, 없는 청크만 임베딩합니다.
+            moves: list[ChunkMove] = []
+            fresh: list[IndexChunk] = []
+            for pos, text, start, end in batch:
+                chunk_id = reuse.take(chunk_hash(text))
+                if chunk_id is None:
+                    fresh.append((pos, text, start, end))
+                else:
+                    moves.append(ChunkMove(chunk_id=chunk_id, pos=pos, start=start, end=end))
+            embedded = await _embed_batch(fresh) if fresh else None
+            return moves, fresh, embedded
+
+        async def store(batch: list[IndexChunk], result) -> None:
+            moves, fresh, embedded = result
+            await move_chunks(session, moves)
+            if fresh:
+                await _store_batch(session, file_id, document_id, pipeline_id, fresh, embedded, now)
+
+        pipeline = IndexPipeline(
+            embed=embed,
+            store=store,
+            concurrency=settings.index_embed_concurrency,
+            queue_batches=settings.index_queue_batches,
+        )
+        stats = await pipeline.run(iter_batches(chunks, settings.index_embed_batch))
+        deleted = await delete_parked(session, document_id)
+        counts = record_counts(reuse, deleted)
+        await session.execute(
             sa.text(
                 """
-                INSERT INTO documents (file_id, lang, meta, created_at)
-                VALUES (:file_id, :lang, :meta::jsonb, :created_at)
-                RETURNING id
+                UPDATE documents
+                SET file_id = :fid, lang = :lang, indexed_pos = :total, indexed_at = NOW(),
+                    meta = meta || jsonb_build_object(
+                        'language', CAST(:lang AS text),
+                        'chunking', CAST(:chunking AS text),
+                        'incremental', CAST(:counts AS jsonb)
+                    )
+                WHERE id = :doc_id
                 """
             ),
             {
-                "file_id": file_id,
-                "lang": preprocessed.language,
-                "meta": json.dumps(doc_meta),
-                "created_at": now,
+                "fid": file_id,
+                "lang": preprocessor.language,
+                "total": stats.items,
+                "chunking": _chunking_signature(),
+                "counts": json.dumps(counts),
+                "doc_id": document_id,
             },
         )
-        document_id = document_row.scalar_one()
+        await session.execute(sa.text("UPDATE files SET status = 'ready' WHERE id = :fid"), {"fid": file_id})
+        await session.commit()
+    LOGGER.info(
+        "증분 재인덱싱 완료",
+        extra={"file_id": file_id, "document_id": document_id, **counts, **summarize(stats)},
+    )
 
-        if not chunks:
-            await session.execute(
-                sa.text("UPDATE files SET status = 'ready' WHERE id = :fid"),
-                {"fid": file_id},
-            )
-            await session.commit()
-            return
 
-        if len(vectors) != len(chunks):
-            LOGGER.warning(
-                "임베딩 수량 불일치", extra={"chunks": len(chunks), "vectors": len(vectors), "file_id": file_id}
-            )
+def _chunking_signature() -> str:
+    """청크 위치를 결정하는 설정. 이 값이 같을 때만 체크포인트를 이어 쓸 수 있습니다."""
 
-        for (pos, text), vector in zip(chunks, vectors):
-            chunk_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
-            chunk_row = await session.execute(
-                sa.text(
-                    """
-                    INSERT INTO chunks (document_id, pos, text, hash, created_at)
-                    VALUES (:doc_id, :pos, :text, :hash, :created_at)
-                    RETURNING id
-                    """
-                ),
-                {
-                    "doc_id": document_id,
-                    "pos": pos,
-                    "text": text,
-                    "hash": chunk_hash,
-                    "created_at": now,
-                },
-            )
-            chunk_id = chunk_row.scalar_one()
-            await session.execute(
-                sa.text(
-                    """
-                    INSERT INTO embeddings (chunk_id, model, dim, vec, created_at)
-                    VALUES (:chunk_id, :model, :dim, :vec, :created_at)
-                    """
-                ),
-                {
-                    "chunk_id": chunk_id,
-                    "model": "gte-small",
-                    "dim": len(vector),
-                    "vec": vector,
-                    "created_at": now,
-                },
-            )
+    if settings.chunker == "words":
+        return f"words:{CHUNK_SIZE}:{CHUNK_OVERLAP}"
+    return f"tokens:{settings.chunk_tokens}:{settings.chunk_overlap_tokens}:{settings.chunk_tokenizer}"
+
+
+async def _open_document(
+    session, file_id: int, pipeline_id: int | None, now: dt.datetime, reindex_run: int | None = None
+) -> tuple[int, int]:
+    """이 파일·파이프라인(·재인덱싱 실행)의 중단된 문서가 있으면 (id, 체크포인트)를, 없으면 새 문서를 만들어
+    (id, 0)을 반환합니다. 호출자는 _claim_file 로 파일을 선점한 상태여야 합니다.
+
+    청킹 설정이 바뀌어 위치가 달라졌다면 저장된 청크를 지우고 처음부터 다시 채웁니다.
+    """
 
+    signature = _chunking_signature()
+    row = (
         await session.execute(
-            sa.text("UPDATE files SET status = 'ready' WHERE id = :fid"),
-            {"fid": file_id},
+            sa.text(
+                """
+                SELECT id, indexed_pos, meta ->> 'chunking' AS chunking
+                FROM documents
+                WHERE file_id = :fid AND indexed_at IS NULL
+                  AND (meta ->> 'pipeline_id') IS NOT DISTINCT FROM CAST(:pid AS text)
+                  AND (meta ->> 'reindex_run') IS NOT DISTINCT FROM CAST(:run AS text)
+                ORDER BY id DESC
+                LIMIT 1
+                """
+            ),
+            {
+                "fid": file_id,
+                "pid": None if pipeline_id is None else str(pipeline_id),
+                "run": None if reindex_run is None else str(reindex_run),
+            },
         )
-        await session.commit()
+    ).fetchone()
+    if row is not None:
+        if row.chunking == signature:
+            return row.id, row.indexed_pos
+        await session.execute(
+            sa.text(
+                "DELETE FROM embeddings WHERE chunk_id IN (SELECT id FROM chunks WHERE document_id = :doc_id)"
+            ),
+            {"doc_id": row.id},
+        )
+        await session.execute(sa.text("DELETE FROM chunks WHERE document_id = :doc_id"), {"doc_id": row.id})
+        await session.execute(
+            sa.text(
+                """
+                UPDATE documents
+                SET indexed_pos = 0, meta = meta || jsonb_build_object('chunking', CAST(:chunking AS text))
+                WHERE id = :doc_id
+                """
+            ),
+            {"chunking": signature, "doc_id": row.id},
+        )
+        return row.id, 0
+
+    doc_meta: dict[str, Any] = {"chunking": signature}
+    if pipeline_id is not None:
+        doc_meta["pipeline_id"] = pipeline_id
+    if reindex_run is not None:
+        doc_meta["reindex_run"] = reindex_run
+    document_row = await session.execute(
+        sa.text(
+            """
+            INSERT INTO documents (file_id, lang, meta, created_at)
+            VALUES (:file_id, NULL, :meta::jsonb, :created_at)
+            RETURNING id
+            """
+        ),
+        {
+            "file_id": file_id,
+            "meta": json.dumps(doc_meta),
+            "created_at": now,
+        },
+    )
+    return document_row.scalar_one(), 0
+
+
+def _iter_chunks(preprocessor: StreamingPreprocessor, parts: Iterable[str]) -> Iterator[IndexChunk]:
+    """설정(CHUNKER)에 따라 토큰/문장 경계 청크 또는 기존 단어 창 청크를 만듭니다."""
+
+    if settings.chunker == "words":
+        words = preprocessor.words(parts)
+        for pos, text in enumerate(iter_sliding_window_chunks(words, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)):
+            yield pos, text, None, None
+        return
+    chunker = OffsetChunker(
+        chunk_tokens=settings.chunk_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+        counter=get_token_counter(settings.chunk_tokenizer),
+    )
+    for chunk in chunker.iter_chunks(preprocessor.text(parts)):
+        yield chunk.pos, chunk.text, chunk.start, chunk.end
+
+
+async def _embed_batch(batch: list[IndexChunk]) -> tuple[list[str], np.ndarray]:
+    """청크 배치 하나의 해시와 벡터를 구합니다(캐시 미스만 임베딩 서비스 호출).
+
+    여러 배치가 동시에 실행되므로 캐시 조회/기록은 배치마다 별도 세션에서 바로 커밋합니다.
+    """
+
+    texts = [text for _, text, _, _ in batch]
+    hashes = [chunk_hash(text) for text in texts]
+    if not settings.embed_cache_enabled:
+        return hashes, await _call_embedding_service(texts)
+    async with get_session() as cache_session:
+        vectors = await embed_with_cache(cache_session, texts, hashes, EMBED_MODEL, _call_embedding_service)
+        await cache_session.commit()
+    return hashes, vectors
+
+
+async def _store_batch(
+    session,
+    file_id: int,
+    document_id: int,
+    pipeline_id: int | None,
+    batch: list[IndexChunk],
+    embedded: tuple[list[str], np.ndarray],
+    now: dt.datetime,
+) -> None:
+    """임베딩된 청크 배치 하나를 저장합니다."""
 
+    hashes, vectors = embedded
+    if len(vectors) != len(batch):
+        LOGGER.warning("임베딩 수량 불일치", extra={"chunks": len(batch), "vectors": len(vectors), "file_id": file_id})
+    records = [
+        ChunkRecord(pos=pos, text=text, vector=vector, hash=digest, start=start, end=end)
+        for (pos, text, start, end), digest, vector in zip(batch, hashes, vectors)
+    ]
+    await insert_chunks_with_embeddings(
+        session,
+        document_id,
+        records,
+        model=EMBED_MODEL,
+        pipeline_id=pipeline_id,
+        created_at=now,
+        batch_size=settings.index_insert_batch,
+    )
 
-@celery_app.task(name="index_file")
-def index_file_task(file_id: int, pipeline_id: int | None = None) -> str:
-    """Celery 작업 엔트리 포인트."""
 
-    LOGGER.info("인덱싱 시작", extra={"file_id": file_id, "pipeline_id": pipeline_id})
+def run_index_with_retry(
+    task,
+    file_id: int,
+    pipeline_id: int | None = None,
+    replaces_file_id: int | None = None,
+    reindex_run: int | None = None,
+) -> str:
+    """바인딩된 Celery 태스크(task)에서 인덱싱을 실행합니다.
+
+    실패하면 무작위 지연 백오프로 다시 시도하고, 재시도는 문서 체크포인트부터 이어서 진행합니다.
+    재시도 횟수를 모두 쓰면 파일을 error 로 표시합니다(재인덱싱은 이전 문서가 그대로 쓰이므로 표시하지 않음).
+    """
+
+    LOGGER.info(
+        "인덱싱 시작",
+        extra={
+            "file_id": file_id,
+            "pipeline_id": pipeline_id,
+            "reindex_run": reindex_run,
+            "attempt": task.request.retries + 1,
+        },
+    )
     try:
-        asyncio.run(_index_file(file_id, pipeline_id))
-        return "ok"
+        run_async(_index_claimed(file_id, pipeline_id, replaces_file_id, reindex_run))
+    except FileBusy as exc:
+        # 먼저 잡은 워커가 끝내면 다시 배달된 이 태스크는 끝낸 문서를 보고 건너뜁니다.
+        if task.request.retries < task.max_retries:
+            LOGGER.info("다른 워커가 인덱싱 중, 나중에 다시 확인", extra={"file_id": file_id})
+            raise task.retry(
+                exc=exc,
+                countdown=backoff_delay(
+                    task.request.retries,
+                    settings.index_task_retry_backoff_seconds,
+                    settings.index_task_retry_backoff_max_seconds,
+                ),
+            )
+        LOGGER.warning("다른 워커가 인덱싱 중, 재시도 횟수 소진", extra={"file_id": file_id, "reindex_run": reindex_run})
+        if reindex_run is not None:
+            # 재인덱싱에서 이 파일을 빼고 성공으로 치면 일부 파일만 옛 벡터로 남으므로 실행 전체를 실패시킵니다.
+            raise exc
+        return "busy"
     except Exception as exc:  # pylint: disable=broad-except
+        if task.request.retries < task.max_retries:
+            countdown = backoff_delay(
+                task.request.retries,
+                settings.index_task_retry_backoff_seconds,
+                settings.index_task_retry_backoff_max_seconds,
+            )
+            LOGGER.warning(
+                "인덱싱 실패, 재시도 예약",
+                extra={"file_id": file_id, "pipeline_id": pipeline_id, "countdown": round(countdown, 1)},
+                exc_info=True,
+            )
+            raise task.retry(exc=exc, countdown=countdown)
         LOGGER.exception("인덱싱 실패", extra={"file_id": file_id, "pipeline_id": pipeline_id})
-        asyncio.run(
-            _mark_file_error(file_id)
-        )
+        if reindex_run is None:
+            run_async(
+                _mark_file_error(file_id)
+            )
         raise exc
+    if reindex_run is None:
+        # 후속 작업은 재시도 경로 밖에서 실행합니다. 여기서 실패해도 같은 파이프라인의 다음 인덱싱 때 다시 실행됩니다.
+        try:
+            run_async(_after_index(pipeline_id))
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.warning("인덱싱 후속 작업 실패", extra={"file_id": file_id, "pipeline_id": pipeline_id}, exc_info=True)
+    return "ok"
+
+
+@celery_app.task(name="index_file", bind=True, max_retries=settings.index_task_max_retries)
+def index_file_task(self, file_id: int, pipeline_id: int | None = None, replaces_file_id: int | None = None) -> str:
+    """Celery 작업 엔트리 포인트.
+
+    replaces_file_id 를 주면 그 파일의 문서를 증분 재인덱싱합니다(바뀐 청크만 임베딩).
+    """
+
+    return run_index_with_retry(self, file_id, pipeline_id, replaces_file_id)
 
 
 async def _mark_file_error(file_id: int) -> None:
@@ -163,10 +532,10 @@ async def _mark_file_error(file_id: int) -> None:
         await session.commit()
 
 
-def enqueue_index_file(file_id: int, pipeline_id: int | None = None) -> None:
+def enqueue_index_file(file_id: int, pipeline_id: int | None = None, replaces_file_id: int | None = None) -> None:
     """라우터에서 사용하기 위한 헬퍼."""
 
-    index_file_task.delay(file_id, pipeline_id)
+    index_file_task.delay(file_id, pipeline_id, replaces_file_id)
 
 
-__all__ = ["enqueue_index_file", "index_file_task"]
+__all__ = ["enqueue_index_file", "index_file_task", "run_index_with_retry"]
@@ -0,0 +1,47 @@
+"""주기 정리 Celery 태스크.
+
+비전공자 팁: 오래 쓰지 않은 캐시 항목을 정기적으로 지워 저장 공간을 일정하게 유지합니다.
+벡터 인덱스 설정을 바꾼 뒤에는 rebuild_vector_indexes 로 인덱스를 무중단 재생성합니다.
+"""
+from __future__ import annotations
+
+import logging
+
+from backend.deps.db import get_session
+from backend.deps.settings import settings
+from backend.services import embedding_cache
+from backend.services.vector_index import rebuild_vector_indexes
+from backend.workers.celery_app import celery_app
+from backend.workers.runtime import run_async
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def _evict_embedding_cache() -> int:
+    async with get_session() as session:
+        deleted = await embedding_cache.evict(
+            session, ttl_days=settings.embed_cache_ttl_days, max_rows=settings.embed_cache_max_rows
+        )
+        await session.commit()
+    return deleted
+
+
+@celery_app.task(name="evict_embedding_cache")
+def evict_embedding_cache_task() -> int:
+    """임베딩 캐시 TTL/LRU 정리."""
+
+    deleted = run_async(_evict_embedding_cache())
+    LOGGER.info("임베딩 캐시 정리", extra={"deleted": deleted})
+    return deleted
+
+
+@celery_app.task(name="rebuild_vector_indexes")
+def rebuild_vector_indexes_task(force: bool = False) -> list[str]:
+    """설정(PGVECTOR_*)과 다른 벡터 인덱스를 CONCURRENTLY 재생성. force 면 전부 재생성."""
+
+    rebuilt = run_async(rebuild_vector_indexes(force=force))
+    LOGGER.info("벡터 인덱스 재생성", extra={"indexes": rebuilt})
+    return rebuilt
+
+
+__all__ = ["evict_embedding_cache_task", "rebuild_vector_indexes_task"]
@@ -1,16 +1,161 @@
-"""재인덱싱 태스크 스텁."""
+"""파이프라인 재인덱싱 Celery 태스크.
+
+비전공자 팁: 파이프라인의 파일 수천 개를 한꺼번에 큐에 넣으면 임베딩 서비스와 DB가 몰려 다른 업로드
+인덱싱까지 느려집니다. 파일을 REINDEX_CONCURRENCY 개의 줄(chain)로 나눠 줄마다 하나씩 차례로
+인덱싱하므로 동시에 도는 파일 수가 줄 수를 넘지 않고, 파일 태스크에는 워커당 속도 제한(REINDEX_RATE_LIMIT)을
+겁니다. 모든 줄이 끝나면(chord) finish_reindex 가 새 인덱스로 한 번에 바꾸고, 하나라도 재시도 끝에
+실패하면 reindex_failed 가 대기 문서를 지웁니다.
+
+    reindex_pipeline ─┬─ 줄1: reindex_file → reindex_file → …  ─┐
+                      ├─ 줄2: reindex_file → …                  ├─ finish_reindex (실패 시 reindex_failed)
+                      └─ 줄N: …                                 ─┘
+"""
 from __future__ import annotations
 
+import logging
+
+from celery import chain, chord, group
+
+from backend.deps.db import get_session
+from backend.deps.settings import settings
+from backend.services import reindex
+from backend.services.memory_index import notify_pipeline_changed
+from backend.services.vector_index import ensure_pipeline_index
 from backend.workers.celery_app import celery_app
-from backend.workers.tasks_index import index_file_task
+from backend.workers.runtime import run_async
+from backend.workers.tasks_index import run_index_with_retry
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def _start(pipeline_id: int, run_id: int | None) -> tuple[int | None, list[int] | None]:
+    """실행을 준비하고 (run_id, 파일 목록)을 반환합니다. 이미 chord 를 보낸 실행이면 파일 목록은 None."""
+
+    async with get_session() as session:
+        if run_id is None:
+            await reindex.expire_stale_run(session, pipeline_id, settings.reindex_stale_seconds)
+            run_id = await reindex.create_run(session, pipeline_id)
+            if run_id is None:
+                await session.commit()
+                return None, None
+        # 보낸 시각을 파일 목록·총계와 같은 트랜잭션에 기록합니다. 커밋 뒤 chord 를 보내기 전에 죽으면
+        # 실행은 진행 없이 남았다가 REINDEX_STALE_SECONDS 뒤 정리됩니다.
+        if not await reindex.claim_dispatch(session, run_id):
+            return run_id, None
+        file_ids = await reindex.pipeline_file_ids(session, pipeline_id)
+        await reindex.set_total(session, run_id, len(file_ids))
+        await session.commit()
+    return run_id, file_ids
+
+
+async def _should_index(run_id: int, file_id: int) -> bool:
+    async with get_session() as session:
+        run = await reindex.get_run(session, run_id)
+        if run is None or run.status != reindex.RUNNING:
+            return False
+        # acks_late 로 같은 태스크가 다시 배달돼도 이미 끝낸 파일은 다시 만들지 않습니다.
+        return not await reindex.file_staged(session, run_id, file_id)
+
+
+async def _drop_if_stopped(run_id: int) -> None:
+    # 파일을 인덱싱하는 사이 실행이 취소/정리됐다면 방금 만든 대기 문서가 남지 않도록 지웁니다.
+    async with get_session() as session:
+        run = await reindex.get_run(session, run_id)
+        if run is not None and run.status != reindex.RUNNING:
+            await reindex.discard_run(session, run_id, run.error or "stopped")
+            await session.commit()
+
+
+async def _finish(run_id: int) -> int | None:
+    async with get_session() as session:
+        pipeline_id = await reindex.switch_over(session, run_id)
+        await session.commit()
+    if pipeline_id is not None:
+        if settings.memory_index_enabled:
+            await notify_pipeline_changed(pipeline_id)
+        await ensure_pipeline_index(pipeline_id, min_rows=settings.pipeline_index_min_rows)
+    return pipeline_id
+
+
+async def _discard(run_id: int, error: str) -> None:
+    async with get_session() as session:
+        await reindex.discard_run(session, run_id, error)
+        await session.commit()
 
 
 @celery_app.task(name="reindex_pipeline")
-def reindex_pipeline(pipeline_id: int) -> str:
-    """단순히 연결된 파일을 순회하는 TODO."""
+def reindex_pipeline(pipeline_id: int, run_id: int | None = None) -> int | None:
+    """파이프라인의 모든 파일을 다시 인덱싱하는 chord 를 보내고 실행 id 를 반환합니다.
+
+    run_id 가 없으면 새 실행을 만듭니다. 이미 진행 중인 실행이 있으면 아무것도 하지 않고 None.
+    다시 배달돼 같은 실행의 chord 를 이미 보냈다면 다시 보내지 않습니다.
+    """
+
+    run_id, file_ids = run_async(_start(pipeline_id, run_id))
+    if run_id is None:
+        LOGGER.warning("이미 재인덱싱 중인 파이프라인", extra={"pipeline_id": pipeline_id})
+        return None
+    if file_ids is None:
+        LOGGER.info("이미 파일 태스크를 보낸 실행, 건너뜀", extra={"pipeline_id": pipeline_id, "run_id": run_id})
+        return run_id
+    LOGGER.info("재인덱싱 시작", extra={"pipeline_id": pipeline_id, "run_id": run_id, "files": len(file_ids)})
+    if not file_ids:
+        run_async(_finish(run_id))
+        return run_id
+    lanes = [
+        chain(*(reindex_file_task.si(run_id, file_id, pipeline_id) for file_id in lane))
+        for lane in reindex.split_lanes(file_ids, settings.reindex_concurrency)
+    ]
+    chord(group(lanes))(finish_reindex.si(run_id).on_error(reindex_failed.si(run_id)))
+    return run_id
+
+
+@celery_app.task(
+    name="reindex_file",
+    bind=True,
+    max_retries=settings.index_task_max_retries,
+    rate_limit=settings.reindex_rate_limit or None,
+)
+def reindex_file_task(self, run_id: int, file_id: int, pipeline_id: int) -> str:
+    """재인덱싱 실행(run_id)의 대기 문서로 파일 하나를 인덱싱합니다."""
+
+    if not run_async(_should_index(run_id, file_id)):
+        return "skipped"
+    result = run_index_with_retry(self, file_id, pipeline_id, reindex_run=run_id)
+    run_async(_drop_if_stopped(run_id))
+    return result
+
+
+@celery_app.task(name="finish_reindex")
+def finish_reindex(run_id: int) -> int | None:
+    """모든 파일이 성공한 뒤 새 인덱스로 한 번에 바꿉니다."""
+
+    pipeline_id = run_async(_finish(run_id))
+    if pipeline_id is None:
+        LOGGER.warning("재인덱싱을 바꾸지 않음(진행 중이 아니거나 빠진 파일 있음)", extra={"run_id": run_id})
+    else:
+        LOGGER.info("재인덱싱 완료", extra={"run_id": run_id, "pipeline_id": pipeline_id})
+    return pipeline_id
+
+
+@celery_app.task(name="reindex_failed")
+def reindex_failed(run_id: int) -> None:
+    """파일 태스크가 최종 실패하면 대기 문서를 지우고 실행을 failed 로 표시합니다."""
+
+    LOGGER.error("재인덱싱 실패, 기존 인덱스 유지", extra={"run_id": run_id})
+    run_async(_discard(run_id, "file indexing failed"))
+
+
+def enqueue_reindex_pipeline(pipeline_id: int, run_id: int) -> None:
+    """라우터에서 사용하기 위한 헬퍼."""
 
-    # TODO: 파이프라인-파일 매핑 테이블 생성 후 구현
-    return f"queued reindex for {pipeline_id}"
+    reindex_pipeline.delay(pipeline_id, run_id)
 
 
-__all__ = ["reindex_pipeline"]
+__all__ = [
+    "enqueue_reindex_pipeline",
+    "finish_reindex",
+    "reindex_failed",
+    "reindex_file_task",
+    "reindex_pipeline",
+]
@@ -0,0 +1,108 @@
+"""청킹 벤치마크: 기존 단어 창(sliding_window_chunks) vs 오프셋 토큰 청커(OffsetChunker).
+
+고정 시드로 만든 한국어/영문/코드 혼합 코퍼스(기본 50MB)를 두 방식으로 나누고
+처리 시간, 청크 수, 청크당 추정 토큰 수 분포(최소/p50/최대), 문장 끝에서 끝난 청크 비율을 비교합니다.
+스트리밍 경로(1MB 조각 → 전처리 → 청킹)도 따로 잽니다. DB/임베딩 서비스는 필요 없습니다.
+
+실행 예시(저장소 루트에서):
+    python benchmarks/bench_chunking.py --mb 50
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.services.chunking import (  # noqa: E402
+    EstimatedTokenCounter,
+    OffsetChunker,
+    iter_sliding_window_chunks,
+    sliding_window_chunks,
+)
+from backend.services.preprocess import StreamingPreprocessor  # noqa: E402
+
+PART_CHARS = 1024 * 1024
+
+SENTENCES = [
+    "환불은 구매 후 7일 이내에 고객센터나 앱의 주문 내역에서 신청할 수 있습니다.",
+    "제품 코드 KX-1042 모델은 필터 교체 알림이 뜨면 커버를 닫고 버튼을 3초간 누르세요.",
+    "배송 지연이 발생하면 주문 번호와 함께 문의해 주시면 순서대로 안내해 드립니다.",
+    "Hold the reset button for five seconds until the status light blinks twice.",
+    "If the error code E4031 persists, update the firmware and restart the device.",
+    "The warranty covers manufacturing defects for two years from the date of purchase.",
+]
+CODE = "```\ndef retry(call, attempts=3):\n    for _ in range(attempts):\n        call()\n```"
+
+
+def fixture_corpus(megabytes: int, seed: int = 5) -> str:
+    rng = random.Random(seed)
+    target = megabytes * 1024 * 1024
+    parts: list[str] = []
+    size = 0
+    while size < target:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 8)))
+        if rng.random() < 0.1:
+            paragraph += "\n" + CODE
+        parts.append(paragraph)
+        size += len(paragraph.encode("utf-8")) + 2
+    return "\n\n".join(parts)
+
+
+def _percentile(values: list[int], pct: float) -> int:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def _report(name: str, seconds: float, texts: list[str], counter: EstimatedTokenCounter) -> None:
+    tokens = [counter.token_starts(text).size for text in texts]
+    sentence_ends = sum(text.rstrip().endswith((".", "!", "?")) for text in texts) / max(len(texts), 1)
+    print(
+        f"{name:>18} {seconds:>8.2f} {len(texts):>8} {min(tokens):>6} {_percentile(tokens, 0.5):>6}"
+        f" {max(tokens):>6} {sentence_ends:>9.2%}"
+    )
+
+
+def _parts(text: str) -> list[str]:
+    return [text[start : start + PART_CHARS] for start in range(0, len(text), PART_CHARS)]
+
+
+def main(megabytes: int, chunk_tokens: int, overlap_tokens: int) -> None:
+    corpus = fixture_corpus(megabytes)
+    counter = EstimatedTokenCounter()
+    chunker = OffsetChunker(chunk_tokens=chunk_tokens, overlap_tokens=overlap_tokens, counter=counter)
+    print(f"corpus={len(corpus.encode('utf-8')) / 1024 / 1024:.1f}MB chars={len(corpus)}")
+    print(f"{'method':>18} {'sec':>8} {'chunks':>8} {'tok_min':>6} {'tok_p50':>6} {'tok_max':>6} {'sent_end':>9}")
+
+    start = time.perf_counter()
+    words = sliding_window_chunks(corpus)
+    _report("words", time.perf_counter() - start, words, counter)
+
+    start = time.perf_counter()
+    views = list(chunker.chunks(corpus))
+    planned = time.perf_counter() - start
+    # 오프셋 계산과 본문 문자열을 꺼내는 시간을 나눠 봅니다.
+    texts = [chunk.text for chunk in views]
+    elapsed = time.perf_counter() - start
+    print(f"{'offset(plan only)':>18} {planned:>8.2f}")
+    _report("offset", elapsed, texts, counter)
+
+    start = time.perf_counter()
+    streamed = list(iter_sliding_window_chunks(StreamingPreprocessor().words(_parts(corpus))))
+    _report("words(stream)", time.perf_counter() - start, streamed, counter)
+
+    start = time.perf_counter()
+    streamed = [chunk.text for chunk in chunker.iter_chunks(StreamingPreprocessor().text(_parts(corpus)))]
+    _report("offset(stream)", time.perf_counter() - start, streamed, counter)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=50)
+    parser.add_argument("--chunk-tokens", type=int, default=480)
+    parser.add_argument("--overlap-tokens", type=int, default=64)
+    args = parser.parse_args()
+    main(args.mb, args.chunk_tokens, args.overlap_tokens)
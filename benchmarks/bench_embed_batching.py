@@ -0,0 +1,64 @@
+"""인덱싱 임베딩 요청 크기 벤치마크: 요청당 텍스트 수별 처리량(texts/s).
+
+같은 픽스처 청크를 embed_in_batches 로 요청 크기(--sizes)와 동시 요청 수(--concurrency)를 바꿔 가며 보내고,
+초당 임베딩 수와 전체 시간을 비교합니다. INDEX_EMBED_REQUEST_ITEMS 기본값을 정할 때 씁니다.
+
+실행 예시(.env 값을 환경변수로 지정하고 임베딩 서비스가 떠 있는 상태에서 저장소 루트에서):
+    python benchmarks/bench_embed_batching.py --texts 4096 --sizes 16,32,64,128,256 --concurrency 1,2,4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.deps.embedding import embed_in_batches  # noqa: E402
+from backend.deps.http import close_http_clients  # noqa: E402
+
+MODEL = "gte-small"
+WORDS = ["환불", "배송", "교환", "보증", "설치", "필터", "전원", "앱", "연결", "오류", "고객센터", "모델", "refund", "error"]
+
+
+def fixture_texts(count: int, words: int, seed: int = 5) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + f" #{i}" for i in range(count)]
+
+
+async def main(count: int, words: int, sizes: list[int], concurrencies: list[int]) -> None:
+    texts = fixture_texts(count, words)
+    chars = sum(map(len, texts))
+    # 첫 연결/모델 로딩 시간을 빼기 위한 예열
+    await embed_in_batches(texts[:8], MODEL)
+    print(f"texts={count} avg_chars={chars / count:.0f}")
+    print(f"{'batch':>6} {'conc':>5} {'seconds':>8} {'texts/s':>9}")
+    try:
+        for size in sizes:
+            for concurrency in concurrencies:
+                started = time.perf_counter()
+                await embed_in_batches(texts, MODEL, max_items=size, max_chars=chars, concurrency=concurrency)
+                elapsed = time.perf_counter() - started
+                print(f"{size:>6} {concurrency:>5} {elapsed:>8.2f} {count / elapsed:>9.1f}")
+    finally:
+        await close_http_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=4096)
+    parser.add_argument("--words", type=int, default=200)
+    parser.add_argument("--sizes", default="16,32,64,128,256")
+    parser.add_argument("--concurrency", default="1,2,4")
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.texts,
+            args.words,
+            [int(value) for value in args.sizes.split(",")],
+            [int(value) for value in args.concurrency.split(",")],
+        )
+    )
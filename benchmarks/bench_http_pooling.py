@@ -0,0 +1,64 @@
+"""임베딩 호출 지연 비교: 요청마다 새 클라이언트 vs 공유 커넥션 풀.
+
+질의 경로(_embed_query)와 같은 1문장 /embed 요청을 동시에 보내 p50/p95/p99 지연을 비교합니다.
+
+실행 예시(임베딩 서비스가 떠 있는 상태에서):
+    python benchmarks/bench_http_pooling.py --url http://localhost:8001 --concurrency 200 --rounds 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+async def _per_call(url: str, idx: int) -> float:
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        resp = await client.post(f"{url}/embed", json={"texts": [f"질문 {idx}"]})
+        resp.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def _pooled(client: httpx.AsyncClient, idx: int) -> float:
+    start = time.perf_counter()
+    resp = await client.post("/embed", json={"texts": [f"질문 {idx}"]})
+    resp.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main(url: str, concurrency: int, rounds: int) -> None:
+    per_call: list[float] = []
+    pooled: list[float] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limits) as client:
+        await _pooled(client, -1)  # 워밍업
+        for round_no in range(rounds):
+            base = round_no * concurrency
+            per_call += await asyncio.gather(*[_per_call(url, base + i) for i in range(concurrency)])
+            pooled += await asyncio.gather(*[_pooled(client, base + i) for i in range(concurrency)])
+
+    print(f"concurrency={concurrency} rounds={rounds}")
+    print(f"{'mode':>10} {'mean(ms)':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10}")
+    for name, samples in (("per-call", per_call), ("pooled", pooled)):
+        print(
+            f"{name:>10} {statistics.mean(samples) * 1000:>10.1f} {_percentile(samples, 0.5) * 1000:>10.1f}"
+            f" {_percentile(samples, 0.95) * 1000:>10.1f} {_percentile(samples, 0.99) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.concurrency, args.rounds))
@@ -0,0 +1,133 @@
+"""검색 방식 벤치마크: 벡터(search_knn) vs 하이브리드(search_hybrid, RRF).
+
+고정 시드로 만든 픽스처 코퍼스(제품 코드/오류 번호가 들어간 한국어 문서 청크)를 임시 파이프라인에 넣고,
+질문마다 정답 청크가 top_k 안에 드는 비율(recall@k)과 p50/p95 지연을 비교합니다.
+질문은 두 종류입니다: 코드형(제품 코드·오류 번호로 묻기), 서술형(문장 내용으로 묻기).
+키워드 검색은 별도 세션으로 실행되므로 데이터를 커밋하고, 끝나면 지웁니다.
+
+실행 예시(.env 값을 환경변수로 지정하고 임베딩 서비스가 떠 있는 상태에서 저장소 루트에서):
+    python benchmarks/bench_hybrid_search.py --docs 2000 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import sqlalchemy as sa  # noqa: E402
+
+from backend.deps.db import get_session  # noqa: E402
+from backend.deps.embedding import request_embeddings  # noqa: E402
+from backend.services.index_store import ChunkRecord, insert_chunks_with_embeddings  # noqa: E402
+from backend.services.search import search_similar_chunks  # noqa: E402
+
+MODEL = "gte-small"
+TOP_K = 8
+
+PRODUCTS = ["공기청정기", "로봇청소기", "식기세척기", "전기레인지", "제습기", "무선이어폰", "스마트워치", "모니터"]
+SYMPTOMS = [
+    ("전원이 켜지지 않습니다", "전원 어댑터를 다시 연결하고 리셋 버튼을 5초간 누르세요"),
+    ("필터 교체 알림이 사라지지 않습니다", "필터 커버를 닫은 상태로 알림 버튼을 3초간 누르세요"),
+    ("앱과 연결이 끊깁니다", "공유기 2.4GHz 대역에 다시 연결한 뒤 앱에서 기기를 재등록하세요"),
+    ("소음이 커졌습니다", "수평을 맞추고 하단 팬 주변 이물질을 제거하세요"),
+    ("배터리가 빨리 닳습니다", "펌웨어를 최신으로 업데이트하고 절전 모드를 켜세요"),
+]
+
+
+def fixture_corpus(docs: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(docs):
+        product = rng.choice(PRODUCTS)
+        symptom, fix = rng.choice(SYMPTOMS)
+        code = f"KX-{1000 + i}"
+        error = f"E{4000 + rng.randrange(6000)}"
+        text = (
+            f"{product} {code} 모델에서 {symptom}. 화면에 오류 코드 {error} 가 표시되면 {fix}. "
+            f"문제가 계속되면 고객센터에 모델명 {code} 와 오류 코드 {error} 를 알려 주세요."
+        )
+        corpus.append({"pos": i, "text": text, "code": code, "error": error, "product": product, "symptom": symptom})
+    return corpus
+
+
+def fixture_queries(corpus: list[dict], count: int, seed: int = 11) -> list[tuple[str, str, int]]:
+    rng = random.Random(seed)
+    queries = []
+    for item in rng.sample(corpus, min(count, len(corpus))):
+        queries.append(("code", f"{item['code']} 에서 {item['error']} 오류는 어떻게 해결하나요?", item["pos"]))
+        queries.append(("text", f"{item['product']} {item['symptom']} 어떻게 하나요?", item["pos"]))
+    return queries
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+async def _load(corpus: list[dict]) -> tuple[int, int, dict[int, int]]:
+    async with get_session() as session:
+        pipeline_id = (
+            await session.execute(sa.text("INSERT INTO pipelines (name) VALUES ('bench-hybrid') RETURNING id"))
+        ).scalar_one()
+        document_id = (
+            await session.execute(sa.text("INSERT INTO documents (file_id, lang) VALUES (NULL, 'ko') RETURNING id"))
+        ).scalar_one()
+        records = []
+        for start in range(0, len(corpus), 256):
+            batch = corpus[start : start + 256]
+            vectors = await request_embeddings([item["text"] for item in batch], MODEL)
+            records += [ChunkRecord(pos=item["pos"], text=item["text"], vector=vec) for item, vec in zip(batch, vectors)]
+        await insert_chunks_with_embeddings(session, document_id, records, model=MODEL, pipeline_id=pipeline_id)
+        rows = await session.execute(sa.text("SELECT id, pos FROM chunks WHERE document_id = :d"), {"d": document_id})
+        pos_to_chunk = {row.pos: row.id for row in rows}
+        await session.commit()
+    return pipeline_id, document_id, pos_to_chunk
+
+
+async def _cleanup(pipeline_id: int, document_id: int) -> None:
+    async with get_session() as session:
+        await session.execute(sa.text("DELETE FROM embeddings WHERE pipeline_id = :p"), {"p": pipeline_id})
+        await session.execute(sa.text("DELETE FROM chunks WHERE document_id = :d"), {"d": document_id})
+        await session.execute(sa.text("DELETE FROM documents WHERE id = :d"), {"d": document_id})
+        await session.execute(sa.text("DELETE FROM pipelines WHERE id = :p"), {"p": pipeline_id})
+        await session.commit()
+
+
+async def main(docs: int, queries: int) -> None:
+    corpus = fixture_corpus(docs)
+    pipeline_id, document_id, pos_to_chunk = await _load(corpus)
+    try:
+        questions = fixture_queries(corpus, queries)
+        vectors = await request_embeddings([q for _, q, _ in questions], MODEL)
+        print(f"docs={docs} queries={len(questions)} top_k={TOP_K}")
+        print(f"{'method':>14} {'kind':>5} {'recall@k':>9} {'p50(ms)':>9} {'p95(ms)':>9}")
+        for method in ("search_knn", "search_hybrid"):
+            stats: dict[str, tuple[list[float], list[int]]] = {"code": ([], []), "text": ([], [])}
+            for (kind, question, pos), vector in zip(questions, vectors):
+                async with get_session() as session:
+                    start = time.perf_counter()
+                    hits = await search_similar_chunks(
+                        session, pipeline_id, list(vector), TOP_K, 0.0, query_text=question, method=method
+                    )
+                    stats[kind][0].append(time.perf_counter() - start)
+                stats[kind][1].append(int(pos_to_chunk[pos] in {hit.chunk_id for hit in hits}))
+            for kind, (latencies, found) in stats.items():
+                print(
+                    f"{method:>14} {kind:>5} {sum(found) / len(found):>9.3f}"
+                    f" {_percentile(latencies, 0.5) * 1000:>9.1f} {_percentile(latencies, 0.95) * 1000:>9.1f}"
+                )
+    finally:
+        await _cleanup(pipeline_id, document_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.docs, args.queries))
@@ -0,0 +1,95 @@
+"""청크/임베딩 저장 방식 벤치마크: 행 단위 루프 vs 다중 행 INSERT.
+
+실행 예시(.env 값을 환경변수로 지정한 뒤 저장소 루트에서):
+    python benchmarks/bench_index_insert.py
+
+각 크기마다 트랜잭션을 롤백하므로 DB에 데이터가 남지 않습니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import sqlalchemy as sa  # noqa: E402
+
+from backend.deps.db import get_session  # noqa: E402
+from backend.services.index_store import (  # noqa: E402
+    ChunkRecord,
+    chunk_hash,
+    insert_chunks_with_embeddings,
+    vector_literal,
+)
+
+SIZES = (100, 1_000, 10_000)
+DIM = 384
+
+
+def _records(n: int) -> list[ChunkRecord]:
+    rng = random.Random(n)
+    return [
+        ChunkRecord(pos=i, text=f"chunk {i} " + "lorem ipsum " * 60, vector=[rng.random() for _ in range(DIM)])
+        for i in range(n)
+    ]
+
+
+async def _per_row(session, document_id: int, records: list[ChunkRecord], now: dt.datetime) -> None:
+    """기존 _index_file 의 행 단위 루프를 그대로 재현."""
+
+    for rec in records:
+        row = await session.execute(
+            sa.text(
+                """
+                INSERT INTO chunks (document_id, pos, text, hash, created_at)
+                VALUES (:doc_id, :pos, :text, :hash, :created_at)
+                RETURNING id
+                """
+            ),
+            {"doc_id": document_id, "pos": rec.pos, "text": rec.text, "hash": chunk_hash(rec.text), "created_at": now},
+        )
+        chunk_id = row.scalar_one()
+        await session.execute(
+            sa.text(
+                """
+                INSERT INTO embeddings (chunk_id, model, dim, vec, created_at)
+                VALUES (:chunk_id, 'bench', :dim, CAST(:vec AS vector), :created_at)
+                """
+            ),
+            {"chunk_id": chunk_id, "dim": DIM, "vec": vector_literal(rec.vector), "created_at": now},
+        )
+
+
+async def _run(n: int, bulk: bool) -> float:
+    records = _records(n)
+    now = dt.datetime.utcnow()
+    async with get_session() as session:
+        doc = await session.execute(
+            sa.text("INSERT INTO documents (file_id, lang, created_at) VALUES (NULL, 'en', :now) RETURNING id"),
+            {"now": now},
+        )
+        document_id = doc.scalar_one()
+        start = time.perf_counter()
+        if bulk:
+            await insert_chunks_with_embeddings(session, document_id, records, model="bench", created_at=now)
+        else:
+            await _per_row(session, document_id, records, now)
+        elapsed = time.perf_counter() - start
+        await session.rollback()
+    return elapsed
+
+
+async def main() -> None:
+    print(f"{'chunks':>8} {'per-row(s)':>12} {'bulk(s)':>10} {'speedup':>8}")
+    for n in SIZES:
+        per_row = await _run(n, bulk=False)
+        bulk = await _run(n, bulk=True)
+        print(f"{n:>8} {per_row:>12.3f} {bulk:>10.3f} {per_row / max(bulk, 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""인덱싱 파이프라인 벤치마크: 순차 처리 vs 제한 큐 파이프라인(IndexPipeline).
+
+임베딩/DB 저장 지연을 asyncio.sleep 으로 흉내 내므로 외부 서비스 없이 단계 겹침 효과만 봅니다.
+실제 문서의 단계별 시간은 index_document_stage_seconds 메트릭과 "인덱싱 단계 시간" 로그로 확인합니다.
+
+실행 예시(저장소 루트에서):
+    python benchmarks/bench_index_pipeline.py --chunks 5000 --batch 256 --embed-ms 400 --store-ms 150
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.services.index_pipeline import IndexPipeline, iter_batches, summarize  # noqa: E402
+
+
+async def main(chunks: int, batch: int, embed_ms: float, store_ms: float, concurrency: int, queue: int) -> None:
+    async def embed(items: list[int]) -> None:
+        await asyncio.sleep(embed_ms / 1000)
+
+    async def store(items: list[int], _result: None) -> None:
+        await asyncio.sleep(store_ms / 1000)
+
+    started = time.perf_counter()
+    for items in iter_batches(range(chunks), batch):
+        await store(items, await embed(items))
+    sequential = time.perf_counter() - started
+
+    stats = await IndexPipeline(embed, store, concurrency=concurrency, queue_batches=queue).run(
+        iter_batches(range(chunks), batch)
+    )
+    print(f"chunks={chunks} batch={batch} embed={embed_ms}ms store={store_ms}ms concurrency={concurrency}")
+    print(f"sequential {sequential:.2f}s  pipeline {stats.total:.2f}s  speedup x{sequential / stats.total:.2f}")
+    print(summarize(stats))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--embed-ms", type=float, default=400)
+    parser.add_argument("--store-ms", type=float, default=150)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.chunks, args.batch, args.embed_ms, args.store_ms, args.concurrency, args.queue))
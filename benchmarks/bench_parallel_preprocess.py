@@ -0,0 +1,63 @@
+"""전처리 벤치마크: 한 프로세스 vs 프로세스 풀(parallel_preprocess).
+
+고정 시드 코퍼스(PII 가 섞인 한국어/영문 문단)를 인덱싱과 같은 1MB 조각 스트림으로 전처리합니다.
+워커 수별 처리 시간과 처리량, 결과가 한 프로세스 처리와 같은지 확인합니다.
+
+실행 예시(.env 값을 환경변수로 지정하고 저장소 루트에서):
+    python benchmarks/bench_parallel_preprocess.py --mb 100 --workers 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.services.parallel_preprocess import ParallelPreprocessor  # noqa: E402
+from backend.services.preprocess import StreamingPreprocessor  # noqa: E402
+
+PART_CHARS = 1024 * 1024
+WORDS = ["환불은", "구매", "후", "7일", "이내에", "가능합니다.", "Hold", "the", "reset", "button", "```", "KX-1042"]
+PII = ["010-1234-5678", "900101-1234567", "support@example.com"]
+
+
+def fixture_parts(megabytes: int, seed: int = 3) -> list[str]:
+    rng = random.Random(seed)
+    # 조각 8개를 돌려 쓰되, 조각 경계가 단어 한가운데에 오도록 그대로 잘라 씁니다.
+    base = " ".join(rng.choice(PII) if rng.random() < 0.01 else rng.choice(WORDS) for _ in range(PART_CHARS))
+    parts = [base[start : start + PART_CHARS] for start in range(0, len(base), PART_CHARS)][:8]
+    return [parts[i % len(parts)] for i in range(megabytes)]
+
+
+def _run(preprocessor: StreamingPreprocessor, parts: list[str]) -> tuple[float, str]:
+    digest = sha1()
+    start = time.perf_counter()
+    for segment in preprocessor.text(parts):
+        digest.update(segment.encode("utf-8"))
+    return time.perf_counter() - start, digest.hexdigest()
+
+
+def main(megabytes: int, workers: list[int]) -> None:
+    parts = fixture_parts(megabytes)
+    baseline, expected = _run(StreamingPreprocessor(), parts)
+    print(f"{'workers':>8} {'sec':>8} {'MB/s':>8} {'speedup':>8}")
+    print(f"{1:>8} {baseline:>8.2f} {megabytes / baseline:>8.1f} {1.0:>8.2f}")
+    for count in workers:
+        with ProcessPoolExecutor(count) as pool:
+            pool.submit(int).result()  # 워커 기동 시간은 빼고 잽니다.
+            elapsed, digest = _run(ParallelPreprocessor(pool, max_pending=count * 2), parts)
+        assert digest == expected, "병렬 결과가 한 프로세스 결과와 다릅니다"
+        print(f"{count:>8} {elapsed:>8.2f} {megabytes / elapsed:>8.1f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+    main(args.mb, args.workers)
@@ -0,0 +1,168 @@
+"""파이프라인 필터 검색 벤치마크: JSONB 후필터(기존) vs pipeline_id 컬럼 + 부분 인덱스.
+
+기본값은 벡터 1,000,000개를 파이프라인 500개에 Zipf 분포로 나눠 담습니다(소수의 큰 파이프라인 +
+다수의 작은 파이프라인). 큰/중간/작은 파이프라인별로 지연(p50/p95)과 반환 건수(top_k 미달 여부)를 비교합니다.
+bench_search 스키마를 새로 만들고 끝나면 삭제합니다. 데이터 생성에 수십 분이 걸릴 수 있습니다.
+
+실행 예시(.env 값을 환경변수로 지정한 뒤 저장소 루트에서):
+    python benchmarks/bench_pipeline_search.py --vectors 1000000 --pipelines 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import sqlalchemy as sa  # noqa: E402
+
+from backend.deps.db import engine  # noqa: E402
+from backend.services.index_store import vector_literal  # noqa: E402
+from backend.services.vector_index import ivfflat_lists  # noqa: E402
+
+DIM = 384
+TOP_K = 8
+
+OLD_QUERY = """
+    SELECT c.id, 1 - (e.vec <#> CAST(:q AS vector)) AS score
+    FROM bench_search.embeddings e
+    JOIN bench_search.chunks c ON c.id = e.chunk_id
+    JOIN bench_search.documents d ON d.id = c.document_id
+    WHERE (d.meta ->> 'pipeline_id') = :pid
+    ORDER BY e.vec <#> CAST(:q AS vector)
+    LIMIT :k
+"""
+
+NEW_QUERY = """
+    SELECT e.chunk_id, 1 - (e.vec <=> CAST(:q AS vector)) AS score
+    FROM bench_search.embeddings_p e
+    WHERE e.pipeline_id = {pid}
+    ORDER BY e.vec <=> CAST(:q AS vector)
+    LIMIT :k
+"""
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def _pipeline_sizes(vectors: int, pipelines: int) -> list[int]:
+    weights = [1.0 / (rank + 1) for rank in range(pipelines)]
+    total = sum(weights)
+    sizes = [max(int(vectors * w / total), 1) for w in weights]
+    sizes[0] += vectors - sum(sizes)
+    return sizes
+
+
+async def _setup(conn, vectors: int, pipelines: int, min_rows: int) -> list[int]:
+    sizes = _pipeline_sizes(vectors, pipelines)
+    await conn.execute(sa.text("DROP SCHEMA IF EXISTS bench_search CASCADE"))
+    await conn.execute(sa.text("CREATE SCHEMA bench_search"))
+    await conn.execute(sa.text("CREATE TABLE bench_search.documents (id SERIAL PRIMARY KEY, meta JSONB NOT NULL)"))
+    await conn.execute(
+        sa.text("CREATE TABLE bench_search.chunks (id SERIAL PRIMARY KEY, document_id INTEGER NOT NULL)")
+    )
+    await conn.execute(
+        sa.text(
+            f"CREATE TABLE bench_search.embeddings (id SERIAL PRIMARY KEY, chunk_id INTEGER NOT NULL, vec VECTOR({DIM}))"
+        )
+    )
+    for pid, size in enumerate(sizes, start=1):
+        await conn.execute(
+            sa.text("INSERT INTO bench_search.documents (meta) VALUES (jsonb_build_object('pipeline_id', :pid))"),
+            {"pid": pid},
+        )
+        await conn.execute(
+            sa.text(
+                """
+                INSERT INTO bench_search.chunks (document_id)
+                SELECT currval('bench_search.documents_id_seq') FROM generate_series(1, :n)
+                """
+            ),
+            {"n": size},
+        )
+    await conn.execute(
+        sa.text(
+            f"""
+            INSERT INTO bench_search.embeddings (chunk_id, vec)
+            SELECT c.id, (SELECT array_agg(random() - 0.5) FROM generate_series(1, {DIM}) g WHERE g > c.id * 0)::vector
+            FROM bench_search.chunks c
+            """
+        )
+    )
+    await conn.execute(
+        sa.text(
+            f"CREATE INDEX ON bench_search.embeddings USING ivfflat (vec vector_cosine_ops) "
+            f"WITH (lists = {ivfflat_lists(vectors)})"
+        )
+    )
+    await conn.execute(
+        sa.text(
+            """
+            CREATE TABLE bench_search.embeddings_p AS
+            SELECT e.chunk_id, (d.meta ->> 'pipeline_id')::integer AS pipeline_id, e.vec
+            FROM bench_search.embeddings e
+            JOIN bench_search.chunks c ON c.id = e.chunk_id
+            JOIN bench_search.documents d ON d.id = c.document_id
+            """
+        )
+    )
+    await conn.execute(sa.text("CREATE INDEX ON bench_search.embeddings_p (pipeline_id)"))
+    for pid, size in enumerate(sizes, start=1):
+        if size >= min_rows:
+            await conn.execute(
+                sa.text(
+                    f"CREATE INDEX ON bench_search.embeddings_p USING ivfflat (vec vector_cosine_ops) "
+                    f"WITH (lists = {ivfflat_lists(size)}) WHERE pipeline_id = {pid}"
+                )
+            )
+    await conn.execute(sa.text("ANALYZE bench_search.embeddings"))
+    await conn.execute(sa.text("ANALYZE bench_search.embeddings_p"))
+    return sizes
+
+
+async def _measure(conn, sql: str, params: dict, repeat: int) -> tuple[float, float, float]:
+    timings, counts = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = (await conn.execute(sa.text(sql), params)).fetchall()
+        timings.append(time.perf_counter() - start)
+        counts.append(len(rows))
+    return _percentile(timings, 0.5), _percentile(timings, 0.95), statistics.mean(counts)
+
+
+async def main(vectors: int, pipelines: int, min_rows: int, repeat: int, keep: bool) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        started = time.perf_counter()
+        sizes = await _setup(conn, vectors, pipelines, min_rows)
+        print(f"setup: {vectors} vectors / {pipelines} pipelines in {time.perf_counter() - started:.0f}s")
+
+        rng = random.Random(0)
+        probes = {"large": 1, "medium": pipelines // 10 or 1, "small": pipelines}
+        print(f"{'pipeline':>10} {'rows':>8} {'layout':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'avg rows':>9}")
+        for label, pid in probes.items():
+            query = vector_literal([rng.random() - 0.5 for _ in range(DIM)])
+            old = await _measure(conn, OLD_QUERY, {"q": query, "pid": str(pid), "k": TOP_K}, repeat)
+            new = await _measure(conn, NEW_QUERY.format(pid=pid), {"q": query, "k": TOP_K}, repeat)
+            for layout, (p50, p95, rows) in (("jsonb", old), ("column", new)):
+                print(f"{label:>10} {sizes[pid - 1]:>8} {layout:>8} {p50 * 1000:>9.1f} {p95 * 1000:>9.1f} {rows:>9.1f}")
+        if not keep:
+            await conn.execute(sa.text("DROP SCHEMA bench_search CASCADE"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--pipelines", type=int, default=500)
+    parser.add_argument("--min-rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="벤치마크 스키마를 삭제하지 않음")
+    args = parser.parse_args()
+    asyncio.run(main(args.vectors, args.pipelines, args.min_rows, args.repeat, args.keep))
@@ -0,0 +1,94 @@
+"""PII/금칙 스캔 벤치마크: 규칙별 반복 패스 vs 단일 패스 스캐너(text_scanner).
+
+기존 방식(PII 규칙마다 re.sub, 금칙 카테고리마다 search)을 그대로 재현해 같은 입력에서 비교합니다.
+- 답변: 1KB 답변 N개에 가드레일(마스킹 + 금칙 탐지) 적용, 건당 평균 지연
+- 문서: 100MB 문서를 1MB 조각으로 나눠 인덱싱 전처리용 마스킹 적용, 처리량(MB/s)
+두 방식의 결과가 같은지도 확인합니다.
+
+실행 예시(저장소 루트에서):
+    python benchmarks/bench_text_scan.py --answers 20000 --mb 100
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from backend.services import moderation_rules, pii_rules  # noqa: E402
+from backend.services.text_scanner import scanner  # noqa: E402
+
+PART_CHARS = 1024 * 1024
+WORDS = [
+    "환불은", "구매", "후", "7일", "이내에", "가능합니다.", "Hold", "the", "reset", "button", "firmware", "update",
+    "고객센터", "문의", "KX-1042", "E4031", "2024-05-01", "https://example.com/help", "v1.2.3",
+]
+PII = ["010-1234-5678", "900101-1234567", "support@example.com", "kim.minsu+help@mail.co.kr"]
+FLAGGED = ["hate", "불법", "damn"]
+
+
+def fixture_text(chars: int, seed: int, pii_rate: float = 0.01, flag_rate: float = 0.002) -> str:
+    rng = random.Random(seed)
+    words: list[str] = []
+    size = 0
+    while size < chars:
+        roll = rng.random()
+        if roll < pii_rate:
+            word = rng.choice(PII)
+        elif roll < pii_rate + flag_rate:
+            word = rng.choice(FLAGGED)
+        else:
+            word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def legacy_scan(text: str) -> tuple[str, list[str]]:
+    masked = text
+    for pattern, replacement in pii_rules.PII_PATTERNS:
+        masked = re.sub(pattern, replacement, masked)
+    flags = [category for category, regex in moderation_rules.CATEGORY_PATTERNS.items() if regex.search(masked)]
+    return masked, flags
+
+
+def legacy_mask(text: str) -> str:
+    return legacy_scan(text)[0]
+
+
+def bench_answers(count: int) -> None:
+    answers = [fixture_text(1024, seed) for seed in range(200)]
+    for answer in answers:
+        result = scanner.scan(answer)
+        assert (result.text, result.flags) == legacy_scan(answer)
+    for name, fn in (("legacy", legacy_scan), ("single-pass", scanner.scan)):
+        start = time.perf_counter()
+        for i in range(count):
+            fn(answers[i % len(answers)])
+        elapsed = time.perf_counter() - start
+        print(f"answers 1KB {name:>12}: {elapsed / count * 1e6:8.1f} us/answer")
+
+
+def bench_document(megabytes: int) -> None:
+    parts = [fixture_text(PART_CHARS, seed) for seed in range(8)]
+    count = megabytes * 1024 * 1024 // PART_CHARS
+    assert all(scanner.mask(part) == legacy_mask(part) for part in parts)
+    for name, fn in (("legacy", legacy_mask), ("single-pass", scanner.mask), ("scan+flags", scanner.scan)):
+        start = time.perf_counter()
+        for i in range(count):
+            fn(parts[i % len(parts)])
+        elapsed = time.perf_counter() - start
+        print(f"document {megabytes}MB {name:>12}: {elapsed:7.2f} s ({megabytes / elapsed:6.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=20000)
+    parser.add_argument("--mb", type=int, default=100)
+    args = parser.parse_args()
+    bench_answers(args.answers)
+    bench_document(args.mb)
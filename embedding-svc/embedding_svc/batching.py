@@ -0,0 +1,134 @@
+"""동시 /embed 요청을 모아 한 번에 인코딩하는 마이크로배처.
+
+간단 설명(비전공자용):
+- 모델은 문장 1개를 여러 번 처리하는 것보다 여러 문장을 한 번에 처리할 때 훨씬 빠릅니다.
+- 짧은 시간(수 ms) 동안 들어온 요청을 모아 하나의 배치로 인코딩한 뒤 결과를 나눠 돌려줍니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Sequence
+
+from prometheus_client import Histogram
+
+EncodeFn = Callable[[str, list[str]], Awaitable[Sequence[Any]]]
+
+BATCH_SIZE = Histogram(
+    "embed_batch_size",
+    "한 번의 model.encode 에 들어간 텍스트 수",
+    ["model"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+QUEUE_WAIT = Histogram(
+    "embed_queue_wait_seconds",
+    "요청이 배치에 합류해 인코딩이 시작되기까지 기다린 시간",
+    ["model"],
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+@dataclass
+class _Pending:
+    texts: list[str]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class _ModelQueue:
+    items: list[_Pending] = field(default_factory=list)
+    size: int = 0
+    timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatcher:
+    """모델별 대기열에 요청을 모았다가 시간 창이 끝나거나 배치가 차면 인코딩합니다.
+
+    max_batch_size 보다 큰 단일 요청은 다른 요청과 섞지 않고 바로 단독 처리합니다.
+    """
+
+    def __init__(self, encode: EncodeFn, max_wait_ms: float = 5.0, max_batch_size: int = 64) -> None:
+        self._encode = encode
+        self.max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+        self._queues: dict[str, _ModelQueue] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, texts: list[str], model: str) -> Sequence[Any]:
+        """텍스트 목록을 대기열에 넣고 해당 벡터들(인코딩 결과의 행 슬라이스)을 돌려받습니다."""
+
+        if not texts:
+            return await self._encode(model, [])
+        loop = asyncio.get_running_loop()
+        pending = _Pending(texts, loop.create_future())
+        if len(texts) >= self.max_batch_size or self.max_wait == 0:
+            await self._run(model, [pending])
+            return await pending.future
+
+        queue = self._queues.setdefault(model, _ModelQueue())
+        if queue.size + len(texts) > self.max_batch_size:
+            self._flush(model)
+            queue = self._queues.setdefault(model, _ModelQueue())
+        queue.items.append(pending)
+        queue.size += len(texts)
+        if queue.size >= self.max_batch_size:
+            self._flush(model)
+        elif queue.timer is None:
+            queue.timer = loop.call_later(self.max_wait, self._flush, model)
+        return await pending.future
+
+    def _flush(self, model: str) -> None:
+        queue = self._queues.pop(model, None)
+        if queue is None or not queue.items:
+            return
+        if queue.timer is not None:
+            queue.timer.cancel()
+        task = asyncio.ensure_future(self._run(model, queue.items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, model: str, items: list[_Pending]) -> None:
+        started = time.perf_counter()
+        for item in items:
+            QUEUE_WAIT.labels(model).observe(started - item.enqueued_at)
+        texts = [text for item in items for text in item.texts]
+        BATCH_SIZE.labels(model).observe(len(texts))
+        try:
+            vectors = await self._encode(model, texts)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._fail(items, exc)
+            return
+        except BaseException as exc:
+            # 종료 중 배치 태스크나 인코딩이 취소되면 기다리는 요청이 멈춰 있지 않도록 오류로 끝낸 뒤 다시 올립니다.
+            error = RuntimeError("embedding batch cancelled")
+            error.__cause__ = exc
+            self._fail(items, error)
+            raise
+        offset = 0
+        for item in items:
+            part = vectors[offset : offset + len(item.texts)]
+            offset += len(item.texts)
+            if not item.future.done():
+                item.future.set_result(part)
+
+    @staticmethod
+    def _fail(items: list[_Pending], exc: Exception) -> None:
+        for item in items:
+            if not item.future.done():
+                item.future.set_exception(exc)
+
+
+def batcher_from_env(encode: EncodeFn) -> MicroBatcher:
+    """환경변수(EMBED_BATCH_WAIT_MS, EMBED_MAX_BATCH)로 배처를 구성합니다."""
+
+    return MicroBatcher(
+        encode,
+        max_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "5")),
+        max_batch_size=int(os.getenv("EMBED_MAX_BATCH", "64")),
+    )
+
+
+__all__ = ["MicroBatcher", "batcher_from_env"]
@@ -0,0 +1,95 @@
+"""모델 추론 실행기와 입장(admission) 제한.
+
+간단 설명(비전공자용):
+- model.encode 는 CPU를 오래 쓰는 동기 함수라 이벤트 루프에서 직접 돌리면 다른 요청(/healthz 등)이 멈춥니다.
+- 추론은 별도 스레드/프로세스 풀에서 돌리고, 대기 요청이 너무 많으면 503으로 즉시 거절합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from .models import DEFAULT_MODEL, encode_texts, get_model
+
+
+class QueueFullError(RuntimeError):
+    """대기 중인 요청 수가 한도를 넘었을 때 발생합니다."""
+
+
+def _warm_worker(model_name: str) -> None:  # pragma: no cover - 자식 프로세스에서 실행
+    """프로세스 풀 워커마다 모델 사본을 한 번만 적재합니다."""
+
+    get_model(model_name)
+
+
+class InferenceExecutor:
+    """스레드 풀(기본) 또는 프로세스 풀에서 encode 를 실행합니다.
+
+    - thread: torch 연산은 GIL 을 풀기 때문에 모델 하나를 공유하며 이벤트 루프를 막지 않습니다.
+    - process: 워커마다 모델 사본을 하나씩 두고 여러 코어에서 동시에 인코딩합니다.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int | None = None, max_pending: int = 256) -> None:
+        if kind not in {"thread", "process"}:
+            raise ValueError(f"unknown executor kind: {kind}")
+        self.kind = kind
+        self.workers = workers or ((os.cpu_count() or 1) if kind == "process" else 1)
+        self.max_pending = max(max_pending, 1)
+        self._pending = 0
+        self._pool: Executor | None = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                    initargs=(DEFAULT_MODEL,),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embed")
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """요청 하나를 입장시키고, 한도를 넘으면 QueueFullError 를 발생시킵니다."""
+
+        if self._pending >= self.max_pending:
+            raise QueueFullError("embedding queue is full")
+        self._pending += 1
+        try:
+            yield
+        finally:
+            self._pending -= 1
+
+    async def encode(self, model_name: str, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), encode_texts, model_name, texts)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def executor_from_env() -> InferenceExecutor:
+    """환경변수(EMBED_EXECUTOR, EMBED_WORKERS, EMBED_MAX_PENDING)로 실행기를 구성합니다."""
+
+    workers = os.getenv("EMBED_WORKERS")
+    return InferenceExecutor(
+        kind=os.getenv("EMBED_EXECUTOR", "thread"),
+        workers=int(workers) if workers else None,
+        max_pending=int(os.getenv("EMBED_MAX_PENDING", "256")),
+    )
+
+
+__all__ = ["InferenceExecutor", "QueueFullError", "executor_from_env"]
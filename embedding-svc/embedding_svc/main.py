@@ -5,11 +5,29 @@
 """
 from __future__ import annotations
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
-from .models import DEFAULT_MODEL, embed_texts
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from prometheus_client import generate_latest
 
-app = FastAPI(title="Embedding Service")
+from .batching import batcher_from_env
+from .executor import QueueFullError, executor_from_env
+from .models import DEFAULT_MODEL, build_response
+from .wire import OCTET_STREAM, encode_vectors, wants_binary
+
+# 추론은 전용 스레드/프로세스 풀에서 실행해 이벤트 루프를 막지 않습니다.
+executor = executor_from_env()
+# 동시 요청을 짧은 시간 창 동안 모아 한 번에 인코딩합니다.
+batcher = batcher_from_env(executor.encode)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    executor.shutdown()
+
+
+app = FastAPI(title="Embedding Service", lifespan=lifespan)
 
 
 @app.get("/healthz")
@@ -18,9 +36,26 @@ async def healthz():
 
 
 @app.post("/embed")
-async def embed(payload: dict):
+async def embed(payload: dict, request: Request):
     texts = payload.get("texts", [])
     model = payload.get("model", DEFAULT_MODEL)
-    result = embed_texts(texts, model)
-    return result
+    try:
+        async with executor.admit():
+            vectors = await batcher.submit(texts, model)
+    except QueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="embedding queue is full",
+            headers={"Retry-After": "1"},
+        ) from exc
+    # Accept: application/octet-stream 이면 원시 float32/float16 바이트로 응답(기본은 JSON)
+    dtype = wants_binary(request.headers.get("accept"))
+    if dtype:
+        return Response(encode_vectors(vectors, model, dtype), media_type=OCTET_STREAM)
+    return build_response(vectors, model)
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type="text/plain; version=0.0.4")
 
@@ -5,6 +5,7 @@
 """
 from __future__ import annotations
 
+import hashlib
 import logging
 from functools import lru_cache
 from typing import Any
@@ -21,20 +22,52 @@ DEFAULT_MODEL = "gte-small"
 DEFAULT_DIM = 384
 
 
+def stable_seed(text: str) -> int:
+    """프로세스/레플리카와 무관하게 같은 텍스트에 같은 64비트 시드를 돌려줍니다.
+
+    내장 hash() 는 프로세스마다 솔트가 달라 워커마다 벡터가 달라지므로 사용하지 않습니다.
+    """
+
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """카운터 기반 난수(SplitMix64)를 배열 전체에 제자리 연산으로 적용합니다."""
+
+    with np.errstate(over="ignore"):
+        x += np.uint64(0x9E3779B97F4A7C15)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return x
+
+
 class DummyModel:
     """설치가 어려운 환경을 위한 더미 모델.
 
-    입력 텍스트의 해시를 기반으로 결정론적 난수를 생성하여
-    일관된(재현 가능한) 임베딩 벡터를 반환합니다.
+    텍스트마다 안정적인 시드를 만들고, 배치 전체를 (n, dim) float32 행렬로
+    한 번에 생성(Box-Muller 정규분포)·정규화하여 재현 가능한 임베딩을 반환합니다.
     """
 
-    def encode(self, texts: list[str]) -> list[list[float]]:
-        vectors = []
-        for text in texts:
-            rng = np.random.default_rng(abs(hash(text)) % (2**32))
-            vec = rng.standard_normal(DEFAULT_DIM)
-            vec = vec / np.linalg.norm(vec)
-            vectors.append(vec.astype(float).tolist())
+    def __init__(self, dim: int = DEFAULT_DIM) -> None:
+        if dim % 2:
+            raise ValueError("DummyModel dim must be even")
+        self.dim = dim
+        # 64비트 난수 하나에서 32비트 균등난수 두 개 → Box-Muller 로 정규난수 두 개(cos/sin)
+        self._counters = np.arange(dim // 2, dtype=np.uint64) * np.uint64(0xD1B54A32D192ED03)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        seeds = np.fromiter((stable_seed(text) for text in texts), dtype=np.uint64, count=len(texts))
+        bits = _splitmix64(seeds[:, None] ^ self._counters[None, :])
+        scale = np.float32(1.0 / 2**32)
+        u1 = ((bits >> np.uint64(32)).astype(np.float32) + np.float32(1.0)) * scale  # (0, 1]
+        u2 = (bits & np.uint64(0xFFFFFFFF)).astype(np.float32) * scale
+        radius = np.sqrt(np.float32(-2.0) * np.log(u1))
+        angle = np.float32(2.0 * np.pi) * u2
+        vectors = np.concatenate((radius * np.cos(angle), radius * np.sin(angle)), axis=1)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
         return vectors
 
 
@@ -47,15 +80,28 @@ def get_model(name: str = DEFAULT_MODEL):
     return DummyModel()
 
 
-def embed_texts(texts: list[str], model_name: str = DEFAULT_MODEL) -> dict[str, Any]:
-    model = get_model(model_name)
-    vectors = model.encode(texts)
+def encode_texts(model_name: str, texts: list[str]) -> np.ndarray:
+    """모델로 텍스트 배치를 인코딩해 (n, dim) float32 행렬로 반환합니다."""
+
+    if not texts:
+        return np.empty((0, DEFAULT_DIM), dtype=np.float32)
+    vectors = get_model(model_name).encode(texts)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def build_response(vectors: np.ndarray, model_name: str = DEFAULT_MODEL) -> dict[str, Any]:
+    """JSON 응답 본문(기본 형식)을 만듭니다."""
+
     return {
-        "vectors": vectors,
-        "dim": len(vectors[0]) if vectors else DEFAULT_DIM,
+        "vectors": vectors.tolist(),
+        "dim": int(vectors.shape[1]) if len(vectors) else DEFAULT_DIM,
         "model": model_name,
     }
 
 
-__all__ = ["embed_texts", "DEFAULT_MODEL", "DEFAULT_DIM"]
+def embed_texts(texts: list[str], model_name: str = DEFAULT_MODEL) -> dict[str, Any]:
+    return build_response(encode_texts(model_name, texts), model_name)
+
+
+__all__ = ["embed_texts", "encode_texts", "build_response", "stable_seed", "DummyModel", "DEFAULT_MODEL", "DEFAULT_DIM"]
 
@@ -0,0 +1,65 @@
+"""벡터 바이너리 전송 형식.
+
+간단 설명(비전공자용):
+- 벡터 수십만 개를 JSON 숫자 문자열로 주고받으면 느리고 큽니다.
+- 클라이언트가 `Accept: application/octet-stream` 을 보내면 float32(또는 float16) 원시 바이트로 응답합니다.
+
+형식(리틀엔디언):
+    magic(4s)=b"EMBV" | version(B)=1 | dtype(B: 0=float32, 1=float16) | model_len(H) | rows(I) | dim(I)
+    | model(utf-8) | 0 패딩(본문 시작을 8바이트 경계로 정렬) | rows*dim 값
+백엔드 디코더(backend/deps/embedding.py)와 같은 형식을 유지해야 합니다.
+"""
+from __future__ import annotations
+
+import struct
+
+import numpy as np
+
+OCTET_STREAM = "application/octet-stream"
+MAGIC = b"EMBV"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+DTYPES = {"float32": (0, np.dtype("<f4")), "float16": (1, np.dtype("<f2"))}
+
+
+def wants_binary(accept: str | None) -> str | None:
+    """Accept 헤더에서 바이너리 요청 여부와 dtype 을 찾습니다. JSON 이면 None.
+
+    q=0 은 클라이언트가 그 형식을 받지 않겠다는 뜻이므로 바이너리로 보지 않습니다.
+    """
+
+    for media_range in (accept or "").split(","):
+        media, *params = (piece.strip() for piece in media_range.split(";"))
+        if media.lower() != OCTET_STREAM:
+            continue
+        pairs = (param.split("=", 1) for param in params if "=" in param)
+        options = {key.strip().lower(): value.strip() for key, value in pairs}
+        if _quality(options.get("q")) <= 0:
+            continue
+        dtype = options.get("dtype", "float32").lower()
+        return dtype if dtype in DTYPES else "float32"
+    return None
+
+
+def _quality(value: str | None) -> float:
+    # 형식이 잘못된 q 는 무시하고 기본값(1)으로 봅니다.
+    try:
+        return float(value) if value is not None else 1.0
+    except ValueError:
+        return 1.0
+
+
+def encode_vectors(vectors: np.ndarray, model: str, dtype: str = "float32") -> bytes:
+    """(rows, dim) 행렬을 헤더가 붙은 바이트열로 직렬화합니다."""
+
+    code, np_dtype = DTYPES[dtype]
+    matrix = np.ascontiguousarray(vectors, dtype=np_dtype)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(matrix), -1)
+    model_bytes = model.encode("utf-8")
+    head = HEADER.pack(MAGIC, VERSION, code, len(model_bytes), matrix.shape[0], matrix.shape[1]) + model_bytes
+    padding = b"\0" * (-len(head) % 8)
+    return head + padding + matrix.tobytes()
+
+
+__all__ = ["OCTET_STREAM", "encode_vectors", "wants_binary"]
@@ -1,21 +1,9 @@
-"""임베딩 HTTP 서비스."""
-from __future__ import annotations
-
-from fastapi import FastAPI
-
-from embedding_svc.models import DEFAULT_MODEL, embed_texts
+"""임베딩 HTTP 서비스(호환용 진입점).
 
-app = FastAPI(title="Embedding Service")
-
-
-@app.get("/healthz")
-async def healthz():
-    return {"status": "ok"}
+구현은 embedding_svc 패키지에 있으며, `uvicorn main:app` 으로도 기동할 수 있도록 재노출합니다.
+"""
+from __future__ import annotations
 
+from embedding_svc.main import app
 
-@app.post("/embed")
-async def embed(payload: dict):
-    texts = payload.get("texts", [])
-    model = payload.get("model", DEFAULT_MODEL)
-    result = embed_texts(texts, model)
-    return result
+__all__ = ["app"]
@@ -94,14 +94,98 @@ CREATE TABLE IF NOT EXISTS chunks (
 CREATE TABLE IF NOT EXISTS embeddings (
     id SERIAL PRIMARY KEY,
     chunk_id INTEGER REFERENCES chunks(id),
+    pipeline_id INTEGER,
     model TEXT NOT NULL,
     dim INTEGER NOT NULL,
     vec VECTOR(384) NOT NULL,
     created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- 기존 DB: documents.meta 의 pipeline_id 를 정수 컬럼으로 옮깁니다(검색 필터/부분 인덱스용).
+ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS pipeline_id INTEGER;
+UPDATE embeddings e
+SET pipeline_id = (d.meta ->> 'pipeline_id')::integer
+FROM chunks c
+JOIN documents d ON d.id = c.document_id
+WHERE c.id = e.chunk_id AND e.pipeline_id IS NULL AND d.meta ? 'pipeline_id';
+
 CREATE INDEX IF NOT EXISTS idx_embeddings_model ON embeddings(model);
-CREATE INDEX IF NOT EXISTS idx_embeddings_vec ON embeddings USING ivfflat (vec vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_embeddings_pipeline ON embeddings(pipeline_id);
+-- 청크 id 로 벡터를 찾는 경로(MMR 후보 벡터, 키워드 검색의 파이프라인 조인)
+CREATE INDEX IF NOT EXISTS idx_embeddings_chunk ON embeddings(chunk_id);
+-- 큰 파이프라인은 backend/services/vector_index.py 가 전용 부분 인덱스(WHERE pipeline_id = N)를 추가합니다.
+-- 기본값(PGVECTOR_INDEX_TYPE=hnsw, PGVECTOR_DISTANCE=cosine)과 같아야 합니다. 설정을 바꾸면
+-- rebuild_vector_indexes 태스크가 서비스 중단 없이 다시 만듭니다. HNSW는 빈 테이블에서 만들어도 품질이 떨어지지 않습니다.
+CREATE INDEX IF NOT EXISTS idx_embeddings_vec ON embeddings USING hnsw (vec vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- 하이브리드 검색(키워드 다리): 형태소 분석 없이 공백/기호로만 나누는 korean 설정(simple 복사본).
+-- 조사는 질의 쪽에서 떼고 접두어 검색(환불:*)으로 찾습니다(backend/services/lexical.py).
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'korean') THEN
+        CREATE TEXT SEARCH CONFIGURATION korean (COPY = simple);
+    END IF;
+END
+$$;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('korean', text)) STORED;
+CREATE INDEX IF NOT EXISTS idx_chunks_tsv ON chunks USING gin (tsv);
+-- 토큰 청커(backend/services/chunking.py OffsetChunker)가 기록하는 전처리 본문 안의 [start, end) 위치.
+-- 단어 창 청커(CHUNKER=words)나 이전에 저장된 청크는 NULL 입니다.
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS start_offset INTEGER;
+ALTER TABLE chunks ADD COLUMN IF NOT EXISTS end_offset INTEGER;
+-- 인덱싱 재시도가 같은 청크/벡터를 다시 넣지 않도록 upsert 하는 고유 키(backend/services/index_store.py).
+CREATE UNIQUE INDEX IF NOT EXISTS uq_chunks_document_pos ON chunks(document_id, pos);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_embeddings_chunk_model ON embeddings(chunk_id, model);
+-- 인덱싱 체크포인트: 저장을 마친 청크 수(다음 pos)와 완료 시각. indexed_at 이 NULL 인 문서는
+-- 중단된 인덱싱이므로 같은 파일을 다시 인덱싱하면 이 문서를 이어서 채웁니다(backend/workers/tasks_index.py).
+-- 컬럼을 처음 추가할 때만 기존 문서를 완료로 표시합니다.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns WHERE table_name = 'documents' AND column_name = 'indexed_at'
+    ) THEN
+        ALTER TABLE documents ADD COLUMN indexed_pos INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE documents ADD COLUMN indexed_at TIMESTAMPTZ;
+        UPDATE documents d
+        SET indexed_at = d.created_at,
+            indexed_pos = (SELECT COALESCE(MAX(c.pos) + 1, 0) FROM chunks c WHERE c.document_id = d.id);
+    END IF;
+END
+$$;
+CREATE INDEX IF NOT EXISTS idx_documents_file ON documents(file_id);
+-- 질의마다 search 블록 설정(method)을 읽습니다.
+CREATE INDEX IF NOT EXISTS idx_blocks_pipeline ON blocks(pipeline_id);
+
+-- 청크 해시 기반 임베딩 캐시 (float32 바이트, last_used_at 기준 TTL/LRU 정리)
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vec BYTEA NOT NULL,
+    last_used_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (model, chunk_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used_at);
+
+-- 파이프라인 전체 재인덱싱 실행(backend/services/reindex.py). total 은 대상 파일 수, done 은 끝낸 파일 수.
+CREATE TABLE IF NOT EXISTS reindex_runs (
+    id SERIAL PRIMARY KEY,
+    pipeline_id INTEGER NOT NULL REFERENCES pipelines(id),
+    status TEXT NOT NULL,
+    total INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMPTZ
+);
+-- 마지막 진행 시각(총계 기록/파일 완료). 오래 멈춘 running 실행을 정리하는 기준입니다.
+ALTER TABLE reindex_runs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+-- 파일 태스크(chord)를 보낸 시각. 다시 배달된 reindex_pipeline 이 chord 를 또 보내지 않게 합니다.
+ALTER TABLE reindex_runs ADD COLUMN IF NOT EXISTS dispatched_at TIMESTAMPTZ;
+
+-- 파이프라인마다 진행 중(running) 실행은 하나만 둡니다.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_reindex_runs_running ON reindex_runs(pipeline_id) WHERE status = 'running';
 
 CREATE TABLE IF NOT EXISTS policies (
     id SERIAL PRIMARY KEY,
@@ -0,0 +1,110 @@
+"""임베딩 서비스(마이크로배처/실행기/더미 모델) 테스트."""
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "embedding-svc"))
+
+import numpy as np
+import pytest
+
+from embedding_svc.batching import MicroBatcher
+from embedding_svc.executor import InferenceExecutor, QueueFullError
+from embedding_svc.models import DummyModel
+
+
+def test_concurrent_requests_are_coalesced():
+    calls: list[int] = []
+
+    async def encode(model, texts):
+        calls.append(len(texts))
+        return [[float(len(text))] for text in texts]
+
+    async def run():
+        batcher = MicroBatcher(encode, max_wait_ms=20, max_batch_size=8)
+        return await asyncio.gather(*[batcher.submit(["x" * i], "m") for i in range(20)])
+
+    results = asyncio.run(run())
+
+    assert results == [[[float(i)]] for i in range(20)]
+    assert calls == [8, 8, 4]
+
+
+def test_encode_error_reaches_every_waiter():
+    async def encode(model, texts):
+        raise RuntimeError("boom")
+
+    async def run():
+        batcher = MicroBatcher(encode, max_wait_ms=5, max_batch_size=8)
+        return await asyncio.gather(*[batcher.submit(["a"], "m") for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(res, RuntimeError) for res in results)
+
+
+def test_cancelled_batch_fails_waiters_instead_of_hanging():
+    started = asyncio.Event()
+
+    async def encode(model, texts):
+        started.set()
+        await asyncio.sleep(10)
+
+    async def run():
+        batcher = MicroBatcher(encode, max_wait_ms=1, max_batch_size=8)
+        waiters = [asyncio.ensure_future(batcher.submit(["a"], "m")) for _ in range(3)]
+        await started.wait()
+        # 서버 종료 때처럼 진행 중인 배치 태스크를 취소합니다.
+        for task in list(batcher._tasks):
+            task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), timeout=1)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(res, RuntimeError) and "cancelled" in str(res) for res in results)
+
+
+def test_admission_rejects_when_full():
+    executor = InferenceExecutor(kind="thread", max_pending=1)
+
+    async def run():
+        async with executor.admit():
+            with pytest.raises(QueueFullError):
+                async with executor.admit():
+                    pass
+        async with executor.admit():
+            return await executor.encode("gte-small", ["a", "b"])
+
+    vectors = asyncio.run(run())
+    executor.shutdown()
+
+    assert len(vectors) == 2 and executor.pending == 0
+
+
+def test_dummy_model_is_batch_and_process_independent():
+    texts = ["가", "b", "같은 문장", "b"]
+    vectors = DummyModel().encode(texts)
+
+    assert vectors.shape == (4, 384) and vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+    np.testing.assert_array_equal(vectors[1], vectors[3])
+    np.testing.assert_array_equal(DummyModel().encode(["같은 문장"])[0], vectors[2])
+
+    # 내장 hash() 솔트와 무관해야 레플리카 간 벡터가 일치합니다.
+    code = "from embedding_svc.models import DummyModel; print(DummyModel().encode(['같은 문장'])[0][:4].tolist())"
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).resolve().parents[1] / "embedding-svc",
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert len(outputs) == 1
@@ -170,7 +170,11 @@ if "celery" not in sys.modules:
     def _CeleryFactory(*args, **kwargs):
         return _Celery()
 
+    def _canvas(*args, **kwargs):  # chain/chord/group: 테스트에서는 보내지 않음
+        return types.SimpleNamespace()
+
     celery_module.Celery = _CeleryFactory
+    celery_module.chain = celery_module.chord = celery_module.group = _canvas
     sys.modules["celery"] = celery_module
 
 import pytest
@@ -306,7 +310,7 @@ def client(monkeypatch):
     async def fake_embed_query(text: str):
         return [0.1, 0.2, 0.3]
 
-    async def fake_search(session_obj, pipeline_id, embedding, top_k, threshold):
+    async def fake_search(session_obj, pipeline_id, embedding, top_k, threshold, **kwargs):
         return [QuerySource(chunk_id=1, text="고객 이메일 test@example.com", score=0.9)]
 
     async def fake_call_ollama(prompt: str, system: str = "", model: str = "llama3"):
@@ -318,7 +322,7 @@ def client(monkeypatch):
     app.dependency_overrides[get_session] = fake_get_session
     app.dependency_overrides[get_current_user] = fake_current_user
 
-    monkeypatch.setattr("backend.routers.uploads.enqueue_index_file", lambda file_id, pipeline_id=None: session.index_calls.append((file_id, pipeline_id)))
+    monkeypatch.setattr("backend.routers.uploads.enqueue_index_file", lambda file_id, pipeline_id=None, replaces_file_id=None: session.index_calls.append((file_id, pipeline_id)))
     monkeypatch.setattr("backend.routers.query._embed_query", fake_embed_query)
     monkeypatch.setattr("backend.routers.query.search_similar_chunks", fake_search)
     monkeypatch.setattr("backend.deps.ollama.call_ollama", fake_call_ollama)
@@ -372,3 +376,815 @@ def test_full_flow(client):
     assert "[이메일]" in body["answer"]
     assert any("증오" in warn for warn in body["warnings"])
     assert body["sources"][0]["chunk_id"] == 1
+
+
+def test_query_embedding_cache_coalesces_and_reuses():
+    import asyncio
+
+    from backend.services.query_cache import QueryEmbeddingCache
+
+    calls: list[str] = []
+
+    async def fake_embed(text: str):
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return [0.5, 0.5]
+
+    async def run():
+        cache = QueryEmbeddingCache(max_entries=2, redis_ttl=0)
+        first = await asyncio.gather(*[cache.get_or_embed("  환불  규정은? ", fake_embed) for _ in range(5)])
+        again = await cache.get_or_embed("환불 규정은?", fake_embed)
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert calls == ["환불 규정은?"]
+    assert all(vec == [0.5, 0.5] for vec in first) and again == [0.5, 0.5]
+
+    async def owner_cancelled():
+        cache = QueryEmbeddingCache(max_entries=2, redis_ttl=0)
+        owner = asyncio.create_task(cache.get_or_embed("배송 기간은?", fake_embed))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_embed("배송 기간은?", fake_embed))
+        await asyncio.sleep(0)
+        owner.cancel()
+        # 처음 요청한 쪽이 취소돼도 함께 기다리던 요청은 결과를 받고, 결과는 캐시에 남습니다.
+        result = await waiter
+        cached = await cache.get_or_embed("배송 기간은?", fake_embed)
+        return owner.cancelled(), result, cached
+
+    calls.clear()
+    cancelled, result, cached = asyncio.run(owner_cancelled())
+    assert cancelled and result == cached == [0.5, 0.5] and calls == ["배송 기간은?"]
+
+
+def test_embedding_cache_commits_lookup_before_embedding():
+    import asyncio
+
+    import numpy as np
+
+    from backend.services.embedding_cache import embed_with_cache
+
+    events: list[str] = []
+    stored: list[list[str]] = []
+
+    class CacheDb:
+        async def execute(self, query, params):
+            text = query.text
+            if "SELECT chunk_hash, dim, vec" in text:
+                assert "FOR UPDATE" not in text
+                events.append("lookup")
+                return [Row(chunk_hash="b", dim=2, vec=np.asarray([1, 1], dtype="<f4").tobytes())]
+            if "SKIP LOCKED" in text:
+                events.append("touch")
+            elif "INSERT INTO embedding_cache" in text:
+                events.append("store")
+                stored.append(params["hashes"])
+            return FakeResult([])
+
+        async def commit(self):
+            events.append("commit")
+
+    async def fake_embed(texts):
+        events.append("embed")
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    vectors = asyncio.run(embed_with_cache(CacheDb(), ["z", "b", "a"], ["z", "b", "a"], "m", fake_embed))
+    # 임베딩 서비스를 기다리는 동안 캐시 트랜잭션을 열어 두지 않고, 저장은 해시 순서로 합니다.
+    assert events == ["lookup", "touch", "commit", "embed", "store"]
+    assert stored == [["a", "z"]] and vectors[1].tolist() == [1.0, 1.0]
+
+
+def test_deploy_query_streams_masked_tokens(client, monkeypatch):
+    from contextlib import asynccontextmanager
+
+    test_client, session = client
+
+    async def fake_stream_ollama(prompt: str, system: str = "", model: str = "llama3"):
+        for token in ["연락처는 te", "st@exam", "ple.com 입니다", " hate"]:
+            yield token
+
+    @asynccontextmanager
+    async def fake_session_ctx():
+        yield session
+
+    monkeypatch.setattr("backend.services.answer_stream.stream_ollama", fake_stream_ollama)
+    monkeypatch.setattr("backend.routers.deploy.get_session", fake_session_ctx)
+
+    pipeline_id = test_client.post("/pipelines", json={"name": "stream"}).json()["id"]
+    test_client.post(f"/pipelines/{pipeline_id}/publish")
+    token = test_client.post(f"/pipelines/{pipeline_id}/deploy", json={"type": "widget"}).json()["token"]
+
+    resp = test_client.post(f"/deploy/{token}/query", json={"q": "연락처?", "stream": True})
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = [
+        (frame.split("\n")[0].removeprefix("event: "), json.loads(frame.split("\n")[1].removeprefix("data: ")))
+        for frame in resp.text.strip().split("\n\n")
+    ]
+    streamed = "".join(data["text"] for name, data in events if name == "token")
+    name, final = events[-1]
+    assert name == "done"
+    assert streamed == final["answer"] == "연락처는 [이메일] 입니다 hate"
+    assert any("증오" in warn for warn in final["warnings"])
+    assert session.runs[-1]["pipeline_id"] == pipeline_id
+
+
+def test_memory_index_topk_append_and_lru_budget():
+    import numpy as np
+
+    from backend.services.memory_index import MemoryVectorIndex, PipelineMatrix
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(500, 16)).astype(np.float32)
+    row_bytes = 16 * 4 + 8
+    index = MemoryVectorIndex(budget_bytes=row_bytes * 900, max_rows=10_000)
+
+    index._put(1, PipelineMatrix(np.arange(500), index._prepare(vectors), 500, 0))
+    query = index._prepare(vectors[42:43])[0]
+    ids, scores = index._entries[1].top_k(query, 5)
+    exact = np.argsort(-(index._prepare(vectors) @ query))[:5]
+    assert ids.tolist() == exact.tolist() and ids[0] == 42
+    assert np.all(np.diff(scores) <= 0)
+
+    index.append(1, np.array([1000]), vectors[42:43] * 3, 501)
+    assert len(index._entries[1].chunk_ids) == 501
+    assert set(index._entries[1].top_k(query, 2)[0].tolist()) == {42, 1000}
+
+    # 예산(900행)을 넘기면 가장 오래 안 쓴 파이프라인 1이 제외됩니다.
+    index._put(2, PipelineMatrix(np.arange(500), index._prepare(vectors), 500, 0))
+    assert list(index._entries) == [2] and index.used_bytes == 500 * row_bytes
+
+
+def test_hybrid_fusion_and_korean_query_terms():
+    from backend.services.lexical import build_tsquery, query_terms
+    from backend.services.search import reciprocal_rank_fusion
+
+    assert query_terms("KX-1042 제품의 오류는 E4031, 차이가 뭔가요?") == ["kx-1042", "제품", "오류", "e4031", "차이", "뭔가요"]
+    assert build_tsquery("환불은?") == "'환불':*"
+    assert build_tsquery("?!") is None
+
+    vector = [QuerySource(chunk_id=i, text=f"v{i}", score=1.0 - i / 10) for i in (1, 2, 3)]
+    lexical = [QuerySource(chunk_id=i, text=f"l{i}", score=5.0) for i in (9, 3)]
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+    # 두 검색 모두에 나온 3번이 1위, 키워드로만 잡힌 9번도 포함됩니다.
+    assert [s.chunk_id for s in fused] == [3, 1, 9, 2]
+    assert fused[0].text == "v3"
+
+
+def test_search_dedups_by_hash_before_limit_and_thresholds_best_row(monkeypatch):
+    import asyncio
+
+    from backend.services import lexical, search
+
+    class SqlRecorder:
+        def __init__(self):
+            self.statements: list[tuple[str, dict]] = []
+
+        async def execute(self, query, params=None):
+            self.statements.append((" ".join(query.text.split()), params or {}))
+            return FakeResult([Row(chunk_id=1, text="환불", score=0.9)])
+
+    monkeypatch.setattr(search, "memory_index", None)
+    session = SqlRecorder()
+    hits = asyncio.run(search.vector_search(session, 3, [0.1, 0.2], top_k=5, threshold=0.4, recall=0.9))
+    assert [hit.chunk_id for hit in hits] == [1]
+    text, params = session.statements[-1]
+    assert all(sql.startswith("SET LOCAL") for sql, _ in session.statements[:-1])
+    # 후보는 거리순으로 top_k 보다 많이 가져오고(ANN 인덱스), 중복 제거와 임계값은 그 뒤, LIMIT top_k 는 마지막입니다.
+    assert params == {"embedding": "[0.1,0.2]", "fetch": 5 * search.DEDUP_OVERFETCH, "threshold": 0.4, "top_k": 5}
+    assert "WHERE e.pipeline_id = 3" in text
+    assert "row_number() OVER (PARTITION BY hash ORDER BY distance, chunk_id) AS dup_rank" in text
+    fetch_at, ranked_at = text.index("LIMIT :fetch"), text.index(") AS ranked")
+    filter_at = text.index("WHERE score >= :threshold AND dup_rank = 1")
+    assert fetch_at < ranked_at < filter_at < text.index("LIMIT :top_k")
+    # 순번은 임계값으로 거르기 전의 모든 후보에 매기므로, 해시마다 가장 가까운(점수가 가장 높은) 행에 임계값이 걸립니다.
+    assert text.index("row_number()") < ranked_at < filter_at
+
+    session = SqlRecorder()
+    asyncio.run(search.vector_search(session, 3, [0.1, 0.2], top_k=5, threshold=0.4, dedup=False))
+    text, params = session.statements[-1]
+    assert "dup_rank = 1" not in text and params["fetch"] == params["top_k"] == 5
+    assert "WHERE score >= :threshold ORDER BY" in text
+
+    session = SqlRecorder()
+    asyncio.run(lexical.lexical_search(session, 3, "환불 규정", limit=7))
+    text, params = session.statements[-1]
+    assert params == {"tsquery": "'환불':* | '규정':*", "limit": 7}
+    assert "row_number() OVER (PARTITION BY c.hash ORDER BY ts_rank_cd(c.tsv, q) DESC, c.id) AS dup_rank" in text
+    assert text.index(") AS ranked") < text.index("WHERE dup_rank = 1") < text.index("LIMIT :limit")
+
+    session = SqlRecorder()
+    asyncio.run(lexical.lexical_search(session, 3, "환불 규정", limit=7, dedup=False))
+    assert "dup_rank = 1" not in session.statements[-1][0]
+
+
+def test_mmr_skips_near_duplicate_neighbors():
+    import numpy as np
+
+    from backend.services.rerank import mmr_select
+
+    query = np.array([1.0, 0.0, 0.0])
+    candidates = np.array(
+        [
+            [0.95, 0.30, 0.0],  # 가장 관련 높음
+            [0.95, 0.31, 0.0],  # 0번과 거의 같은 이웃 청크
+            [0.90, 0.0, 0.44],  # 다른 내용
+            [0.10, 0.99, 0.0],
+        ]
+    )
+    assert mmr_select(query, candidates, k=3, lambda_=1.0, dup_cutoff=1.01) == [0, 1, 2]
+    assert mmr_select(query, candidates, k=3, lambda_=0.5) == [0, 2, 3]
+    # 거의 같은 후보는 아예 빠져서 k 보다 적게 고를 수 있습니다.
+    assert mmr_select(query, candidates[:2], k=2, lambda_=0.7) == [0]
+
+
+def test_context_packing_respects_budget_and_trims_sentences():
+    from backend.services.context_pack import estimate_tokens, pack_context
+
+    sources = [
+        QuerySource(chunk_id=1, text="환불은 구매 후 7일 이내 가능합니다. 영수증이 필요합니다.", score=0.9),
+        QuerySource(chunk_id=2, text="배송은 평일 기준 2일 걸립니다. " * 40, score=0.8),
+        QuerySource(chunk_id=3, text="교환 규정. " * 200, score=0.7),
+    ]
+    first = estimate_tokens("[1] " + sources[0].text)
+    packed = pack_context(sources, budget=first + 120)
+
+    assert packed.tokens <= packed.budget
+    assert [s.chunk_id for s in packed.sources] == [1, 2]
+    assert packed.sources[0].text == sources[0].text
+    # 2번은 문장 경계에서 잘리고 3번은 빠집니다.
+    assert packed.sources[1].text.endswith("걸립니다.") and len(packed.sources[1].text) < len(sources[1].text)
+    assert (packed.trimmed, packed.dropped) == (1, 1)
+    assert packed.warnings and "1개 제외" in packed.warnings[0]
+    assert packed.context.startswith("[1] 환불은")
+
+
+def test_single_pass_scanner_matches_per_rule_passes():
+    import random
+    import re
+
+    from backend.services import moderation_rules, pii_rules
+    from backend.services.text_scanner import scanner
+
+    rng = random.Random(3)
+    words = ["문의", "010-1234-5678", "900101-1234567", "a.b+c@mail.co.kr", "HATE", "불법", "hello", "19금", "x-1"]
+    for _ in range(50):
+        text = " ".join(rng.choice(words) for _ in range(30))
+        masked = text
+        for pattern, replacement in pii_rules.PII_PATTERNS:
+            masked = re.sub(pattern, replacement, masked)
+        flags = [name for name, regex in moderation_rules.CATEGORY_PATTERNS.items() if regex.search(masked)]
+
+        result = scanner.scan(text)
+        assert (result.text, result.flags) == (masked, flags)
+        assert scanner.mask(text) == masked
+
+    result = scanner.scan("Damn, 증오 메일 kim@example.com 과 010-1234-5678, 010-9999-0000")
+    assert result.flags == ["욕설", "증오"]
+    assert result.masked == {"[이메일]": 1, "[전화번호]": 2}
+
+
+def test_parallel_preprocessing_matches_single_process(monkeypatch):
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    from backend.services import parallel_preprocess
+    from backend.services.preprocess import StreamingPreprocessor, preprocess
+
+    text = "\n\n".join(f"고객 {i} 연락처 010-1234-{i % 10000:04d}, mail{i}@example.com ```x```" for i in range(3000))
+    parts = [text[start : start + 997] for start in range(0, len(text), 997)]
+
+    with ThreadPoolExecutor(4) as pool:
+        parallel = parallel_preprocess.ParallelPreprocessor(pool, max_pending=3)
+        single = StreamingPreprocessor()
+        assert list(parallel.text(parts)) == list(single.text(parts))
+        assert parallel.language == single.language == "ko"
+
+    monkeypatch.setattr(parallel_preprocess, "SEGMENT_CHARS", 4096)
+    monkeypatch.setattr(parallel_preprocess.settings, "preprocess_parallel_min_bytes", 1024)
+    with ProcessPoolExecutor(2) as pool:
+        assert parallel_preprocess.preprocess_parallel(text, executor=pool) == preprocess(text)
+        assert parallel_preprocess.preprocess_parallel(text, ["고객 "], executor=pool) == preprocess(text, ["고객 "])
+    # 기준보다 작으면 풀을 쓰지 않습니다.
+    assert parallel_preprocess.preprocess_parallel("짧은 글 a@b.co", executor=object()) == preprocess("짧은 글 a@b.co")
+
+
+def test_bulk_insert_writes_same_rows_as_per_row_upsert():
+    import asyncio
+    import re
+    from pathlib import Path
+
+    from backend.services.index_store import ChunkRecord, chunk_hash, insert_chunks_with_embeddings
+
+    class TableDb:
+        """chunks/embeddings 두 테이블을 고유 키로만 흉내 냅니다(unnest 배열 = 행 목록)."""
+
+        def __init__(self):
+            self.chunks: dict[tuple[int, int], dict] = {}
+            self.embeddings: dict[tuple[int, str], dict] = {}
+            self.statements: list[tuple[str, dict]] = []
+
+        async def execute(self, query, params):
+            text = query.text
+            self.statements.append((text, params))
+            if "INSERT INTO chunks" in text:
+                assert "ON CONFLICT (document_id, pos) DO UPDATE" in text
+                rows = []
+                for pos, body, digest, start, end in zip(
+                    params["positions"], params["texts"], params["hashes"], params["starts"], params["ends"]
+                ):
+                    key = (params["doc_id"], pos)
+                    chunk_id = self.chunks.get(key, {}).get("id", len(self.chunks) + 1)
+                    self.chunks[key] = {
+                        "id": chunk_id, "text": body, "hash": digest, "start_offset": start, "end_offset": end
+                    }
+                    rows.append(Row(id=chunk_id, pos=pos))
+                return FakeResult(rows)
+            assert "INSERT INTO embeddings" in text and "ON CONFLICT (chunk_id, model) DO UPDATE" in text
+            for chunk_id, vec in zip(params["chunk_ids"], params["vecs"]):
+                self.embeddings[(chunk_id, params["model"])] = {
+                    "pipeline_id": params["pipeline_id"], "dim": params["dim"], "vec": vec
+                }
+            return FakeResult([])
+
+    # 충돌 대상은 실제 고유 인덱스와 같은 컬럼이어야 upsert 가 동작합니다.
+    ddl = (Path(__file__).resolve().parents[1] / "infra" / "initdb" / "01-init.sql").read_text(encoding="utf-8")
+    assert re.search(r"uq_chunks_document_pos ON chunks\(document_id, pos\)", ddl)
+    assert re.search(r"uq_embeddings_chunk_model ON embeddings\(chunk_id, model\)", ddl)
+
+    db = TableDb()
+    records = [
+        ChunkRecord(pos=0, text="가", vector=[0.5, 1.0], start=0, end=1),
+        ChunkRecord(pos=1, text="나", vector=[0.25, 2.0], start=1, end=2),
+        ChunkRecord(pos=2, text="다", vector=[1.0, 0.0]),
+    ]
+    stored = asyncio.run(insert_chunks_with_embeddings(db, 7, records, model="m", pipeline_id=3, batch_size=2))
+
+    assert stored == 3 and len(db.statements) == 4  # 배치 2개 × (청크, 임베딩)
+    first_chunks = db.statements[0][1]
+    assert first_chunks["positions"] == [0, 1] and first_chunks["starts"] == [0, 1] and first_chunks["ends"] == [1, 2]
+    assert first_chunks["hashes"] == [chunk_hash("가"), chunk_hash("나")]
+    # 한 줄씩 넣던 때와 같은 행: 위치별 본문·해시·오프셋(단어 창 청커는 None), 벡터는 pipeline_id 와 함께
+    assert {pos: (row["text"], row["start_offset"], row["end_offset"]) for (_, pos), row in db.chunks.items()} == {
+        0: ("가", 0, 1), 1: ("나", 1, 2), 2: ("다", None, None)
+    }
+    assert db.embeddings[(db.chunks[(7, 1)]["id"], "m")] == {"pipeline_id": 3, "dim": 2, "vec": "[0.25,2.0]"}
+
+    # 재시도한 배치를 다시 저장하면 같은 행을 덮어쓰고 중복을 만들지 않습니다.
+    ids = {key: row["id"] for key, row in db.chunks.items()}
+    retry = [ChunkRecord(pos=1, text="나2", vector=[9.0, 9.0], start=1, end=3)]
+    asyncio.run(insert_chunks_with_embeddings(db, 7, retry, model="m", pipeline_id=3))
+    assert len(db.chunks) == 3 and len(db.embeddings) == 3
+    assert {key: row["id"] for key, row in db.chunks.items()} == ids
+    assert db.chunks[(7, 1)]["text"] == "나2" and db.chunks[(7, 1)]["end_offset"] == 3
+    assert db.embeddings[(ids[(7, 1)], "m")]["vec"] == "[9.0,9.0]"
+
+
+def test_index_pipeline_overlaps_stages_and_keeps_order():
+    import asyncio
+
+    from backend.services.index_pipeline import IndexPipeline, iter_batches
+
+    stored: list[list[int]] = []
+    active = {"embed": 0, "peak": 0, "overlap": 0}
+
+    async def embed(batch):
+        active["embed"] += 1
+        active["peak"] = max(active["peak"], active["embed"])
+        # 뒤 배치가 먼저 끝나도 저장은 순서대로여야 합니다.
+        await asyncio.sleep(0.02 if batch[0] % 20 == 0 else 0.005)
+        active["embed"] -= 1
+        return [value * 2 for value in batch]
+
+    async def store(batch, result):
+        active["overlap"] += active["embed"] > 0
+        await asyncio.sleep(0.005)
+        assert result == [value * 2 for value in batch]
+        stored.append(batch)
+
+    stats = asyncio.run(IndexPipeline(embed, store, concurrency=3, queue_batches=2).run(iter_batches(range(100), 10)))
+    assert [value for batch in stored for value in batch] == list(range(100))
+    assert (stats.batches, stats.items) == (10, 100)
+    assert active["peak"] == 3 and active["overlap"] > 0
+    assert stats.seconds["embed"] > 0 and stats.total > 0
+
+    async def failing_store(batch, result):
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError, match="db down"):
+        asyncio.run(IndexPipeline(embed, failing_store).run(iter_batches(range(100), 10)))
+
+    import time
+
+    reader = {"reads": 0, "inside": False, "closed": False}
+
+    def slow_batches():
+        try:
+            while True:
+                reader["inside"] = True
+                time.sleep(0.05)  # MinIO 읽기/전처리
+                reader["inside"] = False
+                reader["reads"] += 1
+                yield [reader["reads"]]
+        finally:
+            reader["closed"] = True
+
+    async def failing_embed(batch):
+        raise RuntimeError("embedding-svc down")
+
+    with pytest.raises(RuntimeError, match="embedding-svc down"):
+        asyncio.run(IndexPipeline(failing_embed, store, queue_batches=8).run(slow_batches()))
+    # 예외를 올리기 전에 스레드의 읽기가 끝나고 반복자가 닫혀, 재시도와 읽기가 겹치지 않습니다.
+    reads = reader["reads"]
+    assert not reader["inside"] and reader["closed"]
+    time.sleep(0.15)
+    assert reader["reads"] == reads
+
+
+def test_index_file_resumes_from_checkpoint(monkeypatch):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from backend.workers import tasks_index
+
+    class IndexDb:
+        def __init__(self):
+            self.documents: dict[int, dict] = {}
+            self.chunks: dict[tuple[int, int], str] = {}
+            self.pending: dict = {}
+
+        async def execute(self, query, params=None):
+            text, params = str(query), params or {}
+            if "FROM files" in text:
+                return FakeResult([Row(id=1, bucket="docs", object_key="a.txt", owner_id=1, size_bytes=10)])
+            if "FROM documents" in text:
+                finished = "indexed_at IS NOT NULL" in text
+                docs = self.documents.items()
+                rows = [Row(id=i, **doc) for i, doc in docs if (doc["indexed_at"] is not None) == finished]
+                return FakeResult(rows)
+            if "INSERT INTO documents" in text:
+                doc_id = len(self.documents) + 1
+                chunking = json.loads(params["meta"])["chunking"]
+                self.documents[doc_id] = {"indexed_pos": 0, "chunking": chunking, "indexed_at": None}
+                return FakeResult([Row(id=doc_id)])
+            if "INSERT INTO chunks" in text:
+                assert "ON CONFLICT (document_id, pos)" in text
+                for pos, body in zip(params["positions"], params["texts"]):
+                    self.pending[(params["doc_id"], pos)] = body
+                return FakeResult([Row(id=pos + 1, pos=pos) for pos in params["positions"]])
+            if "SET indexed_pos" in text:
+                self.pending["checkpoint"] = (params["doc_id"], params["pos"])
+            if "indexed_at = NOW()" in text:
+                self.pending["done"] = params["doc_id"]
+            return FakeResult([])
+
+        async def commit(self):
+            checkpoint = self.pending.pop("checkpoint", None)
+            if checkpoint:
+                self.documents[checkpoint[0]]["indexed_pos"] = checkpoint[1]
+            done = self.pending.pop("done", None)
+            if done:
+                self.documents[done]["indexed_at"] = dt.datetime.utcnow()
+            self.chunks.update(self.pending)
+            self.pending.clear()
+
+    db = IndexDb()
+    embedded: list[str] = []
+    fail_at = {"calls": 2}
+
+    async def fake_embed(texts, model="gte-small"):
+        fail_at["calls"] -= 1
+        if fail_at["calls"] == 0:
+            raise RuntimeError("embedding-svc down")
+        embedded.extend(texts)
+        return [[0.1, 0.2]] * len(texts)
+
+    @asynccontextmanager
+    async def fake_session():
+        yield db
+        db.pending.clear()  # 커밋하지 않은 작업은 롤백
+
+    body = " ".join(f"문장{i} 입니다." for i in range(400))
+    monkeypatch.setattr(tasks_index, "get_session", fake_session)
+    monkeypatch.setattr(tasks_index, "iter_object_text", lambda *a, **k: iter([body]))
+    monkeypatch.setattr(tasks_index, "_call_embedding_service", fake_embed)
+    monkeypatch.setattr(tasks_index.settings, "embed_cache_enabled", False)
+    monkeypatch.setattr(tasks_index.settings, "index_embed_batch", 4)
+    monkeypatch.setattr(tasks_index.settings, "index_embed_concurrency", 1)
+    monkeypatch.setattr(tasks_index.settings, "chunk_tokens", 64)
+    monkeypatch.setattr(tasks_index.settings, "chunk_overlap_tokens", 0)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(tasks_index._index_file(1))
+    assert db.documents[1]["indexed_pos"] == 4 and db.documents[1]["indexed_at"] is None
+    first = list(embedded)
+
+    asyncio.run(tasks_index._index_file(1))
+    total = len(db.chunks)
+    assert len(db.documents) == 1 and db.documents[1]["indexed_at"] is not None
+    assert db.documents[1]["indexed_pos"] == total > 8
+    # 재시도는 체크포인트 이후 청크만 임베딩합니다.
+    assert len(first) == 4 and len(embedded) == total
+    assert embedded[4:] == [db.chunks[(1, pos)] for pos in range(4, total)]
+
+    # 커밋 뒤·ack 전에 다시 배달돼도 끝낸 문서를 다시 만들지 않습니다.
+    asyncio.run(tasks_index._index_file(1))
+    assert len(db.documents) == 1 and len(db.chunks) == total and len(embedded) == total
+
+
+def test_claim_file_holds_lock_for_whole_run(monkeypatch):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from backend.workers import tasks_index
+
+    held: set[tuple[int, int]] = set()
+
+    class Conn:
+        async def execution_options(self, **kwargs):
+            assert kwargs == {"isolation_level": "AUTOCOMMIT"}
+            return self
+
+        async def execute(self, query, params):
+            key = (params["space"], params["fid"])
+            if "pg_try_advisory_lock" in query.text:
+                acquired = key not in held
+                held.add(key)
+                return types.SimpleNamespace(scalar=lambda: acquired)
+            held.discard(key)
+            return types.SimpleNamespace(scalar=lambda: True)
+
+    @asynccontextmanager
+    async def connect():
+        yield Conn()
+
+    monkeypatch.setattr(tasks_index, "engine", types.SimpleNamespace(connect=connect))
+
+    async def scenario():
+        async with tasks_index._claim_file(7):
+            # 실행 중인 태스크가 다시 배달된 경우
+            with pytest.raises(tasks_index.FileBusy):
+                async with tasks_index._claim_file(7):
+                    pass
+            async with tasks_index._claim_file(8):
+                pass
+        assert not held
+
+    asyncio.run(scenario())
+
+
+def test_recommitted_file_ends_up_ready(monkeypatch):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from backend.models.schema import UploadCommitRequest
+    from backend.routers import uploads
+    from backend.workers import tasks_index
+
+    class UploadDb:
+        def __init__(self):
+            self.files: dict[tuple[str, str], dict] = {}
+            self.documents: dict[int, dict] = {}
+
+        def file(self, file_id):
+            return next(row for row in self.files.values() if row["id"] == file_id)
+
+        async def execute(self, query, params=None):
+            text, params = str(query), params or {}
+            if "INSERT INTO files" in text:
+                assert "ON CONFLICT (owner_id, sha256) DO UPDATE SET status = 'pending'" in text
+                key = (params["owner"], params["sha"])
+                row = self.files.setdefault(key, {"id": len(self.files) + 1, "size": params["size"]})
+                row["status"] = "pending"
+                return FakeResult([Row(id=row["id"])])
+            if "FROM files" in text:
+                row = self.file(params["fid"])
+                return FakeResult([Row(id=row["id"], bucket="docs", object_key="a.txt", owner_id=1, size_bytes=10)])
+            if "UPDATE files SET status = 'ready'" in text:
+                self.file(params["fid"])["status"] = "ready"
+            if "FROM documents" in text:
+                finished = "indexed_at IS NOT NULL" in text
+                docs = self.documents.items()
+                return FakeResult([Row(id=i, **doc) for i, doc in docs if (doc["indexed_at"] is not None) == finished])
+            if "INSERT INTO documents" in text:
+                doc_id = len(self.documents) + 1
+                chunking = json.loads(params["meta"])["chunking"]
+                self.documents[doc_id] = {"indexed_pos": 0, "chunking": chunking, "indexed_at": None}
+                return FakeResult([Row(id=doc_id)])
+            if "INSERT INTO chunks" in text:
+                return FakeResult([Row(id=pos + 1, pos=pos) for pos in params["positions"]])
+            if "indexed_at = NOW()" in text:
+                self.documents[params["doc_id"]]["indexed_at"] = dt.datetime.utcnow()
+            return FakeResult([])
+
+        async def commit(self):
+            return None
+
+    db = UploadDb()
+    enqueued: list[int] = []
+
+    async def allow(key):
+        return None
+
+    async def fake_embed(texts, model="gte-small"):
+        return [[0.1, 0.2]] * len(texts)
+
+    @asynccontextmanager
+    async def fake_session():
+        yield db
+
+    monkeypatch.setattr(uploads, "enforce_rate_limit", allow)
+    monkeypatch.setattr(uploads, "enqueue_index_file", lambda file_id, **kwargs: enqueued.append(file_id))
+    monkeypatch.setattr(tasks_index, "get_session", fake_session)
+    monkeypatch.setattr(tasks_index, "iter_object_text", lambda *a, **k: iter(["환불은 7일 이내에 가능합니다."]))
+    monkeypatch.setattr(tasks_index, "_call_embedding_service", fake_embed)
+    monkeypatch.setattr(tasks_index.settings, "embed_cache_enabled", False)
+
+    payload = UploadCommitRequest(
+        name="doc.txt", sha256="abc", size=10, mime="text/plain", bucket="docs", key="1/doc.txt"
+    )
+    user = UserContext(user_id="1", role=Role.OWNER)
+    for _ in range(2):
+        asyncio.run(uploads.commit_upload(payload, user=user, session=db))
+        assert db.file(enqueued[-1])["status"] == "pending"
+        asyncio.run(tasks_index._index_file(enqueued[-1]))
+    # 두 번째 커밋은 같은 파일을 다시 pending 으로 만들고, 인덱싱은 끝낸 문서를 건너뛰면서 ready 로 되돌립니다.
+    assert enqueued == [1, 1] and len(db.documents) == 1
+    assert db.file(1)["status"] == "ready"
+
+
+def test_incremental_reindex_embeds_only_changed_chunks(monkeypatch):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from backend.services.index_store import chunk_hash
+    from backend.workers import tasks_index
+
+    class ChunkDb:
+        def __init__(self):
+            self.chunks: dict[int, dict] = {}
+            self.document: dict = {"file_id": 1, "meta": {}}
+            self.commits = 0
+
+        def insert(self, pos, text):
+            chunk_id = len(self.chunks) + 100
+            self.chunks[chunk_id] = {"pos": pos, "text": text, "hash": chunk_hash(text)}
+            return chunk_id
+
+        async def execute(self, query, params=None):
+            text, params = str(query), params or {}
+            if "FROM files" in text:
+                return FakeResult([Row(id=2, bucket="docs", object_key="b.txt", owner_id=1, size_bytes=10)])
+            if "SELECT id FROM documents" in text:
+                return FakeResult([Row(id=1)] if params["fid"] == self.document["file_id"] else [])
+            if "SET pos = -c.pos - 1" in text:
+                rows = []
+                for chunk_id, chunk in self.chunks.items():
+                    chunk["pos"] = -chunk["pos"] - 1
+                    rows.append(Row(id=chunk_id, hash=chunk["hash"], embedded=True))
+                return FakeResult(rows)
+            if "UPDATE chunks c" in text:
+                for chunk_id, pos in zip(params["ids"], params["positions"]):
+                    self.chunks[chunk_id]["pos"] = pos
+                return FakeResult([])
+            if "INSERT INTO chunks" in text:
+                ids = [self.insert(pos, body) for pos, body in zip(params["positions"], params["texts"])]
+                return FakeResult([Row(id=i, pos=p) for i, p in zip(ids, params["positions"])])
+            if "DELETE FROM chunks" in text:
+                parked = [i for i, chunk in self.chunks.items() if chunk["pos"] < 0]
+                for chunk_id in parked:
+                    del self.chunks[chunk_id]
+                return types.SimpleNamespace(rowcount=len(parked))
+            if "UPDATE documents" in text:
+                self.document.update(file_id=params["fid"], meta=json.loads(params["counts"]))
+            return FakeResult([])
+
+        async def commit(self):
+            self.commits += 1
+
+    sentences = [f"문장{i} 은 변경 전 내용입니다." for i in range(40)]
+    db = ChunkDb()
+    old_chunks = [(chunk.pos, chunk.text) for chunk in tasks_index.OffsetChunker(32, 0).chunks("\n\n".join(sentences))]
+    for pos, body in old_chunks:
+        db.insert(pos, body)
+    sentences[20] = "문장20 은 고친 내용입니다."
+
+    embedded: list[str] = []
+
+    async def fake_embed(texts, model="gte-small"):
+        embedded.extend(texts)
+        return [[0.1, 0.2]] * len(texts)
+
+    @asynccontextmanager
+    async def fake_session():
+        yield db
+
+    monkeypatch.setattr(tasks_index, "get_session", fake_session)
+    monkeypatch.setattr(tasks_index, "iter_object_text", lambda *a, **k: iter(["\n\n".join(sentences)]))
+    monkeypatch.setattr(tasks_index, "_call_embedding_service", fake_embed)
+    monkeypatch.setattr(tasks_index.settings, "embed_cache_enabled", False)
+    monkeypatch.setattr(tasks_index.settings, "index_embed_batch", 4)
+    monkeypatch.setattr(tasks_index.settings, "chunk_tokens", 32)
+    monkeypatch.setattr(tasks_index.settings, "chunk_overlap_tokens", 0)
+
+    asyncio.run(tasks_index._index_file(2, replaces_file_id=1))
+
+    stored = sorted((chunk["pos"], chunk["text"]) for chunk in db.chunks.values())
+    new_chunks = [(chunk.pos, chunk.text) for chunk in tasks_index.OffsetChunker(32, 0).chunks("\n\n".join(sentences))]
+    assert stored == new_chunks
+    changed = [body for _, body in new_chunks if body not in {old for _, old in old_chunks}]
+    assert embedded == changed and 0 < len(changed) < len(new_chunks)
+    assert db.document["file_id"] == 2 and db.commits == 1
+    reused = len(new_chunks) - len(changed)
+    assert db.document["meta"] == {"reused": reused, "embedded": len(changed), "deleted": len(changed)}
+
+
+def test_reindex_file_that_stays_busy_fails_the_run(monkeypatch):
+    from backend.workers import tasks_index
+
+    async def busy(*args, **kwargs):
+        raise tasks_index.FileBusy("file 1 is being indexed by another worker")
+
+    monkeypatch.setattr(tasks_index, "_index_claimed", busy)
+    task = types.SimpleNamespace(request=types.SimpleNamespace(retries=3), max_retries=3)
+
+    # 재인덱싱 파일은 재시도를 다 쓰면 실패로 올려 chord 의 reindex_failed 가 실행되게 합니다.
+    with pytest.raises(tasks_index.FileBusy):
+        tasks_index.run_index_with_retry(task, 1, 3, reindex_run=9)
+    # 일반 인덱싱은 먼저 잡은 워커가 끝내므로 파일을 error 로 표시하지 않고 넘어갑니다.
+    assert tasks_index.run_index_with_retry(task, 1, 3) == "busy"
+
+
+def test_reindex_lanes_and_atomic_switch_over():
+    import asyncio
+
+    from backend.services import reindex
+
+    lanes = reindex.split_lanes(list(range(1, 11)), 4)
+    assert len(lanes) == 4 and sorted(sum(lanes, [])) == list(range(1, 11))
+    assert max(map(len, lanes)) - min(map(len, lanes)) <= 1
+    assert reindex.split_lanes([5], 4) == [[5]]
+
+    class Recorder:
+        def __init__(self, running, staged=2):
+            self.running = running
+            self.staged = staged
+            self.statements: list[str] = []
+
+        async def execute(self, query, params=None):
+            text = " ".join(query.text.split())
+            self.statements.append(text)
+            if text.startswith("SELECT pipeline_id, total FROM reindex_runs"):
+                run = Row(pipeline_id=3, total=2) if self.running else None
+                return types.SimpleNamespace(fetchone=lambda: run)
+            if text.startswith("SELECT count(DISTINCT file_id)"):
+                return types.SimpleNamespace(scalar_one=lambda: self.staged)
+            if text.startswith("SELECT id FROM reindex_runs"):
+                rows = [Row(id=3)] if self.running else []
+                return types.SimpleNamespace(scalar_one_or_none=lambda: rows[0].id if rows else None)
+            return FakeResult([])
+
+    session = Recorder(running=True)
+    assert asyncio.run(reindex.switch_over(session, 9)) == 3
+    kinds = [text.split(" WHERE")[0].split(" FROM")[0] for text in session.statements]
+    assert kinds == [
+        "SELECT pipeline_id, total",
+        "SELECT count(DISTINCT file_id)",
+        "UPDATE embeddings e SET pipeline_id = :pipeline_id",
+        "DELETE",
+        "DELETE",
+        "DELETE",
+        "UPDATE documents SET meta = meta - 'reindex_run'",
+        "UPDATE reindex_runs SET status = 'done', finished_at = NOW()",
+    ]
+    # 옛 문서 삭제는 대기 문서 표시를 지우기 전에, 이번 실행이 다시 만든 파일로만 한정합니다.
+    assert all("reindex_run' = CAST(:run AS text)" in text for text in session.statements[3:6])
+
+    idle = Recorder(running=False)
+    assert asyncio.run(reindex.switch_over(idle, 9)) is None and len(idle.statements) == 1
+
+    # 진행이 멈춘 running 실행은 대기 문서를 지우고 failed 로 닫아 새 실행을 막지 않습니다.
+    stale = Recorder(running=True)
+    assert asyncio.run(reindex.expire_stale_run(stale, 9, 3600)) == 3
+    assert "updated_at < NOW() - make_interval" in stale.statements[0]
+    assert stale.statements[-1].startswith("UPDATE reindex_runs SET status = 'failed'")
+    fresh = Recorder(running=False)
+    assert asyncio.run(reindex.expire_stale_run(fresh, 9, 3600)) is None and len(fresh.statements) == 1
+
+    # 한 파일이라도 대기 문서를 못 만들었으면(예: 계속 다른 워커가 잡고 있음) 바꾸지 않고 실행을 버립니다.
+    partial = Recorder(running=True, staged=1)
+    assert asyncio.run(reindex.switch_over(partial, 9)) is None
+    assert not any(text.startswith("UPDATE embeddings") for text in partial.statements)
+    assert partial.statements[-1].startswith("UPDATE reindex_runs SET status = 'failed'")
+
+    class DispatchDb:
+        dispatched = False
+
+        async def execute(self, query, params):
+            assert "dispatched_at IS NULL" in query.text
+            claimed, self.dispatched = not self.dispatched, True
+            return types.SimpleNamespace(scalar_one_or_none=lambda: params["run"] if claimed else None)
+
+    # acks_late 로 다시 배달된 reindex_pipeline 은 같은 실행의 chord 를 다시 보내지 않습니다.
+    dispatch = DispatchDb()
+    assert asyncio.run(reindex.claim_dispatch(dispatch, 9)) is True
+    assert asyncio.run(reindex.claim_dispatch(dispatch, 9)) is False
@@ -0,0 +1,104 @@
+"""스트리밍 전처리/청킹이 기존 일괄 처리와 같은 결과를 내는지 검증."""
+from __future__ import annotations
+
+import codecs
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from backend.services.chunking import (
+    EstimatedTokenCounter,
+    OffsetChunker,
+    iter_sliding_window_chunks,
+    sliding_window_chunks,
+)
+from backend.services.preprocess import StreamingPreprocessor, normalize_layout, preprocess
+
+WORDS = ["고객", "문의", "test@example.com", "010-1234-5678", "```code```", "hate", "정책", "a", "é", " ", "\n\n", "\t"]
+
+
+def _corpus(seed: int, n: int = 3000) -> str:
+    rng = random.Random(seed)
+    return "".join(rng.choice(WORDS) + rng.choice([" ", "", "\n", "  "]) for _ in range(n))
+
+
+def _byte_parts(text: str, seed: int) -> list[str]:
+    """임의 크기 바이트 조각으로 자른 뒤 증분 디코딩(MinIO 스트림과 동일한 방식)."""
+
+    rng = random.Random(seed)
+    data = text.encode("utf-8")
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts, pos = [], 0
+    while pos < len(data):
+        size = rng.randint(1, 64)
+        parts.append(decoder.decode(data[pos : pos + size]))
+        pos += size
+    parts.append(decoder.decode(b"", final=True))
+    return parts
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("chunk_size,overlap", [(50, 10), (7, 7), (5, 9), (800, 120)])
+def test_streaming_matches_batch(seed, chunk_size, overlap):
+    text = _corpus(seed)
+    expected = preprocess(text)
+
+    preprocessor = StreamingPreprocessor()
+    chunks = list(
+        iter_sliding_window_chunks(preprocessor.words(_byte_parts(text, seed)), chunk_size=chunk_size, overlap=overlap)
+    )
+
+    assert chunks == sliding_window_chunks(expected.text, chunk_size=chunk_size, overlap=overlap)
+    assert preprocessor.language == expected.language
+
+
+SENTENCES = ["환불은 7일 이내에 가능합니다.", "Hold the reset button for five seconds.", "오류 E4031 이 계속되나요?"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("chunk_tokens,overlap", [(40, 8), (120, 0), (25, 24)])
+def test_offset_chunker_streaming_matches_batch(seed, chunk_tokens, overlap):
+    rng = random.Random(seed)
+    text = "".join(rng.choice(SENTENCES) + rng.choice([" ", "\n", "\n\n", " \t"]) for _ in range(400)) + _corpus(seed)
+    processed = "".join(StreamingPreprocessor().text([text]))
+    # 줄바꿈/문단만 남기고 나머지 전처리 결과는 preprocess 와 같습니다.
+    assert processed == normalize_layout(processed)
+    assert processed.split() == preprocess(text).text.split()
+
+    chunker = OffsetChunker(chunk_tokens=chunk_tokens, overlap_tokens=overlap)
+    expected = list(chunker.chunks(processed))
+    streamed = list(chunker.iter_chunks(StreamingPreprocessor().text(_byte_parts(text, seed))))
+
+    assert streamed == expected
+    assert [chunk.text for chunk in streamed] == [processed[chunk.start : chunk.end] for chunk in expected]
+    counter = EstimatedTokenCounter()
+    assert all(0 < counter.token_starts(chunk.text).size <= chunk_tokens for chunk in expected)
+    assert expected[-1].end == len(processed)
+
+
+def test_offset_chunker_snaps_to_sentences():
+    text = " ".join(SENTENCES * 20)
+    chunks = list(OffsetChunker(chunk_tokens=30, overlap_tokens=6).chunks(text))
+
+    assert len(chunks) > 1
+    assert all(chunk.text.endswith((".", "?")) for chunk in chunks)
+    assert all(chunk.text.startswith(tuple(sentence[:3] for sentence in SENTENCES)) for chunk in chunks)
+
+
+def test_segment_cuts_never_split_pii_matches(monkeypatch):
+    import re
+
+    from backend.services import preprocess as preprocess_module
+    from backend.services.text_scanner import TextScanner
+
+    # 공백을 포함하는 규칙도 구간 경계에서 잘리지 않아야 합니다.
+    monkeypatch.setattr(preprocess_module, "scanner", TextScanner([(re.compile(r"\b\d{3} \d{4}\b"), "[번호]")], {}))
+    text = " ".join(["문의", "123 4567", "번호", "x"] * 300)
+    expected = preprocess_module.mask_pii(normalize_layout(text))
+
+    for seed in range(3):
+        assert "".join(StreamingPreprocessor().text(_byte_parts(text, seed))) == expected
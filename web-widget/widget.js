@@ -1,6 +1,7 @@
 (function () {
   /**
    * 비전공자 팁: 위젯은 배포 토큰으로 API를 호출하고, postMessage 로 결과를 부모 창에 전달합니다.
+   * askStream 은 답변이 생성되는 대로 조각(token)을 받아 화면에 바로 보여줄 수 있게 합니다.
    */
   const script = document.currentScript;
   const token = script.getAttribute('data-token');
@@ -17,5 +18,51 @@
     return data;
   }
 
-  window.AIBlockWidget = { ask };
+  // Server-Sent Events 프레임("event: ...\ndata: ...\n\n")을 하나씩 해석
+  function parseFrame(frame) {
+    let event = 'message';
+    const data = [];
+    frame.split('\n').forEach((line) => {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+    });
+    return { event, data: data.length ? JSON.parse(data.join('\n')) : null };
+  }
+
+  async function askStream(question, onToken) {
+    const res = await fetch(endpoint, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({ q: question, stream: true })
+    });
+    if (!res.ok || !res.body) {
+      throw new Error(`query failed: ${res.status}`);
+    }
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let sep;
+      while ((sep = buffer.indexOf('\n\n')) >= 0) {
+        const { event, data } = parseFrame(buffer.slice(0, sep));
+        buffer = buffer.slice(sep + 2);
+        if (event === 'token') {
+          if (onToken) onToken(data.text);
+          window.parent.postMessage({ type: 'rag-token', payload: data }, '*');
+        } else if (event === 'done') {
+          result = data;
+          window.parent.postMessage({ type: 'rag-answer', payload: data }, '*');
+        } else if (event === 'error') {
+          throw new Error(data.detail);
+        }
+      }
+    }
+    return result;
+  }
+
+  window.AIBlockWidget = { ask, askStream };
 })();